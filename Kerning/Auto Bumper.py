@@ -8,8 +8,9 @@ Specify a minimum distance, left and right glyphs, and Auto Bumper will add the
 import vanilla
 from mekkablue import mekkaObject, reportTimeInNaturalLanguage
 from timeit import default_timer as timer
-from kernanalysis import intervalList, minDistanceBetweenTwoLayers, sortedIntervalsFromString, stringToListOfGlyphsForFont, effectiveKerning, distanceFromEntry
-from AppKit import NSColor
+from kernprofile import envelopeProfile, minDistanceBetweenProfiles
+from kernanalysis import glyphChangeMarker, intervalList, minDistanceBetweenTwoLayers, sortedIntervalsFromString, stringToListOfGlyphsForFont, effectiveKerning, distanceFromEntry, ProfileCache, DecomposedLayerCache, PairDistanceCache, KerningGroupIndex
+from AppKit import NSColor, NSNotFound
 from GlyphsApp import Glyphs, Message
 
 defaultStrings = """
@@ -77,16 +78,19 @@ class Bumper(mekkaObject):
 		"reuseCurrentTab": 1,
 		"avoidZeroKerning": 1,
 		"suffix": "",
+		"reuseMeasurements": 1,
+		"measureGroupEnvelopes": 0,
 
 		"kernStrings": defaultStrings,
 	}
+	groupIndex = None  # kept across runs, see kerningGroupIndex()
 
 	def __init__(self):
 		# register prefs if run for the first time:
 
 		# Window 'self.w':
 		windowWidth = 500
-		windowHeight = 365
+		windowHeight = 413
 		windowWidthResize = 500  # user can resize width by this value
 		windowHeightResize = 500  # user can resize height by this value
 		self.w = vanilla.FloatingWindow(
@@ -173,6 +177,14 @@ class Bumper(mekkaObject):
 		self.w.reportInMacroWindow.getNSButton().setToolTip_("Outputs a detailed report in the Macro Window, and opens it.")
 		linePos += lineHeight
 
+		self.w.measureGroupEnvelopes = vanilla.CheckBox((inset + 5, linePos, -inset, smallCheckboxHeight), "Measure group envelopes (all members of a group at once)", value=False, sizeStyle='small', callback=self.SavePreferences)
+		self.w.measureGroupEnvelopes.getNSButton().setToolTip_("Only with ‘As groups’: combines the outermost edges of all members of a kerning group into one profile, and measures every group pair only once, against the group kerning. Much faster with many accented glyphs. Kerning exceptions are not considered, but deleted if ‘Delete exceptions when group-kerning’ is on.")
+		linePos += lineHeight
+
+		self.w.reuseMeasurements = vanilla.CheckBox((inset + 5, linePos, -inset, smallCheckboxHeight), "Reuse measurements of unchanged glyphs from earlier runs", value=True, sizeStyle='small', callback=self.SavePreferences)
+		self.w.reuseMeasurements.getNSButton().setToolTip_("Keeps the measured distances on disk (Glyphs Temp folder), keyed by the outlines of both glyphs. Next time, only pairs with an edited glyph are measured again. Kerning changes do not require new measurements.")
+		linePos += lineHeight
+
 		self.w.openNewTabWithKernPairs = vanilla.CheckBox((inset + 5, linePos, tabStop - inset, smallCheckboxHeight), "Open Edit tab with new kern pairs", value=False, sizeStyle='small', callback=self.SavePreferences)
 		self.w.openNewTabWithKernPairs.getNSButton().setToolTip_("If kern pairs were added, opens them in a new Edit tab, for inspection.")
 		self.w.reuseCurrentTab = vanilla.CheckBox((inset + tabStop, linePos, -inset, 20), "Reuse current tab", value=True, callback=self.SavePreferences, sizeStyle='small')
@@ -293,6 +305,94 @@ class Bumper(mekkaObject):
 					print("- %s %s: %i" % (leftSide, rightSide, newKernValue))
 				return True  # increase kern count
 
+	def removeExceptions(self, thisFont, thisMasterID, leftName, rightName, leftSide, rightSide, leftIsGroups, rightIsGroups):
+		"""Deletes the kerning exceptions of a glyph pair that override the group kerning between leftSide and rightSide."""
+		if leftIsGroups and thisFont.kerningForPair(thisMasterID, leftName, rightSide) is not None:
+			thisFont.removeKerningForPair(thisMasterID, leftName, rightSide)
+		if rightIsGroups and thisFont.kerningForPair(thisMasterID, leftSide, rightName) is not None:
+			thisFont.removeKerningForPair(thisMasterID, leftSide, rightName)
+		if (leftIsGroups and rightIsGroups) and thisFont.kerningForPair(thisMasterID, leftName, rightName) is not None:
+			thisFont.removeKerningForPair(thisMasterID, leftName, rightName)
+
+	def kerningGroupIndex(self, thisFont):
+		"""One group index per window, kept across runs and only rebuilt if the kerning groups have changed in between."""
+		if self.groupIndex is None or self.groupIndex.font is not thisFont:
+			self.groupIndex = KerningGroupIndex(thisFont)
+		elif self.groupIndex.isOutdated():
+			self.groupIndex.invalidate()
+		return self.groupIndex
+
+	def envelopeSides(self, thisFont, thisMasterID, glyphs, isGroups, isLeftSide, step, profileCache, layerCache, excludeNonExporting, groupIndex):
+		"""
+		Returns a list of (kernSide, representativeGlyphName, profile) tuples, one per kerning group if isGroups,
+		else one per glyph. Group profiles are the envelope of all group members in the font.
+		Sides without any outline (e.g. spaces) are left out, there is nothing to measure.
+		"""
+		sides = []
+		sidesDone = set()
+		for thisGlyph in glyphs:
+			if isGroups:
+				group = thisGlyph.rightKerningGroup if isLeftSide else thisGlyph.leftKerningGroup
+				if not group:
+					print("⚠️ %s glyph %s has no kerning group. Cannot apply group kerning." % ("Left" if isLeftSide else "Right", thisGlyph.name))
+					continue
+				kernSide = "@MMK_%s_%s" % ("L" if isLeftSide else "R", group)
+				memberNames = [name for name in groupIndex.members(group, isTheLeftSide=isLeftSide) if thisFont.glyphs[name].export or not excludeNonExporting] or [thisGlyph.name]
+			else:
+				kernSide = thisGlyph.name
+				memberNames = [thisGlyph.name]
+			if kernSide in sidesDone:
+				continue
+			sidesDone.add(kernSide)
+			profile = envelopeProfile(
+				(profileCache.profileForLayer(layerCache.layer(name, thisMasterID), interval=step, glyphName=name, masterID=thisMasterID) for name in memberNames),
+				step,
+			)
+			if not len(profile):
+				continue
+			sides.append((kernSide, thisGlyph.name, profile))
+		return sides
+
+	def bumpGroupEnvelopes(self, thisFont, thisMasterID, firstGlyphList, secondGlyphList, leftIsGroups, rightIsGroups, minDistance, maxDistance, step, ignoreIntervals, profileCache, layerCache, excludeNonExporting, resetExceptionsForGroups=False):
+		"""Measures every group (or glyph) pair only once, returns (kernCount, tabString)."""
+		if resetExceptionsForGroups:
+			# like the glyph-by-glyph measuring: exceptions must not override the group kerning measured here
+			for leftGlyph in firstGlyphList:
+				leftSide = "@MMK_L_%s" % leftGlyph.rightKerningGroup if leftIsGroups else leftGlyph.name
+				if leftIsGroups and not leftGlyph.rightKerningGroup:
+					continue
+				for rightGlyph in secondGlyphList:
+					rightSide = "@MMK_R_%s" % rightGlyph.leftKerningGroup if rightIsGroups else rightGlyph.name
+					if rightIsGroups and not rightGlyph.leftKerningGroup:
+						continue
+					self.removeExceptions(thisFont, thisMasterID, leftGlyph.name, rightGlyph.name, leftSide, rightSide, leftIsGroups, rightIsGroups)
+
+		groupIndex = self.kerningGroupIndex(thisFont)
+		leftSides = self.envelopeSides(thisFont, thisMasterID, firstGlyphList, leftIsGroups, True, step, profileCache, layerCache, excludeNonExporting, groupIndex=groupIndex)
+		rightSides = self.envelopeSides(thisFont, thisMasterID, secondGlyphList, rightIsGroups, False, step, profileCache, layerCache, excludeNonExporting, groupIndex=groupIndex)
+		if self.pref("reportInMacroWindow"):
+			print("Measuring %i×%i envelope pairs instead of %i×%i glyph pairs.\n" % (len(leftSides), len(rightSides), len(firstGlyphList), len(secondGlyphList)))
+
+		kernCount = 0
+		tabString = ""
+		for index, (leftSide, leftName, leftProfile) in enumerate(leftSides):
+			self.w.bar.set(int(100 * (float(index) / len(leftSides))))
+			for rightSide, rightName, rightProfile in rightSides:
+				kerning = thisFont.kerningForPair(thisMasterID, leftSide, rightSide)
+				if kerning is None or kerning >= NSNotFound:
+					existingKerning, kerning = NSNotFound, 0.0
+				else:
+					existingKerning = kerning
+				distanceBetweenShapes = minDistanceBetweenProfiles(leftProfile, rightProfile, kerning=kerning, ignoreIntervals=ignoreIntervals)
+				if distanceBetweenShapes is None:
+					continue
+				for threshold, isBumpNeeded in ((minDistance, minDistance and distanceBetweenShapes < minDistance), (maxDistance, maxDistance and distanceBetweenShapes > maxDistance)):
+					if isBumpNeeded and self.addMissingKerning(thisFont, thisMasterID, leftSide, rightSide, threshold, distanceBetweenShapes, existingKerning=existingKerning):
+						kernCount += 1
+						tabString += "/%s/%s  " % (leftName, rightName)
+			tabString = tabString.strip() + "\n"
+		return kernCount, tabString
+
 	def BumperMain(self, sender):
 		try:
 			# save prefs
@@ -354,13 +454,15 @@ class Bumper(mekkaObject):
 				self.w.suffix.set(cleanedSuffix)
 				self.SavePreferences()
 			else:
-				# find list of glyph names:
+				# find list of glyph names (glyph changes are checked once for both lists):
+				changeMarker = glyphChangeMarker(thisFont)
 				firstGlyphList = stringToListOfGlyphsForFont(
 					self.pref("leftGlyphs"),
 					thisFont,
 					report=shouldReportInMacroWindow,
 					excludeNonExporting=shouldExcludeNonExporting,
 					suffix=suffix,
+					changeMarker=changeMarker,
 				)
 				secondGlyphList = stringToListOfGlyphsForFont(
 					self.pref("rightGlyphs"),
@@ -368,6 +470,7 @@ class Bumper(mekkaObject):
 					report=shouldReportInMacroWindow,
 					excludeNonExporting=shouldExcludeNonExporting,
 					suffix=suffix,
+					changeMarker=changeMarker,
 				)
 
 				# report key values for kerning:
@@ -388,13 +491,25 @@ class Bumper(mekkaObject):
 
 				tabString = ""
 				kernCount = 0
+				profileCache = ProfileCache()  # measure every glyph only once
+				layerCache = DecomposedLayerCache(thisFont)  # decompose every glyph only once
+				distanceCache = None
 				numOfGlyphs = len(firstGlyphList)
+				if self.prefBool("measureGroupEnvelopes") and (leftIsGroups or rightIsGroups):
+					kernCount, tabString = self.bumpGroupEnvelopes(
+						thisFont, thisMasterID, firstGlyphList, secondGlyphList, leftIsGroups, rightIsGroups, minDistance, maxDistance, step, ignoreIntervals, profileCache, layerCache, shouldExcludeNonExporting,
+						resetExceptionsForGroups=resetExceptionsForGroups,
+					)
+					numOfGlyphs = 0  # skip glyph-by-glyph measuring
+				elif self.prefBool("reuseMeasurements"):
+					# glyph pair distances, envelopes are not cached:
+					distanceCache = PairDistanceCache(thisFont.filepath or thisFont.familyName, interval=step, ignoreIntervals=ignoreIntervals)
 				for index in range(numOfGlyphs):
 					# update progress bar:
 					self.w.bar.set(int(100 * (float(index) / numOfGlyphs)))
 					# determine left glyph:
 					leftGlyph = firstGlyphList[index]
-					leftLayer = leftGlyph.layers[thisMasterID]
+					leftLayer = layerCache.layer(leftGlyph.name, thisMasterID)
 					leftGroup = leftGlyph.rightKerningGroup
 					if leftIsGroups:
 						if leftGroup:
@@ -409,7 +524,7 @@ class Bumper(mekkaObject):
 					if leftSide:
 						# cycle through right glyphs:
 						for rightGlyph in secondGlyphList:
-							rightLayer = rightGlyph.layers[thisMasterID]
+							rightLayer = layerCache.layer(rightGlyph.name, thisMasterID)
 							rightGroup = rightGlyph.leftKerningGroup
 							if rightIsGroups:
 								if rightGroup:
@@ -423,17 +538,30 @@ class Bumper(mekkaObject):
 							# only continue if we could establish a right side:
 							if rightSide:
 								if resetExceptionsForGroups:
-									if leftIsGroups and thisFont.kerningForPair(thisMasterID, leftGlyph.name, rightSide) is not None:
-										thisFont.removeKerningForPair(thisMasterID, leftGlyph.name, rightSide)
-									if rightIsGroups and thisFont.kerningForPair(thisMasterID, leftSide, rightGlyph.name) is not None:
-										thisFont.removeKerningForPair(thisMasterID, leftSide, rightGlyph.name)
-									if (leftIsGroups and rightIsGroups) and thisFont.kerningForPair(thisMasterID, leftGlyph.name, rightGlyph.name) is not None:
-										thisFont.removeKerningForPair(thisMasterID, leftGlyph.name, rightGlyph.name)
+									self.removeExceptions(thisFont, thisMasterID, leftGlyph.name, rightGlyph.name, leftSide, rightSide, leftIsGroups, rightIsGroups)
 
 								kerning = effectiveKerning(leftGlyph.name, rightGlyph.name, thisFont, thisMasterID)
-								distanceBetweenShapes = minDistanceBetweenTwoLayers(
-									leftLayer, rightLayer, interval=step, kerning=kerning, report=False, ignoreIntervals=ignoreIntervals
-								)
+								isMeasured = False
+								if distanceCache:
+									leftHash = layerCache.contentHash(leftGlyph.name, thisMasterID)
+									rightHash = layerCache.contentHash(rightGlyph.name, thisMasterID)
+									isMeasured, unkernedDistance = distanceCache.lookup(leftHash, rightHash)
+								if not isMeasured:
+									unkernedDistance = minDistanceBetweenTwoLayers(
+										leftLayer,
+										rightLayer,
+										interval=step,
+										kerning=0.0,
+										report=False,
+										ignoreIntervals=ignoreIntervals,
+										profileCache=profileCache,
+										leftName=leftGlyph.name,
+										rightName=rightGlyph.name,
+										masterID=thisMasterID,
+									)
+									if distanceCache:
+										distanceCache.store(leftHash, rightHash, unkernedDistance)
+								distanceBetweenShapes = None if unkernedDistance is None else unkernedDistance + kerning
 
 								# positive kerning (if desired):
 								if minDistance and (distanceBetweenShapes is not None) and (distanceBetweenShapes < minDistance):
@@ -470,6 +598,9 @@ class Bumper(mekkaObject):
 				# or report that nothing was found:
 				else:
 					report = f'No kerning added ({timereport}).'
+				if distanceCache:
+					distanceCache.save()
+					report += f" {distanceCache.report()}"
 
 				# Floating notification:
 				# notificationTitle = "Bumper: %s (%s)" % (thisFont.familyName, thisMaster.name)
@@ -490,6 +621,7 @@ class Bumper(mekkaObject):
 				# Report in Macro Window:
 				if shouldReportInMacroWindow:
 					print()
+					print(layerCache.report())
 					print(report)
 
 		except Exception as e:
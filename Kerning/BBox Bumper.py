@@ -8,7 +8,7 @@ Like Auto Bumper, but with the bounding box of a group of glyphs, and the kernin
 import vanilla
 import math
 from Foundation import NSRect, NSUnionRect, NSIsEmptyRect, NSInsetRect, NSStringFromRect, NSAffineTransform, NSAffineTransformStruct
-from kernanalysis import stringToListOfGlyphsForFont, minDistanceBetweenTwoLayers
+from kernanalysis import stringToListOfGlyphsForFont, minDistanceBetweenTwoLayers, layerBounds
 from GlyphsApp import Glyphs, GSFeature, GSLayer, GSPath, Message
 from mekkablue import mekkaObject
 
@@ -95,6 +95,16 @@ def unionRectForLayers(layers):
 	return unionRect
 
 
+def verticalExtentsForGlyphs(glyphs, masterID):
+	"""(yMin, yMax, glyph) of the master layers of glyphs. Empty layers are left out."""
+	extents = []
+	for glyph in glyphs:
+		bounds = layerBounds(glyph.layers[masterID])
+		if bounds.size.width > 0 or bounds.size.height > 0:
+			extents.append((bounds.origin.y, bounds.origin.y + bounds.size.height, glyph))
+	return extents
+
+
 class BBoxBumperKerning(mekkaObject):
 	prefDict = {
 		"token": "name like '*superior'",
@@ -132,6 +142,7 @@ class BBoxBumperKerning(mekkaObject):
 
 	otherGlyphsSuggestions = (
 		"ABCDEFGHIJKLMNOPQRSẞTUVWXYZabcdďðefghijklmnopqrsßtuvwxyz0123456789()[]{}:;,.„“”",
+		"@Letter @Number @Punctuation",
 		"ABCDEFGHIJKLMNOPQRSẞTUVWXYZ",
 		"abcdďðefghijklmnopqrsßtuvwxyz",
 		"()[]{}:;,.„“”",
@@ -338,8 +349,12 @@ class BBoxBumperKerning(mekkaObject):
 						bboxLayer.RSB = smallestRSB - bboxBubbleExtension
 						bboxKey = "@%s" % otClassName
 
-						print("  📐 Measuring distances with %i other glyphs..." % len(otherGlyphs))
-						for otherGlyph in otherGlyphs:
+						# only glyphs that vertically overlap the class bbox can touch it
+						# (skewing for italics moves points horizontally only), one query per master, so a plain filter is fastest:
+						bboxBottom, bboxTop = collectiveBounds.origin.y, collectiveBounds.origin.y + collectiveBounds.size.height
+						candidateGlyphs = [glyph for yMin, yMax, glyph in verticalExtentsForGlyphs(otherGlyphs, thisMaster.id) if yMin <= bboxTop and yMax >= bboxBottom]
+						print("  📐 Measuring distances with %i of %i other glyphs (others are out of vertical reach)..." % (len(candidateGlyphs), len(otherGlyphs)))
+						for otherGlyph in candidateGlyphs:
 							otherLayerStraightened = straightenedLayer(otherGlyph.layers[thisMaster.id])
 							if otherGlyphsOnLeftSide:
 								otherKey = None
@@ -8,6 +8,7 @@ Report differences in kerning structures between two masters.
 import vanilla
 from GlyphsApp import Glyphs, GSControlLayer, Message
 from mekkablue import mekkaObject
+from kernanalysis import KerningGroupIndex
 
 
 class CompareKerningBetweenMasters(mekkaObject):
@@ -110,21 +111,14 @@ class CompareKerningBetweenMasters(mekkaObject):
 		else:
 			self.w.runButton.enable(True)
 
-	def namesForGroupName(self, groupName, font, isLeft=True):
-		names = []
-		for g in font.glyphs:
-			if isLeft:  # left side = right group
-				if groupName[7:] == g.rightKerningGroup:
-					names.append(g.name)
-			else:
-				if groupName[7:] == g.leftKerningGroup:
-					names.append(g.name)
-		return names
+	def namesForGroupName(self, groupName, groupIndex, isLeft=True):
+		# left side = right group:
+		return groupIndex.members(groupName, isTheLeftSide=isLeft)
 
-	def glyphNameForKerningName(self, name, font, isLeft=True):
+	def glyphNameForKerningName(self, name, font, groupIndex, isLeft=True):
 		glyphName = None
 		if name[0] == "@":
-			names = self.namesForGroupName(name, font, isLeft=isLeft)
+			names = self.namesForGroupName(name, groupIndex, isLeft=isLeft)
 			if name.startswith("@MMK_"):
 				glyphName = name.split("_")[2]
 				if glyphName == "KO":
@@ -137,9 +131,7 @@ class CompareKerningBetweenMasters(mekkaObject):
 						glyphName = name
 						break
 		else:
-			glyph = font.glyphForId_(name)
-			if glyph:
-				glyphName = glyph.name
+			glyphName = groupIndex.glyphName(name)
 
 		if glyphName:
 			return glyphName
@@ -194,6 +186,7 @@ class CompareKerningBetweenMasters(mekkaObject):
 				secondKerning = thisFont.kerning[secondMaster.id]
 
 				missingKernCount = 0
+				groupIndex = KerningGroupIndex(thisFont)  # O(1) lookups of group members and glyph IDs
 
 				for L in set(firstKerning.keys() + secondKerning.keys()):
 					LisGroup = L[0] == "@"
@@ -203,8 +196,8 @@ class CompareKerningBetweenMasters(mekkaObject):
 							RKeys.extend(kerning[L].keys())
 					for R in set(RKeys):
 						RisGroup = R[0] == "@"
-						Lname = L if LisGroup else thisFont.glyphForId_(L).name
-						Rname = R if RisGroup else thisFont.glyphForId_(R).name
+						Lname = L if LisGroup else groupIndex.glyphName(L)
+						Rname = R if RisGroup else groupIndex.glyphName(R)
 						kerningInFirstMaster = thisFont.kerningForPair(firstMasterID, Lname, Rname)
 						kerningInSecondMaster = thisFont.kerningForPair(secondMasterID, Lname, Rname)
 						if kerningInFirstMaster is None or kerningInSecondMaster is None:
@@ -232,8 +225,8 @@ class CompareKerningBetweenMasters(mekkaObject):
 									targetList = glyph2groupLayersMissingSecond
 
 							if targetList is not None:
-								glyphNameOnLSide = self.glyphNameForKerningName(L, thisFont, isLeft=True)
-								glyphNameOnRSide = self.glyphNameForKerningName(R, thisFont, isLeft=False)
+								glyphNameOnLSide = self.glyphNameForKerningName(L, thisFont, groupIndex, isLeft=True)
+								glyphNameOnRSide = self.glyphNameForKerningName(R, thisFont, groupIndex, isLeft=False)
 								glyphOnLSide = thisFont.glyphs[glyphNameOnLSide]
 								glyphOnRSide = thisFont.glyphs[glyphNameOnRSide]
 								targetList.append(glyphOnLSide.layers[firstMaster.id])
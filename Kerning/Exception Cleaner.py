@@ -9,6 +9,7 @@ import vanilla
 from AppKit import NSBeep
 from GlyphsApp import Glyphs, Message
 from mekkablue import mekkaObject
+from kernanalysis import KerningGroupIndex, kerningTableForMaster
 
 
 class DeleteExceptionsTooCloseToGroupKerning(mekkaObject):
@@ -88,29 +89,19 @@ class DeleteExceptionsTooCloseToGroupKerning(mekkaObject):
 		else:
 			self.w.runButton.setTitle("Clean")
 
-	def glyphNameForKernSide(self, thisFont, kernSideName, isTheLeftSide=True):
-		if kernSideName.startswith("@"):
-			groupName = kernSideName.replace("@MMK_L_", "").replace("@MMK_R_", "").replace("@", "")
-			for thisGlyph in thisFont.glyphs:
-				if isTheLeftSide:
-					if thisGlyph.rightKerningGroup == groupName:
-						return thisGlyph.name
-				else:
-					if thisGlyph.leftKerningGroup == groupName:
-						return thisGlyph.name
-			print(
-				"⚠️ No glyph found for %s group: @%s" % (
-					"right" if isTheLeftSide else "left",  # if it is on the left side, we are looking for the right group and vice versa
-					groupName,
+	def glyphNameForKernSide(self, groupIndex, kernSideName, isTheLeftSide=True):
+		glyphName = groupIndex.glyphNameForKernSide(kernSideName, isTheLeftSide=isTheLeftSide)
+		if glyphName is None:
+			if kernSideName.startswith("@"):
+				print(
+					"⚠️ No glyph found for %s group: @%s" % (
+						"right" if isTheLeftSide else "left",  # if it is on the left side, we are looking for the right group and vice versa
+						groupIndex.groupName(kernSideName),
+					)
 				)
-			)
-			return None
-		else:
-			if thisFont.glyphs[kernSideName]:
-				return kernSideName
 			else:
 				print("⚠️ Glyph not found: %s" % kernSideName)
-				return None
+		return glyphName
 
 	def DeleteExceptionsTooCloseToGroupKerningMain(self, sender):
 		try:
@@ -130,6 +121,7 @@ class DeleteExceptionsTooCloseToGroupKerning(mekkaObject):
 				selection = thisFont.selectedLayers
 				if selection:
 					selectedGlyphs = [layer.parent for layer in selection]
+					selectedGlyphNames = set(glyph.name for glyph in selectedGlyphs)
 					selectedLeftGlyphGroups = [glyph.rightKerningGroup for glyph in selectedGlyphs]
 					selectedRightGlyphGroups = [glyph.leftKerningGroup for glyph in selectedGlyphs]
 				else:
@@ -140,7 +132,7 @@ class DeleteExceptionsTooCloseToGroupKerning(mekkaObject):
 					)
 					return
 			else:
-				selectedGlyphs = ()
+				selectedGlyphNames = ()
 				selectedLeftGlyphGroups = ()
 				selectedRightGlyphGroups = ()
 
@@ -151,114 +143,84 @@ class DeleteExceptionsTooCloseToGroupKerning(mekkaObject):
 			print("Master: %s" % thisMaster.name)
 			print()
 
-			# collect unnecessary kerning exceptions:
-			unnecessaryKernPairs = []
-			for leftSide in thisFont.kerning[thisMasterID].keys():
-				if leftSide.startswith("@"):
-					# group on the left side
-
-					leftGlyphGroup = leftSide.replace("@MMK_L_", "")
-					leftGlyphGroupMMK = leftSide
-
-					for rightSide in thisFont.kerning[thisMasterID][leftSide].keys():
-
-						if not rightSide.startswith("@"):
-							# right side is exception:
-							rightGlyph = thisFont.glyphForId_(rightSide)
-
-							if onlySelectedGlyphs:
-								okToContinue = (leftGlyphGroup in selectedLeftGlyphGroups) or (rightGlyph in selectedGlyphs)
-							else:
-								okToContinue = True
-
-							if okToContinue:
-								if not rightGlyph:
-									# found orphaned kerning, report and abort:
-									print("- Warning: could not find glyph for ID %s, consider cleaning up kerning" % rightSide)
-								else:
-									rightGlyphGroup = rightGlyph.leftKerningGroup
-
-									if not rightGlyphGroup:
-										# no corresponding kerning group, report and abort:
-										print("- Note: Glyph '%s' has no left group; skipping." % rightGlyph.name)
-									else:
-										rightGlyphGroupMMK = "@MMK_R_%s" % rightGlyphGroup
-										exceptionKerning = thisFont.kerning[thisMasterID][leftSide][rightSide]
-										groupKerning = thisFont.kerningForPair(thisMasterID, leftGlyphGroupMMK, rightGlyphGroupMMK)
-										if groupKerning is None or groupKerning > 100000:  # NSNotFound
-											groupKerning = 0
-										if abs(exceptionKerning - groupKerning) < threshold:
-											print(
-												"- Insignificant exception @%s-%s: %i vs. @%s-@%s: %i" % (
-													leftGlyphGroup,
-													rightGlyph.name,
-													exceptionKerning,
-													leftGlyphGroup,
-													rightGlyphGroup,
-													groupKerning,
-												)
-											)
-											unnecessaryKernPairs.append(("@%s" % leftGlyphGroup, rightGlyph.name))
+			# index groups and glyph IDs once:
+			groupIndex = KerningGroupIndex(thisFont)
+			reportedGlyphsWithoutGroup = set()
 
+			# collect unnecessary kerning exceptions from a flat snapshot of the master kerning:
+			orphanedKeys = []
+			kerningTable = kerningTableForMaster(thisFont, thisMasterID, groupIndex, orphanedKeys=orphanedKeys)
+			for orphanedKey in sorted(set(orphanedKeys)):
+				# found orphaned kerning, report and skip:
+				print("- Warning: could not find glyph for ID %s, consider cleaning up kerning" % orphanedKey)
+			unnecessaryKernPairs = []
+			for leftSide, rightSide, exceptionKerning in kerningTable.pairs():
+				leftIsGroup, rightIsGroup = leftSide.startswith("@"), rightSide.startswith("@")
+				if leftIsGroup and rightIsGroup:
+					continue
+
+				if leftIsGroup:
+					# group on the left side, right side is exception:
+					leftGlyphGroup = groupIndex.groupName(leftSide)
+					if onlySelectedGlyphs and not (leftGlyphGroup in selectedLeftGlyphGroups or rightSide in selectedGlyphNames):
+						continue
+					rightGlyphGroup = groupIndex.group(rightSide, isTheLeftSide=False)
+					if not rightGlyphGroup:
+						# no corresponding kerning group, report and abort:
+						print("- Note: Glyph '%s' has no left group; skipping." % rightSide)
+						continue
+					groupKerning = kerningTable.value("@MMK_L_%s" % leftGlyphGroup, "@MMK_R_%s" % rightGlyphGroup, 0)
+					if abs(exceptionKerning - groupKerning) < threshold:
+						print(
+							"- Insignificant exception @%s-%s: %i vs. @%s-@%s: %i" % (
+								leftGlyphGroup,
+								rightSide,
+								exceptionKerning,
+								leftGlyphGroup,
+								rightGlyphGroup,
+								groupKerning,
+							)
+						)
+						unnecessaryKernPairs.append(("@%s" % leftGlyphGroup, rightSide))
+					continue
+
+				# left side is exception, only proceed if the glyph is set to export:
+				if not thisFont.glyphs[leftSide].export:
+					continue
+				leftIsSelected = not onlySelectedGlyphs or leftSide in selectedGlyphNames
+				leftGlyphGroup = groupIndex.group(leftSide, isTheLeftSide=True)
+				if not leftGlyphGroup:
+					# no corresponding kerning group, report and abort:
+					if leftIsSelected and leftSide not in reportedGlyphsWithoutGroup:
+						reportedGlyphsWithoutGroup.add(leftSide)
+						print("- Note: Glyph '%s' has no right group; skipping." % leftSide)
+					continue
+
+				if rightIsGroup:
+					# exception-group:
+					rightGlyphGroup = groupIndex.groupName(rightSide)
+					rightSideName = "@%s" % rightGlyphGroup
+					okToContinue = leftIsSelected or rightGlyphGroup in selectedRightGlyphGroups
 				else:
-					# left side is exception
-					leftGlyph = thisFont.glyphForId_(leftSide)
-					okToContinue = (not onlySelectedGlyphs or leftGlyph in selectedGlyphs)
-					if not leftGlyph:
-						# found orphaned kerning, report and abort:
-						if okToContinue:
-							print("- Warning: could not find glyph for ID %s, consider cleaning up kerning" % leftSide)
-
-					elif leftGlyph.export:
-						# only proceed if the glyph is set to export:
-						leftGlyphGroup = leftGlyph.rightKerningGroup
-
-						if not leftGlyphGroup:
-							# no corresponding kerning group, report and abort:
-							if okToContinue:
-								print("- Note: Glyph '%s' has no right group; skipping." % leftGlyph.name)
-
-						else:
-							# step through exceptions:
-							leftGlyphGroupMMK = "@MMK_L_%s" % leftGlyphGroup
-
-							for rightSide in thisFont.kerning[thisMasterID][leftSide].keys():
-								if rightSide.startswith("@"):
-									# exception-group:
-									rightGlyph = None
-									rightGlyphGroupMMK = rightSide
-									rightGlyphGroup = rightSide.replace("@MMK_R_", "")
-									okToContinue = okToContinue or (not onlySelectedGlyphs or rightGlyphGroup in selectedRightGlyphGroups)
-								else:
-									# exception-exception:
-									rightGlyph = thisFont.glyphForId_(rightSide)
-									rightGlyphGroup = rightGlyph.leftKerningGroup
-									rightGlyphGroupMMK = "@MMK_R_%s" % rightGlyphGroup
-									okToContinue = okToContinue or (not onlySelectedGlyphs or rightGlyph in selectedGlyphs)
-
-								if okToContinue:
-									exceptionKerning = thisFont.kerning[thisMasterID][leftSide][rightSide]
-									groupKerning = thisFont.kerningForPair(thisMasterID, leftGlyphGroupMMK, rightGlyphGroupMMK)
-									if groupKerning is None or groupKerning > 100000:  # NSNotFound
-										groupKerning = 0
-
-									if abs(exceptionKerning - groupKerning) < threshold:
-										if rightGlyph:
-											rightSideName = rightGlyph.name
-										else:
-											rightSideName = "@%s" % rightGlyphGroup
-
-										print(
-											"- Found unnecessary exception %s-%s: %i vs. @%s-@%s: %i" % (
-												leftGlyph.name,
-												rightSideName,
-												exceptionKerning,
-												leftGlyphGroup,
-												rightGlyphGroup,
-												groupKerning,
-											)
-										)
-										unnecessaryKernPairs.append((leftGlyph.name, rightSideName))
+					# exception-exception:
+					rightGlyphGroup = groupIndex.group(rightSide, isTheLeftSide=False)
+					rightSideName = rightSide
+					okToContinue = leftIsSelected or rightSide in selectedGlyphNames
+
+				if okToContinue:
+					groupKerning = kerningTable.value("@MMK_L_%s" % leftGlyphGroup, "@MMK_R_%s" % rightGlyphGroup, 0)
+					if abs(exceptionKerning - groupKerning) < threshold:
+						print(
+							"- Found unnecessary exception %s-%s: %i vs. @%s-@%s: %i" % (
+								leftSide,
+								rightSideName,
+								exceptionKerning,
+								leftGlyphGroup,
+								rightGlyphGroup,
+								groupKerning,
+							)
+						)
+						unnecessaryKernPairs.append((leftSide, rightSideName))
 
 			if not unnecessaryKernPairs:
 				Message(
@@ -285,8 +247,8 @@ class DeleteExceptionsTooCloseToGroupKerning(mekkaObject):
 						thisFont.removeKerningForPair(thisMasterID, leftSide, rightSide)
 
 					# COLLECT FOR REPORT
-					leftGlyphName = self.glyphNameForKernSide(thisFont, leftSide, isTheLeftSide=True)
-					rightGlyphName = self.glyphNameForKernSide(thisFont, rightSide, isTheLeftSide=False)
+					leftGlyphName = self.glyphNameForKernSide(groupIndex, leftSide, isTheLeftSide=True)
+					rightGlyphName = self.glyphNameForKernSide(groupIndex, rightSide, isTheLeftSide=False)
 					if leftGlyphName is not None and rightGlyphName is not None:
 						tabString += "/%s/%s " % (leftGlyphName, rightGlyphName)
 
@@ -10,7 +10,8 @@ from timeit import default_timer as timer
 from Foundation import NSNotFound
 from GlyphsApp import Glyphs, Message
 from mekkablue import mekkaObject, caseDict
-from kernanalysis import distanceFromEntry
+from kernanalysis import distanceFromEntry, DecomposedLayerCache, PairReport, reportPathForFont
+from kernprofile import BoxPrefilter
 
 
 intervalList = (1, 3, 5, 10, 20)
@@ -40,12 +41,13 @@ class GapFinder(mekkaObject):
 		"excludeNonExporting": 1,
 		"reportGapsInMacroWindow": 0,
 		"reuseCurrentTab": 1,
+		"saveReport": 0,
 	}
 
 	def __init__(self):
 		# Window 'self.w':
 		windowWidth = 410
-		windowHeight = 260
+		windowHeight = 282
 		windowWidthResize = 800  # user can resize width by this value
 		windowHeightResize = 0  # user can resize height by this value
 		self.w = vanilla.FloatingWindow(
@@ -91,6 +93,10 @@ class GapFinder(mekkaObject):
 		self.w.excludeNonExporting = vanilla.CheckBox((inset + 2, linePos, -inset, 20), "Exclude non-exporting glyphs", value=True, sizeStyle='small', callback=self.SavePreferences)
 		linePos += lineHeight
 
+		self.w.saveReport = vanilla.CheckBox((inset + 2, linePos, -inset, 20), "Save CSV report next to font file", value=False, sizeStyle='small', callback=self.SavePreferences)
+		self.w.saveReport.getNSButton().setToolTip_("If enabled, writes every pair with a gap and its distance into a CSV file in the folder of the font file, while the scan is running. Useful for triaging large results.")
+		linePos += lineHeight
+
 		self.w.reportGapsInMacroWindow = vanilla.CheckBox((inset + 2, linePos, -inset, 20), "Also report in Macro Window (slower)", value=False, sizeStyle='small', callback=self.SavePreferences)
 		self.w.reuseCurrentTab = vanilla.CheckBox((inset + 240, linePos, -inset, 20), "Reuse current tab", value=True, callback=self.SavePreferences, sizeStyle='small')
 		self.w.reuseCurrentTab.getNSButton().setToolTip_("If enabled, will not open a new tab with newly added kern pairs, but reuse the current Edit tab. Will open an Edit tab if none is open.")
@@ -279,33 +285,33 @@ class GapFinder(mekkaObject):
 				print("Left glyphs:\n%s\n" % ", ".join(firstList))
 				print("Right glyphs:\n%s\n" % ", ".join(secondList))
 
-			tabString = "\n"
+			reportPath = reportPathForFont(thisFont, thisFontMaster, "GapFinder") if self.prefBool("saveReport") else None
+			pairReport = PairReport(reportPath=reportPath)  # one list entry per pair, several tabs if necessary
 			gapCount = 0
+			layerCache = DecomposedLayerCache(thisFont)  # decompose every glyph only once
+			prefilter = BoxPrefilter(maxDistance=maxDistance)  # skip pairs that cannot have a gap
 			numOfGlyphs = len(firstList)
 			for index in range(numOfGlyphs):
 				# update progress bar:
 				self.w.bar.set(int(100 * (float(index) / numOfGlyphs)))
 				# determine left glyph:
 				firstGlyphName = firstList[index]
-				leftLayer = thisFont.glyphs[firstGlyphName].layers[thisFontMasterID]
+				leftLayer = layerCache.layer(firstGlyphName, thisFontMasterID)
 
 				# cycle through right glyphs:
 				for secondGlyphName in secondList:
-					rightLayer = thisFont.glyphs[secondGlyphName].layers[thisFontMasterID]
 					kerning = self.effectiveKerning(firstGlyphName, secondGlyphName, thisFont, thisFontMasterID)
+					if not prefilter.needsMeasuring(layerCache.box(firstGlyphName, thisFontMasterID), layerCache.box(secondGlyphName, thisFontMasterID), kerning):
+						continue
+					rightLayer = layerCache.layer(secondGlyphName, thisFontMasterID)
 					distanceBetweenShapes = self.minDistanceBetweenTwoLayers(leftLayer, rightLayer, interval=step, kerning=kerning, report=False)
 					if distanceBetweenShapes is not None and distanceBetweenShapes > maxDistance:
 						gapCount += 1
-						tabString += f"/{firstGlyphName}/{secondGlyphName}/space"
+						pairReport.add(firstGlyphName, secondGlyphName, distance=distanceBetweenShapes, kerning=kerning)
 						if self.pref("reportGapsInMacroWindow"):
 							print("- %s %s: %i" % (firstGlyphName, secondGlyphName, distanceBetweenShapes))
-				tabString += "\n"
-
-			# clean up the tab string:
-			tabString = tabString[:-6].replace("/space\n", "\n")
-			while "\n\n" in tabString:
-				tabString = tabString.replace("\n\n", "\n")
-			tabString = tabString[1:]
+				pairReport.newLine()
+			pairReport.close()
 
 			# update progress bar:
 			self.w.bar.set(100)
@@ -322,16 +328,17 @@ class GapFinder(mekkaObject):
 			else:
 				timereport = "%i seconds" % seconds
 
-			# open new Edit tab:
-			if tabString:
-				if len(tabString) > 40:
+			# open new Edit tabs:
+			if gapCount:
+				if gapCount > 10:
 					# disable reporters (avoid slowdown)
 					Glyphs.defaults["visibleReporters"] = None
 				report = f'{gapCount} kerning gaps have been found. Time elapsed: {timereport}.'
-				if self.pref("reuseCurrentTab") and thisFont.currentTab:
-					thisFont.currentTab.text = tabString
-				else:
-					thisFont.newTab(tabString)
+				tabCount = pairReport.openTabs(thisFont, reuseCurrentTab=self.pref("reuseCurrentTab"))
+				if tabCount > 1:
+					report += f' Split into {tabCount} tabs.'
+				if reportPath:
+					report += f' Report saved: {reportPath}'
 			# or report that nothing was found:
 			else:
 				report = 'No gaps found. Time elapsed: %s. Congrats!' % timereport
@@ -342,6 +349,8 @@ class GapFinder(mekkaObject):
 
 			# Report in Macro Window:
 			if self.pref("reportGapsInMacroWindow"):
+				print(layerCache.report())
+				print(prefilter.report())
 				print(report)
 				Glyphs.showMacroWindow()
 
@@ -2,7 +2,9 @@
 # -*- coding: utf-8 -*-
 from __future__ import division, print_function, unicode_literals
 __doc__ = """
-Choose an .fea file containing a kern feature in AFDKO code, and this script will attempt to import the kerning values into the frontmost font master (see Window > Kerning).
+Choose an .fea file containing a kern feature in AFDKO code, and this script will attempt to import the kerning values into the frontmost font master (see Window > Kerning). Understands multi-line classes, enum pos, subtable breaks and value records. Report in Macro Window.
+
+Hold down OPTION for a dry run that only parses the file and reports the pairs it would import.
 """
 
 """
@@ -12,12 +14,25 @@ Copyright (c) 2010 schriftgestaltung.de. All rights reserved.
 """
 
 import os
+from timeit import default_timer as timer
+from AppKit import NSEvent
 from GlyphsApp import Glyphs, Message, GetOpenFile
+from kernfea import parseFeaFile, cleanGroupName
+from kernanalysis import setKerningPairs
+
+
+def glyphIDIndex(font):
+	"""Maps glyph names and production names to glyph IDs, built once per import."""
+	index = {}
+	for glyph in font.glyphs:
+		if glyph.productionName:
+			index[glyph.productionName] = glyph.id
+	for glyph in font.glyphs:
+		index[glyph.name] = glyph.id
+	return index
 
-leftSideMarkers = ("MMK_L_", "_1ST", "_first")
-rightSideMarkers = ("MMK_R_", "_2ND", "_second")
 
-def importFeaFileToCurrentMaster(font, filePath):
+def importFeaFileToCurrentMaster(font, filePath, dryRun=False):
 	master = font.selectedFontMaster
 	if not master:
 		Message(
@@ -34,70 +49,64 @@ def importFeaFileToCurrentMaster(font, filePath):
 			OKButton=None,
 			)
 		return
-		
-	kerningLines = []
-	feaFile = open(filePath)
-	currentLine = feaFile.readline()
-	groupNameDict = {}
-	while (currentLine != ""): # end of file
-		if (currentLine[0] == "@"):
-			while "  " in currentLine:
-				currentLine = currentLine.replace("  ", " ")
-			groupName = currentLine[currentLine.find("@"):currentLine.find("=")].strip()
-			glyphNames = currentLine[currentLine.find("[")+1:currentLine.find("]")].strip().split(" ")
-			left = True
-			right = True
-			if any(subString in groupName for subString in leftSideMarkers):
-				right = False
-			elif any(subString in groupName for subString in rightSideMarkers):
-				left = False
-			oldGroupName = groupName
-			for nameParticle in leftSideMarkers + rightSideMarkers + ("@", "."):
-				groupName = groupName.replace(nameParticle, "")
-			# groupName = Glyphs.niceGlyphName(groupName)
-			for glyphName in glyphNames:
-				glyphName = Glyphs.niceGlyphName(glyphName)
-				glyph = font.glyphs[glyphName]
-				if glyph:
-					if left:
-						glyph.rightKerningGroup = groupName
-					if right:
-						glyph.leftKerningGroup = groupName
-			newGroupName = f"@MMK_{'L' if left else 'R'}_{groupName}"
-			groupNameDict[oldGroupName] = newGroupName
-		elif currentLine.strip().find("pos") == 0:
-			kerningLines.append(currentLine.strip())
-		currentLine = feaFile.readline() # read the next line
-
-	if len(kerningLines) > 0:
-		for i in range(len(kerningLines)-1, -1, -1):
-			line = kerningLines[i]
-			keys = line.split(" ")
-			leftKey = keys[1]
-			rightKey = keys[2]
-			kernValue = keys[3]
-
-			if leftKey[0] == "@":
-				if leftKey in groupNameDict.keys():
-					leftKey = groupNameDict[leftKey]
-			else:
-				leftKey = leftKey.strip("[]")
-				leftKey = font.glyphs[leftKey].id
-
-			if rightKey[0] == "@":
-				if rightKey in groupNameDict.keys():
-					rightKey = groupNameDict[rightKey]
-			else:
-				rightKey = rightKey.strip("[]")
-				rightKey = font.glyphs[rightKey].id
-
-			kernValue = float(kernValue.replace(";", ""))
-			font.setKerningForPair(
-				master.id, # fontMasterId (str) – The id of the FontMaster
-				leftKey, # leftKey (str) – either a glyph name or a class name
-				rightKey, # rightKey (str) – either a glyph name or a class name
-				kernValue, # value (float) – kerning value
-				)
+
+	start = timer()
+	feaKerning = parseFeaFile(filePath)
+	idForName = glyphIDIndex(font)
+
+	def glyphIDForName(glyphName):
+		if glyphName not in idForName:
+			# e.g. uni names in the file, nice names in the font; remember misses too:
+			idForName[glyphName] = idForName.get(Glyphs.niceGlyphName(glyphName))
+		return idForName[glyphName]
+
+	# kerning groups:
+	groupNameDict = {}  # class name -> (group name, left side, right side)
+	for className, glyphNames in feaKerning.classes.items():
+		groupName, left, right = cleanGroupName(className)
+		groupNameDict[className] = (groupName, left, right)
+		if dryRun:
+			continue
+		for glyphName in glyphNames:
+			glyphID = glyphIDForName(glyphName)
+			glyph = font.glyphForId_(glyphID) if glyphID else None
+			if glyph:
+				if left:
+					glyph.rightKerningGroup = groupName
+				if right:
+					glyph.leftKerningGroup = groupName
+
+	def keyForItem(item, isLeftSide):
+		if item.startswith("@"):
+			if item not in groupNameDict:
+				return None
+			groupName, left, right = groupNameDict[item]
+			if not (left if isLeftSide else right):
+				return None
+			return f"@MMK_{'L' if isLeftSide else 'R'}_{groupName}"
+		return glyphIDForName(item)
+
+	# kern pairs, first occurrence wins like in the OpenType lookup:
+	pairs, unresolvedPairs = [], []
+	for (leftItem, rightItem), kernValue in feaKerning.uniquePairs().items():
+		leftKey, rightKey = keyForItem(leftItem, True), keyForItem(rightItem, False)
+		if leftKey and rightKey:
+			pairs.append((leftKey, rightKey, kernValue))
+		else:
+			unresolvedPairs.append((leftItem, rightItem))
+
+	if not dryRun:
+		setKerningPairs(font, master.id, pairs)
+
+	seconds = max(timer() - start, 0.001)
+	print(f"{'Dry run, nothing changed: ' if dryRun else ''}{os.path.basename(filePath)} → {font.familyName}, master ‘{master.name}’")
+	print(f"- {len(feaKerning.classes)} classes, {len(pairs)} kern pairs ({len(feaKerning.pairs)} in file), {feaKerning.subtableCount} subtable breaks")
+	print(f"- {seconds:.2f} s, {len(pairs) / seconds:.0f} pairs/s")
+	if unresolvedPairs:
+		print(f"- ⚠️ Skipped {len(unresolvedPairs)} pairs with glyphs or classes not in the font, e.g.: {', '.join(' '.join(pair) for pair in unresolvedPairs[:10])}")
+	if feaKerning.skippedStatements:
+		print(f"- Ignored {len(feaKerning.skippedStatements)} positioning statements that are not pair kerning.")
+	return len(pairs)
 
 
 def main():
@@ -110,7 +119,12 @@ def main():
 			path=os.path.dirname(font.filepath) if font.filepath else None,
 			)
 		if feaFile is not None:
-			importFeaFileToCurrentMaster(font, feaFile)
+			# hold down OPTION for a dry run:
+			optionKey = 524288
+			optionKeyPressed = NSEvent.modifierFlags() & optionKey == optionKey
+			Glyphs.clearLog()
+			importFeaFileToCurrentMaster(font, feaFile, dryRun=optionKeyPressed)
+			Glyphs.showMacroWindow()
 	else:
 		Message(
 			title="No Font Open",
@@ -6,8 +6,10 @@ Intersect two sets of glyphs with each other in order to get all possible glyph
 """
 
 import vanilla
-from GlyphsApp import Glyphs, GSFeature, Message
+import random
+from GlyphsApp import Glyphs, GSFeature, Message, GetSaveFile
 from mekkablue import mekkaObject
+from kernanalysis import glyphChangeMarker
 
 defaultTokens = (
 	"$[category like 'Letter' and case in {upper,lower}]  # UPPERCASE AND LOWERCASE LETTERS",
@@ -27,6 +29,53 @@ defaultTokens = (
 	"$[category like 'Letter' and script like 'greek']",
 )
 
+outputOptions = (
+	"Tabs",
+	"Text file",
+)
+
+# token evaluations per font: {(id(font), token): (glyphChangeMarker, evaluatedToken)}
+expandedTokenCache = {}
+
+
+def mixedLines(aa, bb, maxPairs=0, sample=False, seed=None):
+	"""
+	Lazily yields one line per glyph in aa: /a/b1/a/b2/a.../a, the full cross product is never built.
+	maxPairs caps the number of a-b combinations (0 = no cap), either the first ones, or,
+	if sample is set, a random selection spread over all combinations, in the original order.
+	"""
+	total = len(aa) * len(bb)
+	if maxPairs and maxPairs < total:
+		if sample:
+			indexes = sorted(random.Random(seed).sample(range(total), maxPairs))
+		else:
+			indexes = range(maxPairs)
+	else:
+		indexes = range(total)
+
+	currentA, line = None, []
+	for index in indexes:
+		a, b = aa[index // len(bb)], bb[index % len(bb)]
+		if a != currentA:
+			if line:
+				yield "".join(line) + "/" + currentA
+			currentA, line = a, []
+		line.append("/%s/%s" % (a, b))
+	if line:
+		yield "".join(line) + "/" + currentA
+
+
+def chunks(lines, chunkSize):
+	"""Groups lines into lists of at most chunkSize lines."""
+	chunk = []
+	for line in lines:
+		chunk.append(line)
+		if len(chunk) >= chunkSize:
+			yield chunk
+			chunk = []
+	if chunk:
+		yield chunk
+
 
 class KernStringMixer(mekkaObject):
 	prefDict = {
@@ -34,6 +83,10 @@ class KernStringMixer(mekkaObject):
 		"mixString1": defaultTokens[0],
 		"mixString2": defaultTokens[1],
 		"reuseTab": True,
+		"maxPairs": "",
+		"samplePairs": 0,
+		"output": 0,
+		"linesPerTab": 200,
 	}
 
 	def __init__(self):
@@ -42,7 +95,7 @@ class KernStringMixer(mekkaObject):
 
 		# Window 'self.w':
 		windowWidth = 300
-		windowHeight = 180
+		windowHeight = 246
 		windowWidthResize = 800  # user can resize width by this value
 		windowHeightResize = 0  # user can resize height by this value
 		self.w = vanilla.FloatingWindow(
@@ -68,7 +121,23 @@ class KernStringMixer(mekkaObject):
 		self.w.mixString2.getNSComboBox().setToolTip_(tokenHelpText)
 		linePos += lineHeight + 7
 
+		self.w.maxPairsText = vanilla.TextBox((inset, linePos + 2, 105, 14), "Max. combinations:", sizeStyle='small', selectable=True)
+		self.w.maxPairs = vanilla.EditText((inset + 105, linePos, 60, 19), "", callback=self.SavePreferences, sizeStyle='small', placeholder="all")
+		self.w.maxPairs.getNSTextField().setToolTip_("Stop after this many glyph combinations. Leave empty for all combinations.")
+		self.w.samplePairs = vanilla.CheckBox((inset + 175, linePos - 1, -inset, 20), "Random sample", value=False, callback=self.SavePreferences, sizeStyle='small')
+		self.w.samplePairs.getNSButton().setToolTip_("If checked, the capped combinations are picked at random from all combinations (in their original order), rather than taking the first ones.")
+		linePos += lineHeight
+
+		self.w.outputText = vanilla.TextBox((inset, linePos + 2, 45, 14), "Output:", sizeStyle='small', selectable=True)
+		self.w.output = vanilla.PopUpButton((inset + 45, linePos, 80, 17), outputOptions, sizeStyle='small', callback=self.SavePreferences)
+		self.w.output.getNSPopUpButton().setToolTip_("Where the lines go: into Edit tabs, or into a text file you pick.")
+		self.w.linesPerTabText = vanilla.TextBox((inset + 135, linePos + 2, 80, 14), "Lines per tab:", sizeStyle='small', selectable=True)
+		self.w.linesPerTab = vanilla.EditText((inset + 215, linePos, -inset, 19), "200", callback=self.SavePreferences, sizeStyle='small')
+		self.w.linesPerTab.getNSTextField().setToolTip_("Lines are written in chunks of this size, a new tab for every chunk. Smaller tabs are laid out faster.")
+		linePos += lineHeight
+
 		self.w.reuseTab = vanilla.CheckBox((inset + 2, linePos - 1, -inset, 20), "Reuse current tab", value=self.pref("reuseTab"), callback=self.SavePreferences, sizeStyle='small')
+		self.w.reuseTab.getNSButton().setToolTip_("Put the first chunk of lines into the current tab, further chunks go into new tabs.")
 		linePos += lineHeight
 
 		# Buttons at bottom:
@@ -83,6 +152,11 @@ class KernStringMixer(mekkaObject):
 		self.w.open()
 		self.w.makeKey()
 
+	def updateUI(self, sender=None):
+		writesTabs = self.w.output.get() == 0
+		self.w.linesPerTab.enable(writesTabs)
+		self.w.reuseTab.enable(writesTabs)
+
 	def openURL(self, sender=None):
 		URL = None
 		if sender == self.w.helpTokens:
@@ -91,7 +165,9 @@ class KernStringMixer(mekkaObject):
 			import webbrowser
 			webbrowser.open(URL)
 
-	def expandToken(self, token, font=None):
+	cachedTokenCount = 0
+
+	def expandToken(self, token, font=None, changeMarker=None):
 		print("Token: %s" % token)
 
 		# clean up token:
@@ -107,10 +183,49 @@ class KernStringMixer(mekkaObject):
 			if not font:
 				return ""
 
-		evaluatedToken = GSFeature.evaluatePredicateToken_font_error_(token, font, None)
+		# reuse the evaluation as long as the glyphs of the font have not changed:
+		cacheKey = (id(font), token)
+		if changeMarker is None:
+			changeMarker = glyphChangeMarker(font)
+		cachedMarker, evaluatedToken = expandedTokenCache.get(cacheKey, (None, None))
+		if evaluatedToken is None or cachedMarker != changeMarker:
+			evaluatedToken = GSFeature.evaluatePredicateToken_font_error_(token, font, None)
+			expandedTokenCache[cacheKey] = (changeMarker, evaluatedToken)
+		else:
+			self.cachedTokenCount += 1
 		print("Evaluation: %s\n" % evaluatedToken)
 		return evaluatedToken
 
+	def writeLinesToTabs(self, font, lines):
+		linesPerTab = max(1, self.prefInt("linesPerTab"))
+		thisTab = font.currentTab
+		if not thisTab or not self.pref("reuseTab"):
+			thisTab = None
+		lineCount, tabCount = 0, 0
+		for chunk in chunks(lines, linesPerTab):
+			if thisTab is None:
+				thisTab = font.newTab()
+			thisTab.scale = 0.05
+			thisTab.text = "\n".join(chunk)
+			thisTab.previewHeight = 0
+			thisTab.updatePreview()
+			thisTab = None
+			lineCount += len(chunk)
+			tabCount += 1
+		print("Wrote %i lines into %i tab%s." % (lineCount, tabCount, "" if tabCount == 1 else "s"))
+
+	def writeLinesToFile(self, font, lines):
+		filePath = GetSaveFile(message="Save Kern Strings", ProposedFileName="%s kern strings.txt" % font.familyName, filetypes=("txt"))
+		if not filePath:
+			print("No file chosen, nothing written.")
+			return
+		lineCount = 0
+		with open(filePath, "w", encoding="utf-8") as textFile:
+			for chunk in chunks(lines, 1000):
+				textFile.write("\n".join(chunk) + "\n")
+				lineCount += len(chunk)
+		print("Wrote %i lines to: %s" % (lineCount, filePath))
+
 	def KernStringMixerMain(self, sender=None):
 		try:
 			# clear macro window log:
@@ -131,9 +246,10 @@ class KernStringMixer(mekkaObject):
 				print("Kern String Mixer Report for %s" % report)
 				print()
 
-				tabText = ""
-				aa = self.expandToken(self.pref("mixString1"), font=thisFont)
-				bb = self.expandToken(self.pref("mixString2"), font=thisFont)
+				self.cachedTokenCount = 0
+				changeMarker = glyphChangeMarker(thisFont)  # walks all glyphs, so only once per run
+				aa = self.expandToken(self.pref("mixString1"), font=thisFont, changeMarker=changeMarker)
+				bb = self.expandToken(self.pref("mixString2"), font=thisFont, changeMarker=changeMarker)
 				if not aa or not bb:
 					errorMessage = ""
 					if not aa:
@@ -156,20 +272,19 @@ class KernStringMixer(mekkaObject):
 
 				aa = aa.split()
 				bb = bb.split()
-				for a in aa:
-					for b in bb:
-						tabText += "/" + a
-						tabText += "/" + b
-					tabText += "/" + a
-					tabText += "\n"
-
-				thisTab = thisFont.currentTab
-				if not thisTab or not self.pref("reuseTab"):
-					thisTab = thisFont.newTab()
-				thisTab.scale = 0.05
-				thisTab.text = tabText
-				thisTab.previewHeight = 0
-				thisTab.updatePreview()
+				maxPairs = self.prefInt("maxPairs")
+				print("%i × %i = %i combinations%s%s." % (
+					len(aa),
+					len(bb),
+					len(aa) * len(bb),
+					", capped at %i" % maxPairs if 0 < maxPairs < len(aa) * len(bb) else "",
+					", %i of 2 tokens reused from cache" % self.cachedTokenCount if self.cachedTokenCount else "",
+				))
+				lines = mixedLines(aa, bb, maxPairs=maxPairs, sample=self.pref("samplePairs"))
+				if self.prefInt("output") == 1:
+					self.writeLinesToFile(thisFont, lines)
+				else:
+					self.writeLinesToTabs(thisFont, lines)
 
 				self.w.close()  # delete if you want window to stay open
 
@@ -8,7 +8,9 @@ Opens a new tab with Kerning Combos that crash in the current fontmaster.
 import vanilla
 from timeit import default_timer as timer
 from Foundation import NSNotFound
-from kernanalysis import intervalList, categoryList, sortedIntervalsFromString, effectiveKerning, minDistanceBetweenTwoLayers, distanceFromEntry
+from kernprofile import BoxPrefilter, BudgetedCrashSearch
+from kernparallel import parallelCrashes
+from kernanalysis import intervalList, categoryList, sortedIntervalsFromString, effectiveKerning, minDistanceBetweenTwoLayers, distanceFromEntry, ProfileCache, DecomposedLayerCache, snapshotForMaster, PairReport, reportPathForFont
 from GlyphsApp import Glyphs, Message
 from mekkablue import mekkaObject, caseDict, UpdateButton
 
@@ -30,12 +32,17 @@ class KernCrasher(mekkaObject):
 		"limitRightSuffixes": "",
 		"limitLeftSuffixes": "",
 		"directionSensitive": "",
+		"parallelScan": 0,
+		"budgetedScan": 0,
+		"maxResults": "50",
+		"timeBudget": "10",
+		"saveReport": 0,
 	}
 
 	def __init__(self):
 		# Window 'self.w':
 		windowWidth = 410
-		windowHeight = 355
+		windowHeight = 421
 		windowWidthResize = 800  # user can resize width by this value
 		windowHeightResize = 0  # user can resize height by this value
 		self.w = vanilla.FloatingWindow(
@@ -133,6 +140,27 @@ class KernCrasher(mekkaObject):
 		self.w.directionSensitive.getNSButton().setToolTip_("If enabled, will determine writing direction based on settings in current tab. If disabled, LTR will be used")
 		linePos += lineHeight
 
+		self.w.parallelScan = vanilla.CheckBox((inset + 2, linePos, -inset, 20), "Measure in parallel processes (all CPU cores, LTR only)", value=False, sizeStyle='small', callback=self.SavePreferences)
+		self.w.parallelScan.getNSButton().setToolTip_("If enabled, exports the outlines and kerning of the current master and measures the pairs in several processes at once. Much faster for big category combinations. Ignores the writing direction setting, always measures left-to-right kerning.")
+		linePos += lineHeight
+
+		self.w.budgetedScan = vanilla.CheckBox((inset + 2, linePos, 180, 20), "Quick check: only the closest", value=False, sizeStyle='small', callback=self.SavePreferences)
+		self.w.maxResults = vanilla.EditText((inset + 180, linePos, 40, 19), "50", sizeStyle='small', callback=self.SavePreferences)
+		self.w.text_timeBudget = vanilla.TextBox((inset + 224, linePos + 2, 110, 14), "crashes, stop after", sizeStyle='small')
+		self.w.timeBudget = vanilla.EditText((inset + 330, linePos, 30, 19), "10", sizeStyle='small', callback=self.SavePreferences)
+		self.w.text_timeBudgetUnit = vanilla.TextBox((inset + 363, linePos + 2, -inset, 14), "s", sizeStyle='small')
+		tooltipText = "If enabled, first estimates every pair with a coarse measurement, then measures only pairs that may crash, closest first. Stops as soon as the closest crashes are found, or when the time budget (in seconds) is used up. Leave a field empty for no limit. Good for quick checks on big fonts. Ignores the parallel option."
+		for uiElement in (self.w.text_timeBudget, self.w.text_timeBudgetUnit):
+			uiElement.getNSTextField().setToolTip_(tooltipText)
+		for uiElement in (self.w.maxResults, self.w.timeBudget):
+			uiElement.getNSTextField().setToolTip_(tooltipText)
+		self.w.budgetedScan.getNSButton().setToolTip_(tooltipText)
+		linePos += lineHeight
+
+		self.w.saveReport = vanilla.CheckBox((inset + 2, linePos, -inset, 20), "Save CSV report next to font file", value=False, sizeStyle='small', callback=self.SavePreferences)
+		self.w.saveReport.getNSButton().setToolTip_("If enabled, writes every crashing pair with its distance into a CSV file in the folder of the font file, while the scan is running. Useful for triaging large results.")
+		linePos += lineHeight
+
 		self.w.reportCrashesInMacroWindow = vanilla.CheckBox((inset + 2, linePos, -inset, 20), "Verbose report in Macro Window", value=False, sizeStyle='small', callback=self.SavePreferences)
 		self.w.reportCrashesInMacroWindow.getNSButton().setToolTip_("Will output a detailed report of the kern crashing in Window > Macro Panel. Will slow down the script a bit. Usually not necessary, but can be useful for checking if a certain pairing has been taken care of or not.")
 		self.w.reuseCurrentTab = vanilla.CheckBox((inset + 200, linePos, -inset, 20), "Reuse current tab", value=True, callback=self.SavePreferences, sizeStyle='small')
@@ -326,35 +354,86 @@ class KernCrasher(mekkaObject):
 				print("Left glyphs:\n%s\n" % ", ".join(firstList))
 				print("Right glyphs:\n%s\n" % ", ".join(secondList))
 
-			tabString = "\n"
+			reportPath = reportPathForFont(thisFont, thisFontMaster, "KernCrasher") if self.prefBool("saveReport") else None
+			pairReport = PairReport(reportPath=reportPath)  # one list entry per pair, several tabs if necessary
 			crashCount = 0
-			numOfGlyphs = len(firstList)
-			for index in range(numOfGlyphs):
-				# update progress bar:
-				self.w.bar.set(int(100 * (float(index) / numOfGlyphs)))
-				# determine left glyph:
-				firstGlyphName = firstList[index]
-				leftLayer = thisFont.glyphs[firstGlyphName].layers[thisFontMasterID].copyDecomposedLayer()
-				leftLayer.decomposeSmartOutlines()
-
-				# cycle through right glyphs:
-				for secondGlyphName in secondList:
-					rightLayer = thisFont.glyphs[secondGlyphName].layers[thisFontMasterID].copyDecomposedLayer()
-					rightLayer.decomposeSmartOutlines()
-					kerning = effectiveKerning(firstGlyphName, secondGlyphName, thisFont, thisFontMasterID, directionSensitive)
-					distanceBetweenShapes = minDistanceBetweenTwoLayers(leftLayer, rightLayer, interval=step, kerning=kerning, report=False, ignoreIntervals=ignoreIntervals)
-					if distanceBetweenShapes is not None and distanceBetweenShapes < minDistance:
-						crashCount += 1
-						tabString += "/%s/%s/space" % (firstGlyphName, secondGlyphName)
-						if self.pref("reportCrashesInMacroWindow"):
-							print("- %s %s: %i" % (firstGlyphName, secondGlyphName, distanceBetweenShapes))
-				tabString += "\n"
-
-			# clean up the tab string:
-			tabString = tabString[:-6].replace("/space\n", "\n")
-			while "\n\n" in tabString:
-				tabString = tabString.replace("\n\n", "\n")
-			tabString = tabString[1:]
+			profileCache = ProfileCache()  # measure every glyph only once
+			layerCache = DecomposedLayerCache(thisFont)  # decompose every glyph only once
+			prefilter = BoxPrefilter(minDistance=minDistance)  # skip pairs that cannot crash
+			if self.prefBool("budgetedScan"):
+				# coarse lower bounds first, then measure the most promising pairs until a limit is reached:
+				budgetedSearch = BudgetedCrashSearch(
+					minDistance,
+					maxResults=self.prefInt("maxResults") if self.pref("maxResults") else None,
+					timeBudget=self.prefFloat("timeBudget") if self.pref("timeBudget") else None,
+				)
+
+				def profileForName(glyphName):
+					return profileCache.profileForLayer(layerCache.layer(glyphName, thisFontMasterID), step, glyphName, thisFontMasterID)
+
+				def kerningForPair(leftGlyphName, rightGlyphName):
+					return effectiveKerning(leftGlyphName, rightGlyphName, thisFont, thisFontMasterID, directionSensitive)
+
+				def needsMeasuring(leftGlyphName, rightGlyphName, kerning):
+					return prefilter.needsMeasuring(layerCache.box(leftGlyphName, thisFontMasterID), layerCache.box(rightGlyphName, thisFontMasterID), kerning)
+
+				crashes = budgetedSearch.search(firstList, secondList, profileForName, kerningForPair, ignoreIntervals=ignoreIntervals, needsMeasuring=needsMeasuring)
+				for i, (firstGlyphName, secondGlyphName, distanceBetweenShapes) in enumerate(crashes):
+					# closest first, ten pairs per line:
+					pairReport.add(firstGlyphName, secondGlyphName, distance=distanceBetweenShapes)
+					if i % 10 == 9:
+						pairReport.newLine()
+					if self.pref("reportCrashesInMacroWindow"):
+						print("- %s %s: %i" % (firstGlyphName, secondGlyphName, distanceBetweenShapes))
+				crashCount = len(crashes)
+			elif self.prefBool("parallelScan"):
+				# export outlines and kerning, measure in worker processes:
+				snapshot = snapshotForMaster(thisFont, thisFontMasterID, set(firstList + secondList), layerCache=layerCache, profileCache=profileCache, step=step)
+				self.w.bar.set(10)
+				crashesForLeftGlyph = {}
+				for firstGlyphName, secondGlyphName, distanceBetweenShapes in parallelCrashes(snapshot, firstList, secondList, step, minDistance, ignoreIntervals):
+					crashesForLeftGlyph.setdefault(firstGlyphName, []).append((secondGlyphName, distanceBetweenShapes))
+					crashCount += 1
+					if self.pref("reportCrashesInMacroWindow"):
+						print("- %s %s: %i" % (firstGlyphName, secondGlyphName, distanceBetweenShapes))
+				for firstGlyphName in firstList:
+					for secondGlyphName, distanceBetweenShapes in crashesForLeftGlyph.get(firstGlyphName, ()):
+						pairReport.add(firstGlyphName, secondGlyphName, distance=distanceBetweenShapes)
+					pairReport.newLine()
+			else:
+				numOfGlyphs = len(firstList)
+				for index in range(numOfGlyphs):
+					# update progress bar:
+					self.w.bar.set(int(100 * (float(index) / numOfGlyphs)))
+					# determine left glyph:
+					firstGlyphName = firstList[index]
+					leftLayer = layerCache.layer(firstGlyphName, thisFontMasterID)
+
+					# cycle through right glyphs:
+					for secondGlyphName in secondList:
+						kerning = effectiveKerning(firstGlyphName, secondGlyphName, thisFont, thisFontMasterID, directionSensitive)
+						if not prefilter.needsMeasuring(layerCache.box(firstGlyphName, thisFontMasterID), layerCache.box(secondGlyphName, thisFontMasterID), kerning):
+							continue
+						rightLayer = layerCache.layer(secondGlyphName, thisFontMasterID)
+						distanceBetweenShapes = minDistanceBetweenTwoLayers(
+							leftLayer,
+							rightLayer,
+							interval=step,
+							kerning=kerning,
+							report=False,
+							ignoreIntervals=ignoreIntervals,
+							profileCache=profileCache,
+							leftName=firstGlyphName,
+							rightName=secondGlyphName,
+							masterID=thisFontMasterID,
+						)
+						if distanceBetweenShapes is not None and distanceBetweenShapes < minDistance:
+							crashCount += 1
+							pairReport.add(firstGlyphName, secondGlyphName, distance=distanceBetweenShapes, kerning=kerning)
+							if self.pref("reportCrashesInMacroWindow"):
+								print("- %s %s: %i" % (firstGlyphName, secondGlyphName, distanceBetweenShapes))
+					pairReport.newLine()
+			pairReport.close()
 
 			# update progress bar:
 			self.w.bar.set(100)
@@ -371,17 +450,22 @@ class KernCrasher(mekkaObject):
 			else:
 				timereport = "%i seconds" % seconds
 
-			# open new Edit tab:
-			if tabString:
-				if len(tabString) > 40:
+			# open new Edit tabs:
+			if crashCount:
+				if crashCount > 10:
 					# disable reporters (avoid slowdown)
 					Glyphs.defaults["visibleReporters"] = None
 				report = f'{crashCount} kerning crashes have been found. Time elapsed: {timereport}.'
-				if self.pref("reuseCurrentTab") and thisFont.currentTab:
-					thisFont.currentTab.text = tabString
-				else:
-					thisFont.newTab(tabString)
+				if self.prefBool("budgetedScan"):
+					report = f'{crashCount} closest kerning crashes (quick check{"" if budgetedSearch.isComplete() else ", time budget used up"}). Time elapsed: {timereport}.'
+				tabCount = pairReport.openTabs(thisFont, reuseCurrentTab=self.pref("reuseCurrentTab"))
+				if tabCount > 1:
+					report += f' Split into {tabCount} tabs.'
+				if reportPath:
+					report += f' Report saved: {reportPath}'
 			# or report that nothing was found:
+			elif self.prefBool("budgetedScan") and not budgetedSearch.isComplete():
+				report = 'No collisions found before the time budget was used up. Time elapsed: %s.' % timereport
 			else:
 				report = 'No collisions found. Time elapsed: %s. Congrats!' % timereport
 
@@ -391,6 +475,10 @@ class KernCrasher(mekkaObject):
 
 			# Report in Macro Window:
 			if self.pref("reportCrashesInMacroWindow"):
+				if self.prefBool("budgetedScan"):
+					print(budgetedSearch.report())
+				print(layerCache.report())
+				print(prefilter.report())
 				print(report)
 				Glyphs.showMacroWindow()
 
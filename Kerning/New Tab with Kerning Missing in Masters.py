@@ -6,6 +6,8 @@ Opens New Tabs for each master showing kerning missing in this master but presen
 """
 
 from GlyphsApp import Glyphs, Message
+from kerntable import MultiMasterPairs
+from kernanalysis import KerningGroupIndex
 
 thisFont = Glyphs.font  # frontmost font
 
@@ -17,66 +19,40 @@ print()
 if not len(thisFont.masters) > 1:
 	Message("Not enough masters", "If you want to compare kerning between masters, you need at least two masters in your font.", OKButton="Oh Shoot")
 else:
-	# prepare tabStrings:
-	tabStrings = {}
+	# all pairs of all masters with a presence bitmask, in one pass:
+	masterIDs = [m.id for m in thisFont.masters]
+	multiMasterPairs = MultiMasterPairs.fromKerning(thisFont.kerning, masterIDs)
+	for line in multiMasterPairs.interpolationReport({m.id: m.name for m in thisFont.masters}):
+		print(line)
+	print()
+
+	groupIndex = KerningGroupIndex(thisFont)
+	orphanedKeys = set()
+
+	def glyphNameForKernSide(kernSide, isTheLeftSide):
+		glyphName = groupIndex.glyphNameForKernSide(kernSide, isTheLeftSide)
+		if not glyphName and kernSide not in orphanedKeys:
+			# report every orphan only once:
+			orphanedKeys.add(kernSide)
+			side, groupSide = ("LEFT", "RIGHT") if isTheLeftSide else ("RIGHT", "LEFT")
+			if kernSide[0] == "@":
+				print(u"❌ @%s: Orphaned %s SIDE of kern pair. No corresponding %s GROUP in glyphs." % (kernSide[7:], side, groupSide))
+			else:
+				print(u"❌ Glyph %s: Orphaned %s glyph ID in kerning. No corresponding glyph in font." % (kernSide, side))
+		return glyphName
+
+	missingPairs = multiMasterPairs.missingPairs()
 	for thisMaster in thisFont.masters:
-		tabStrings[thisMaster.id] = "Kerning missing in %s:\n" % thisMaster.name
-
-	# prepare defaultGlyphs:
-	leftGroupDefaults = {}
-	rightGroupDefaults = {}
-	for thisGlyph in thisFont.glyphs[::-1]:
-		if thisGlyph.leftKerningGroup:
-			leftGroupDefaults[thisGlyph.leftKerningGroup] = thisGlyph.name
-		if thisGlyph.rightKerningGroup:
-			rightGroupDefaults[thisGlyph.rightKerningGroup] = thisGlyph.name
-
-	for thisMaster in thisFont.masters:
-		masterID = thisMaster.id
-		otherMasterIDs = [m.id for m in thisFont.masters if m != thisMaster]
-		masterKerning = thisFont.kerning[masterID]
-		for leftSide in masterKerning.keys():
-
-			for rightSide in masterKerning[leftSide].keys():
-				for otherID in otherMasterIDs:
-
-					try:
-						probeValue = thisFont.kerning[otherID][leftSide][rightSide]
-					except:
-						# kerning does not exist:
-
-						leftSideGlyphName, rightSideGlyphName = None, None
-						if not leftSide[0] == "@":
-							leftSideGlyph = thisFont.glyphForId_(leftSide)
-							if leftSideGlyph:
-								leftSideGlyphName = leftSideGlyph.name
-							else:
-								print(u"❌ Glyph %s: Orphaned LEFT glyph ID in kerning. No corresponding glyph in font." % leftSide)
-						elif leftSide[7:] not in rightGroupDefaults:
-							print(u"❌ @%s: Orphaned LEFT SIDE of kern pair. No corresponding RIGHT GROUP in glyphs." % leftSide[7:])
-							Glyphs.showMacroWindow()
-						elif rightGroupDefaults[leftSide[7:]]:
-							leftSideGlyphName = rightGroupDefaults[leftSide[7:]]
-						else:
-							print(u"🤷🏻‍♀️ Cannot convert left side name:", leftSide)
-
-						if not rightSide[0] == "@":
-							rightSideGlyph = thisFont.glyphForId_(rightSide)
-							if rightSideGlyph:
-								rightSideGlyphName = rightSideGlyph.name
-							else:
-								print(u"❌ Glyph %s: Orphaned RIGHT glyph ID in kerning. No corresponding glyph in font." % rightSide)
-						elif rightSide[7:] not in leftGroupDefaults:
-							print(u"❌ @%s: Orphaned RIGHT SIDE of kern pair. No corresponding LEFT GROUP in glyphs." % rightSide[7:])
-							Glyphs.showMacroWindow()
-						elif leftGroupDefaults[rightSide[7:]]:
-							rightSideGlyphName = leftGroupDefaults[rightSide[7:]]
-						else:
-							print(u"🤷🏻‍♀️ Cannot convert right side name:", rightSide)
-
-						if leftSideGlyphName and rightSideGlyphName:
-							tabStrings[otherID] += "/%s/%s  " % (leftSideGlyphName, rightSideGlyphName)
-	if tabStrings:
+		tabLines = ["Kerning missing in %s:" % thisMaster.name]
+		pairStrings = []
+		for leftSide, rightSide in missingPairs[thisMaster.id]:
+			leftSideGlyphName = glyphNameForKernSide(leftSide, True)
+			rightSideGlyphName = glyphNameForKernSide(rightSide, False)
+			if leftSideGlyphName and rightSideGlyphName:
+				pairStrings.append("/%s/%s  " % (leftSideGlyphName, rightSideGlyphName))
+		tabLines.append("".join(pairStrings))
+		thisFont.newTab("\n".join(tabLines))
+
+	if orphanedKeys:
 		print("\nOrphaned groups and glyph IDs: consider cleaning up kerning on Window > Kerning.")
-	for masterID in tabStrings:
-		thisFont.newTab(tabStrings[masterID])
+		Glyphs.showMacroWindow()
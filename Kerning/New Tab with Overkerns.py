@@ -8,6 +8,8 @@ Asks a threshold percentage, and opens a new tab with all kern pairs going beyon
 import vanilla
 from GlyphsApp import Glyphs, GSControlLayer, Message
 from mekkablue import mekkaObject
+from kernanalysis import kerningTableForMaster, applyKerningTable
+from kerntable import KerningTable
 
 
 def roundedDownBy(value, base):
@@ -85,7 +87,7 @@ class NewTabwithOverkernedPairs(mekkaObject):
 					if particle in glyphName:
 						return True
 				return False
-			
+
 			# clear macro window log:
 			Glyphs.clearLog()
 			shouldFix = sender == self.w.fixButton
@@ -132,7 +134,8 @@ class NewTabwithOverkernedPairs(mekkaObject):
 				layers = []
 				for thisMaster in theseMasters:
 					print(f"\n\tⓂ️ Master ‘{thisMaster.name}’")
-					masterKerning = thisFont.kerning[thisMaster.id]  # kerning dictionary
+					kerningTable = kerningTableForMaster(thisFont, thisMaster.id)  # flat snapshot of the master kerning, glyph names instead of IDs
+					fixedValues = {}  # (leftKey, rightKey) -> fixed kerning value
 					# tabText = ""  # the text appearing in the new tab
 
 					# collect minimum widths for every kerning group:
@@ -170,99 +173,97 @@ class NewTabwithOverkernedPairs(mekkaObject):
 								rightGroupMinimumWidths[thisGlyph.rightKerningGroup] = thisLayer.width
 								rightGroupNarrowestGlyphs[thisGlyph.rightKerningGroup] = thisGlyph.name
 
-					# go through kern values and collect them in tabText:
-					for leftKey in masterKerning.keys():
+					# go through negative kern values and collect them in tabText:
+					for leftKey, rightKey, kernValue in kerningTable.pairs(kerningTable.indexesWhere(maxValue=0, excludeMax=True)):
 						if leftKey[0] == "@" and (not leftKey[7:] in rightGroupMinimumWidths.keys() or glyphNameContainsIgnoredParticle(leftKey, ignores)):
 							continue
-						if leftKey[0] != "@" and glyphNameContainsIgnoredParticle(thisFont.glyphForId_(leftKey).name, ignores):
+						if leftKey[0] != "@" and glyphNameContainsIgnoredParticle(leftKey, ignores):
+							continue
+						if rightKey[0] == "@" and (not rightKey[7:] in leftGroupMinimumWidths.keys() or glyphNameContainsIgnoredParticle(rightKey, ignores)):
+							continue
+						if rightKey[0] != "@" and glyphNameContainsIgnoredParticle(rightKey, ignores):
 							continue
-						
-						for rightKey in masterKerning[leftKey].keys():
-							if rightKey[0] == "@" and (not rightKey[7:] in leftGroupMinimumWidths.keys() or glyphNameContainsIgnoredParticle(rightKey, ignores)):
-								continue
-							if rightKey[0] != "@" and glyphNameContainsIgnoredParticle(thisFont.glyphForId_(rightKey).name, ignores):
-								continue
-
-							kernValue = masterKerning[leftKey][rightKey]
-							if kernValue >= 0:
-								continue
-
-							leftWidth = None
-							rightWidth = None
-							try:
-								# collect widths for comparison
-								if leftKey[0] == "@":
-									# leftKey is a group name like "@MMK_L_y"
-									groupName = leftKey[7:]
-									leftWidth = rightGroupMinimumWidths[groupName]
-									leftGlyphName = rightGroupNarrowestGlyphs[groupName]
-								else:
-									# leftKey is a glyph ID like "59B740DA-A4F4-43DF-B6DD-1DFA213FFFE7"
-									leftGlyph = thisFont.glyphForId_(leftKey)
-									if not leftGlyph:
-										continue
-									# exclude if non-exporting and user limited to exporting glyphs:
-									if self.pref("limitToExportingGlyphs") and not leftGlyph.export:
-										continue
-									leftWidth = leftGlyph.layers[thisMaster.id].width
-									leftGlyphName = leftGlyph.name
-
-								if rightKey[0] == "@":
-									# rightKey is a group name like "@MMK_R_y"
-									groupName = rightKey[7:]
-									rightWidth = leftGroupMinimumWidths[groupName]
-									rightGlyphName = leftGroupNarrowestGlyphs[groupName]
-								else:
-									# rightKey is a glyph ID like "59B740DA-A4F4-43DF-B6DD-1DFA213FFFE7"
-									rightGlyph = thisFont.glyphForId_(rightKey)
-									if not rightGlyph:
-										continue
-									# exclude if non-exporting and user limited to exporting glyphs:
-									if self.pref("limitToExportingGlyphs") and not rightGlyph.export:
-										continue
-									rightWidth = rightGlyph.layers[thisMaster.id].width
-									rightGlyphName = rightGlyph.name
-
-								# possibly update the value, considering exceptions:
-								# (this eliminates false positives)
-								kernValueException = thisFont.kerningForPair(thisMaster.id, leftGlyphName, rightGlyphName)
-								if kernValueException is not None:
-									kernValue = kernValueException
-									# note: for class kerning, we are only checking the narrowest glyph-glyph pair.
-									#       if this pair has overkerning that is fixed via an exception
-									#       we might miss overkerned glyph-glyph pairs covered by the class kerning pair.
-									# TODO: to be really correct and complete, we need to check all possible glyph-glyph pairs
-									#       considering exceptions.
-									#       however, this would mean we may generate warnings
-									#       for pairs that practically do not occur in real life.
-
-								# compare widths and collect overkern if it is one:
-								minAllowedKernValue = - thresholdFactor * min(leftWidth, rightWidth)
-								if kernValue < minAllowedKernValue:
-									overKernCount += 1
-									layers.append(thisFont.glyphs[leftGlyphName].layers[thisMaster.id])
-									layers.append(thisFont.glyphs[rightGlyphName].layers[thisMaster.id])
-									if verbose:
-										print(f"\tOverkern: {leftGlyphName} ↔️ {rightGlyphName} ({kernValue:.0f} vs. min {minAllowedKernValue:.1f})")
-									if thisFont.glyphs["space"]:
-										layers.append(thisFont.glyphs["space"].layers[thisMaster.id])
-									if shouldFix:
-										masterKerning[leftKey][rightKey] = -roundedDownBy(-minAllowedKernValue, rounding)
-
-							except Exception as e:
-								# probably a kerning group name found in the kerning data, but no glyph assigned to it:
-								# brings macro window to front and reports warning:
-								print("*", e)
-								import traceback
-								errormsg = traceback.format_exc()
-								print(errormsg)
-								for side in ("left", "right"):
-									if side not in errormsg.lower():
-										print(
-											f"⚠️ Warning: The {side} group ‘{groupName}’ found in your kerning data does not appear in any glyph. Clean up your kerning, and run the script again."
-										)
-										Glyphs.showMacroWindow()
 
+						leftWidth = None
+						rightWidth = None
+						try:
+							# collect widths for comparison
+							if leftKey[0] == "@":
+								# leftKey is a group name like "@MMK_L_y"
+								groupName = leftKey[7:]
+								leftWidth = rightGroupMinimumWidths[groupName]
+								leftGlyphName = rightGroupNarrowestGlyphs[groupName]
+							else:
+								# leftKey is a glyph name
+								leftGlyph = thisFont.glyphs[leftKey]
+								if not leftGlyph:
+									continue
+								# exclude if non-exporting and user limited to exporting glyphs:
+								if self.pref("limitToExportingGlyphs") and not leftGlyph.export:
+									continue
+								leftWidth = leftGlyph.layers[thisMaster.id].width
+								leftGlyphName = leftGlyph.name
+
+							if rightKey[0] == "@":
+								# rightKey is a group name like "@MMK_R_y"
+								groupName = rightKey[7:]
+								rightWidth = leftGroupMinimumWidths[groupName]
+								rightGlyphName = leftGroupNarrowestGlyphs[groupName]
+							else:
+								# rightKey is a glyph name
+								rightGlyph = thisFont.glyphs[rightKey]
+								if not rightGlyph:
+									continue
+								# exclude if non-exporting and user limited to exporting glyphs:
+								if self.pref("limitToExportingGlyphs") and not rightGlyph.export:
+									continue
+								rightWidth = rightGlyph.layers[thisMaster.id].width
+								rightGlyphName = rightGlyph.name
+
+							# possibly update the value, considering exceptions:
+							# (this eliminates false positives)
+							kernValueException = thisFont.kerningForPair(thisMaster.id, leftGlyphName, rightGlyphName)
+							if kernValueException is not None:
+								kernValue = kernValueException
+								# note: for class kerning, we are only checking the narrowest glyph-glyph pair.
+								#       if this pair has overkerning that is fixed via an exception
+								#       we might miss overkerned glyph-glyph pairs covered by the class kerning pair.
+								# TODO: to be really correct and complete, we need to check all possible glyph-glyph pairs
+								#       considering exceptions.
+								#       however, this would mean we may generate warnings
+								#       for pairs that practically do not occur in real life.
+
+							# compare widths and collect overkern if it is one:
+							minAllowedKernValue = - thresholdFactor * min(leftWidth, rightWidth)
+							if kernValue < minAllowedKernValue:
+								overKernCount += 1
+								layers.append(thisFont.glyphs[leftGlyphName].layers[thisMaster.id])
+								layers.append(thisFont.glyphs[rightGlyphName].layers[thisMaster.id])
+								if verbose:
+									print(f"\tOverkern: {leftGlyphName} ↔️ {rightGlyphName} ({kernValue:.0f} vs. min {minAllowedKernValue:.1f})")
+								if thisFont.glyphs["space"]:
+									layers.append(thisFont.glyphs["space"].layers[thisMaster.id])
+								if shouldFix:
+									fixedValues[(leftKey, rightKey)] = -roundedDownBy(-minAllowedKernValue, rounding)
+
+						except Exception as e:
+							# probably a kerning group name found in the kerning data, but no glyph assigned to it:
+							# brings macro window to front and reports warning:
+							print("*", e)
+							import traceback
+							errormsg = traceback.format_exc()
+							print(errormsg)
+							for side in ("left", "right"):
+								if side not in errormsg.lower():
+									print(
+										f"⚠️ Warning: The {side} group ‘{groupName}’ found in your kerning data does not appear in any glyph. Clean up your kerning, and run the script again."
+									)
+									Glyphs.showMacroWindow()
+
+					if fixedValues:
+						# write back the fixed table, only the changed pairs are touched:
+						fixedTable = KerningTable((leftKey, rightKey, fixedValues.get((leftKey, rightKey), kernValue)) for leftKey, rightKey, kernValue in kerningTable.pairs())
+						applyKerningTable(thisFont, thisMaster.id, fixedTable, currentTable=kerningTable)
 					if layers:
 						layers.append(GSControlLayer.newline())
 				if layers:
@@ -8,17 +8,7 @@ Specify a kerning value, and every kerning in the current master smaller than th
 import vanilla
 from GlyphsApp import Glyphs
 from mekkablue import mekkaObject
-
-
-def nameForID(Font, ID):
-	"""Return the name of a group or glyph for a given kerning ID."""
-	try:
-		if ID[0] == "@":  # is a group
-			return ID
-		else:  # is a glyph
-			return Font.glyphForId_(ID).name
-	except Exception as e:
-		raise e
+from kernanalysis import kerningTableForMaster, removeKerningPairs
 
 
 class DeleteSmallKerningPairs(mekkaObject):
@@ -98,7 +88,7 @@ class DeleteSmallKerningPairs(mekkaObject):
 			thisFont = Glyphs.font  # frontmost font
 			thisFontMaster = thisFont.selectedFontMaster  # active master
 			thisFontMasterID = thisFontMaster.id  # active master ID
-			thisFontMasterKernDict = thisFont.kerning[thisFontMasterID]  # kerning dictionary
+			kerningTable = kerningTableForMaster(thisFont, thisFontMasterID)  # flat snapshot of the master kerning
 
 			if ((shouldRemovePositive or shouldRemoveNegative) and maxKernValue) or shouldRemoveZero:
 				willRemove = "kernings smaller than %i" % maxKernValue
@@ -107,44 +97,19 @@ class DeleteSmallKerningPairs(mekkaObject):
 				print("Deleting %s in %s %s..." % (willRemove, thisFont.familyName, thisFontMaster.name))
 
 				# collect pairs to be removed:
-				kernpairsToBeRemoved = []
-				countZero = 0
-				countPositive = 0
-				countNegative = 0
-				for leftGlyphID in thisFontMasterKernDict.keys():
-					for rightGlyphID in thisFontMasterKernDict[leftGlyphID].keys():
-
-						countClasses = 0
-						if leftGlyphID.startswith("@"):
-							countClasses += 1
-						if rightGlyphID.startswith("@"):
-							countClasses += 1
-
-						if (shouldRemoveGlyphToGlyph and countClasses == 0) or \
-							(shouldRemoveGlyphToClass and countClasses == 1) or \
-							(shouldRemoveClassToClass and countClasses == 2):
-
-							kerningValue = thisFontMasterKernDict[leftGlyphID][rightGlyphID]
-							leftName = nameForID(thisFont, leftGlyphID)
-							rightName = nameForID(thisFont, rightGlyphID)
-
-							if shouldRemoveZero and kerningValue == 0.0:
-								kernpairsToBeRemoved.append((leftName, rightName))
-								countZero += 1
-							elif shouldRemovePositive and 0.0 < kerningValue < maxKernValue:
-								kernpairsToBeRemoved.append((leftName, rightName))
-								countPositive += 1
-							elif shouldRemoveNegative and 0.0 > kerningValue > -maxKernValue:
-								kernpairsToBeRemoved.append((leftName, rightName))
-								countNegative += 1
+				groupCounts = [count for count, shouldRemove in enumerate((shouldRemoveGlyphToGlyph, shouldRemoveGlyphToClass, shouldRemoveClassToClass)) if shouldRemove]
+				zeroIndexes, positiveIndexes, negativeIndexes = [], [], []
+				if shouldRemoveZero:
+					zeroIndexes = kerningTable.indexesWhere(0.0, 0.0, groupCounts=groupCounts)
+				if shouldRemovePositive:
+					positiveIndexes = kerningTable.indexesWhere(0.0, maxKernValue, excludeMin=True, excludeMax=True, groupCounts=groupCounts)
+				if shouldRemoveNegative:
+					negativeIndexes = kerningTable.indexesWhere(-maxKernValue, 0.0, excludeMin=True, excludeMax=True, groupCounts=groupCounts)
+				countZero, countPositive, countNegative = len(zeroIndexes), len(positiveIndexes), len(negativeIndexes)
+				kernpairsToBeRemoved = list(kerningTable.pairs(zeroIndexes + positiveIndexes + negativeIndexes))
 
 				# remove the pairs:
-				thisFont.disableUpdateInterface()
-				for thisKernPair in kernpairsToBeRemoved:
-					leftSide = thisKernPair[0]
-					rightSide = thisKernPair[1]
-					thisFont.removeKerningForPair(thisFontMasterID, leftSide, rightSide)
-				thisFont.enableUpdateInterface()
+				removeKerningPairs(thisFont, thisFontMasterID, kernpairsToBeRemoved)
 				print("   Removed %i kerning pairs:" % len(kernpairsToBeRemoved))
 				print("   %i negative pairs" % countNegative)
 				print("   %i zero pairs" % countZero)
@@ -25,6 +25,8 @@ class SampleStringMaker(mekkaObject):
 		"overrideContext": 0,
 		"contextGlyphs": "HOOH,noon",
 		"mirrorPair": 0,
+		"packPairs": 0,
+		"maxPairsPerLine": 8,
 	}
 
 	categoryList = (
@@ -57,7 +59,7 @@ class SampleStringMaker(mekkaObject):
 	def __init__(self):
 		# Window 'self.w':
 		windowWidth = 340
-		windowHeight = 265
+		windowHeight = 287
 		windowWidthResize = 1000  # user can resize width by this value
 		windowHeightResize = 0  # user can resize height by this value
 		self.w = vanilla.FloatingWindow(
@@ -108,6 +110,12 @@ class SampleStringMaker(mekkaObject):
 		self.w.mirrorPair.getNSButton().setToolTip_("If checked, will create a mirrored version of the kerning string. E.g., instead of just AV, it will show AVA between the context glyphs.")
 		linePos += lineHeight
 
+		self.w.packPairs = vanilla.CheckBox((inset + 2, linePos - 1, 205, 20), "Pack pairs into fewest lines, max. pairs:", value=False, callback=self.SavePreferences, sizeStyle='small')
+		self.w.packPairs.getNSButton().setToolTip_("If checked, chains the pairs into as few lines as possible, e.g. AV, VA and AT become AVAT. Every pair still appears exactly once. Short sample texts are laid out much faster in the Edit view. Not available for mirrored pairs.")
+		self.w.maxPairsPerLine = vanilla.EditText((inset + 207, linePos, -inset, 19), "8", callback=self.SavePreferences, sizeStyle='small')
+		self.w.maxPairsPerLine.getNSTextField().setToolTip_("Maximum number of pairs in a packed line. Longer chains are split into several lines.")
+		linePos += lineHeight
+
 		self.w.openTab = vanilla.CheckBox((inset + 2, linePos - 1, 170, 20), "Open tab at first kern string", value=False, callback=self.SavePreferences, sizeStyle='small')
 		self.w.openTab.getNSButton().setToolTip_("If checked, a new tab will be opened with the first found kern string, and the cursor positioned accordingly, ready for group kerning and switching to the next sample string.")
 		self.w.lockKerning = vanilla.CheckBox((inset + 170, linePos - 1, -inset, 20), "in kerning mode", value=False, callback=self.SavePreferences, sizeStyle='small')
@@ -124,7 +132,11 @@ class SampleStringMaker(mekkaObject):
 		# Open window and focus on it:
 		self.w.open()
 		self.w.makeKey()
-	
+
+	def updateUI(self, sender=None):
+		self.w.packPairs.enable(not self.w.mirrorPair.get())
+		self.w.maxPairsPerLine.enable(self.w.packPairs.get() and not self.w.mirrorPair.get())
+
 	def updateScripts(self, sender=None):
 		font = Glyphs.font
 		if font:
@@ -231,7 +243,12 @@ class SampleStringMaker(mekkaObject):
 			if self.pref("mirrorPair"):
 				mirrorPair = True
 
-			kernStrings = sampleText.buildKernStrings(glyphNamesLeft, glyphNamesRight, thisFont=thisFont, linePrefix=linePrefix, linePostfix=linePostfix, mirrorPair=mirrorPair)
+			kernPairs = sampleText.kernPairsForGlyphNames(glyphNamesLeft, glyphNamesRight, thisFont)
+			kernStrings = sampleText.unpackedKernStrings(kernPairs, linePrefix=linePrefix, linePostfix=linePostfix, mirrorPair=mirrorPair)
+			if kernStrings and self.pref("packPairs") and not mirrorPair:
+				packedStrings = sampleText.packedKernStrings(kernPairs, linePrefix=linePrefix, linePostfix=linePostfix, maxPairsPerLine=self.prefInt("maxPairsPerLine"))
+				print(sampleText.compressionReport(kernStrings, packedStrings))
+				kernStrings = packedStrings
 
 			if not kernStrings:
 				if numLeftGlyphs * numRightGlyphs == 0:
@@ -24,12 +24,14 @@ class SampleStringsWithMasterKerning(mekkaObject):
 		"overrideContext": 0,
 		"contextGlyphs": "HOOH,noon",
 		"mirrorPair": 0,
+		"packPairs": 0,
+		"maxPairsPerLine": 8,
 	}
 
 	def __init__(self):
 		# Window 'self.w':
 		windowWidth = 340
-		windowHeight = 225
+		windowHeight = 247
 		windowWidthResize = 1000  # user can resize width by this value
 		windowHeightResize = 0  # user can resize height by this value
 		self.w = vanilla.FloatingWindow(
@@ -68,6 +70,12 @@ class SampleStringsWithMasterKerning(mekkaObject):
 		self.w.mirrorPair.getNSButton().setToolTip_("If checked, will create a mirrored version of the kerning string. E.g., instead of just AV, it will show AVA between the context glyphs.")
 		linePos += lineHeight
 
+		self.w.packPairs = vanilla.CheckBox((inset + 2, linePos - 1, 205, 20), "Pack pairs into fewest lines, max. pairs:", value=False, callback=self.SavePreferences, sizeStyle='small')
+		self.w.packPairs.getNSButton().setToolTip_("If checked, chains the pairs into as few lines as possible, e.g. AV, VA and AT become AVAT. Every pair still appears exactly once. Short sample texts are laid out much faster in the Edit view. Not available for mirrored pairs.")
+		self.w.maxPairsPerLine = vanilla.EditText((inset + 207, linePos, -inset, 19), "8", callback=self.SavePreferences, sizeStyle='small')
+		self.w.maxPairsPerLine.getNSTextField().setToolTip_("Maximum number of pairs in a packed line. Longer chains are split into several lines.")
+		linePos += lineHeight
+
 		self.w.openTab = vanilla.CheckBox((inset + 2, linePos - 1, 170, 20), "Open tab at first kern string", value=False, callback=self.SavePreferences, sizeStyle='small')
 		self.w.openTab.getNSButton().setToolTip_("If checked, a new tab will be opened with the first found kern string, and the cursor positioned accordingly, ready for group kerning and switching to the next sample string.")
 		self.w.lockKerning = vanilla.CheckBox((inset + 170, linePos - 1, -inset, 20), "in kerning mode", value=False, callback=self.SavePreferences, sizeStyle='small')
@@ -87,6 +95,8 @@ class SampleStringsWithMasterKerning(mekkaObject):
 
 	def updateUI(self, sender=None):
 		self.w.runButton.enable(self.w.positivePairs.get() or self.w.negativePairs.get() or self.w.zeroPairs.get())
+		self.w.packPairs.enable(not self.w.mirrorPair.get())
+		self.w.maxPairsPerLine.enable(self.w.packPairs.get() and not self.w.mirrorPair.get())
 
 	def parseTheContextGlyphs(self):
 		separator = ","
@@ -176,6 +186,7 @@ class SampleStringsWithMasterKerning(mekkaObject):
 			minimumKerning = self.prefInt("minimumKerning")
 
 			kernStrings = []
+			pairsForContext = {}
 			for leftSide in thisFont.kerning[thisMaster.id].keys():
 				leftGlyph = self.glyphNameForKerningName(leftSide, thisFont, isLeft=True)
 				if not leftGlyph:
@@ -195,6 +206,15 @@ class SampleStringsWithMasterKerning(mekkaObject):
 							line += f"/{leftGlyph}"
 						line += f" {rightContext}"
 						kernStrings.append(line)
+						pairsForContext.setdefault((leftContext, rightContext), []).append((leftGlyph, rightGlyph))
+
+			if kernStrings and self.pref("packPairs") and not self.pref("mirrorPair"):
+				# pack pairs sharing the same context glyphs:
+				packedStrings = []
+				for (leftContext, rightContext), kernPairs in pairsForContext.items():
+					packedStrings.extend(sampleText.packedKernStrings(kernPairs, linePrefix=leftContext, linePostfix=rightContext, maxPairsPerLine=self.prefInt("maxPairsPerLine")))
+				print(sampleText.compressionReport(kernStrings, packedStrings))
+				kernStrings = packedStrings
 
 			if not kernStrings:
 				Message(title="No Kern Strings Created", message="No kerning in the font that meets your selection.", OKButton=None)
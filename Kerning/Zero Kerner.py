@@ -8,9 +8,10 @@ Add group kernings with value zero for pairs that are missing in one master but
 """
 
 from vanilla import FloatingWindow, Button, TextBox, CheckBox, ProgressBar  # type: ignore
-from Foundation import NSNotFound  # type: ignore
 from GlyphsApp import Glyphs, Message
 from mekkablue import mekkaObject
+from kerntable import MultiMasterPairs
+from kernanalysis import removeKerningPairs, setKerningPairs
 from typing import Any
 
 class ZeroKerner(mekkaObject):
@@ -102,76 +103,58 @@ class ZeroKerner(mekkaObject):
 				else:
 					masters = thisFont.masters
 
-				masterCountPart = 100.0 / len(thisFont.masters)
+				# all pairs of all masters with a presence bitmask, in one pass:
+				self.report("Collecting kern pairs of %i masters..." % len(thisFont.masters), reportInMacroWindow)
+				multiMasterPairs = MultiMasterPairs.fromKerning(thisFont.kerning, [m.id for m in thisFont.masters])
+				self.w.progress.set(30)
+				if reportInMacroWindow:
+					for line in multiMasterPairs.interpolationReport({m.id: m.name for m in thisFont.masters}):
+						print("  %s" % line)
+					print()
+
+				def isGroupPair(pair, values):
+					return pair[0].startswith("@") and pair[1].startswith("@")
+
+				masterCountPart = 70.0 / len(masters)
 
 				if shouldRemoveZeroKerns:
 					# REMOVE ZERO KERNS
 					for i, thisMaster in enumerate(masters):
+						self.w.progress.set(30 + masterCountPart * i)
 						if thisMaster.id not in thisFont.kerning.keys():
 							self.report("%s: no kerning at all in this master. Skipping." % (thisMaster.name), reportInMacroWindow=reportInMacroWindow, emptyLine=True)
 							continue
 
-						masterCount = masterCountPart * i
-						kerningLength = len(thisFont.kerning[thisMaster.id])
-
-						self.w.progress.set(masterCount)
-						pairsToBeRemoved = []
-
-						for j, leftSide in enumerate(thisFont.kerning[thisMaster.id].keys()):
-							kernCount = j * masterCountPart / kerningLength
-							self.w.progress.set(masterCount + kernCount)
-
-							if leftSide.startswith("@"):
-								for rightSide in thisFont.kerning[thisMaster.id][leftSide].keys():
-
-									if rightSide.startswith("@") and thisFont.kerning[thisMaster.id][leftSide][rightSide] == 0:
-										pairsToBeRemoved.append((leftSide, rightSide))
-										self.report(
-											"%s: will remove @%s-@%s" % (thisMaster.name, leftSide[7:], rightSide[7:]),
-											reportInMacroWindow,
-										)
-
+						pairsToBeRemoved = multiMasterPairs.pairsWithValue(thisMaster.id, 0, condition=isGroupPair)
+						if reportInMacroWindow:
+							for leftSide, rightSide in pairsToBeRemoved:
+								self.report("%s: will remove @%s-@%s" % (thisMaster.name, leftSide[7:], rightSide[7:]), reportInMacroWindow)
 						self.report(
 							"%s: removing %i zero kerns" % (thisMaster.name, len(pairsToBeRemoved)),
 							reportInMacroWindow,
 							emptyLine=True,
 						)
-						for pair in pairsToBeRemoved:
-							LeftKey, RightKey = pair
-							thisFont.removeKerningForPair(thisMaster.id, LeftKey, RightKey)
+						removeKerningPairs(thisFont, thisMaster.id, pairsToBeRemoved)
 
 				else:
 					# ADD ZERO KERNS
-					for i, otherMaster in enumerate(thisFont.masters):
-						masterCount = masterCountPart * i
-						self.w.progress.set(masterCount)
-
-						theseMasters = [m for m in masters if m is not otherMaster]
-						otherMasterKerning = thisFont.kerning[otherMaster.id]
-						kerningLength = len(otherMasterKerning)
-
-						for j, leftGroup in enumerate(otherMasterKerning.keys()):
-							kernCount = j * masterCountPart / kerningLength
-							self.w.progress.set(masterCount + kernCount)
-
-							if leftGroup.startswith("@"):
-								for rightGroup in list(otherMasterKerning[leftGroup].keys()):
-									if rightGroup.startswith("@"):
-										if otherMasterKerning[leftGroup][rightGroup] != 0:
-											for j, thisMaster in enumerate(theseMasters):
-
-												self.report(
-													"Verifying @%s-@%s" % (leftGroup[7:], rightGroup[7:]),
-													reportInMacroWindow=False,
-												)
-
-												if not thisFont.kerningForPair(thisMaster.id, leftGroup, rightGroup) or \
-													thisFont.kerningForPair(thisMaster.id, leftGroup, rightGroup) >= NSNotFound:
-													thisFont.setKerningForPair(thisMaster.id, leftGroup, rightGroup, 0.0)
-													self.report(
-														"%s: zero kern @%s-@%s" % (thisMaster.name, leftGroup[7:], rightGroup[7:]),
-														reportInMacroWindow,
-													)
+					# group-to-group pairs missing in a master, but with a nonzero value in another master:
+					def isNonzeroGroupPair(pair, values):
+						return isGroupPair(pair, values) and any(values)
+
+					missingPairs = multiMasterPairs.missingPairs(condition=isNonzeroGroupPair)
+					for i, thisMaster in enumerate(masters):
+						self.w.progress.set(30 + masterCountPart * i)
+						pairsToBeAdded = missingPairs[thisMaster.id]
+						if reportInMacroWindow:
+							for leftGroup, rightGroup in pairsToBeAdded:
+								self.report("%s: zero kern @%s-@%s" % (thisMaster.name, leftGroup[7:], rightGroup[7:]), reportInMacroWindow)
+						self.report(
+							"%s: adding %i zero kerns" % (thisMaster.name, len(pairsToBeAdded)),
+							reportInMacroWindow,
+							emptyLine=True,
+						)
+						setKerningPairs(thisFont, thisMaster.id, [(leftGroup, rightGroup, 0.0) for leftGroup, rightGroup in pairsToBeAdded])
 
 				self.w.progress.set(100.0)
 				self.w.status.set("Done.")
@@ -3,8 +3,20 @@ from __future__ import print_function
 
 from AppKit import NSPoint, NSNotFound
 from mekkablue import caseDict
-from GlyphsApp import Glyphs, GSPath, GSNode, GSLINE
+from GlyphsApp import Glyphs, GSGlyphsInfo, GSPath, GSNode, GSLINE, GSOFFCURVE
+from kernprofile import EdgeProfile, ProfileBlock, minDistanceBetweenProfiles
+from kernparallel import MasterSnapshot
+from kerntable import KerningTable
+from collections import OrderedDict
+from functools import lru_cache
+from os import path, makedirs
+import hashlib
+import json
+import csv
+from timeit import default_timer as timer
 import math
+import time
+import weakref
 
 if Glyphs.versionNumber >= 3.0:
 	from GlyphsApp import LTR
@@ -25,8 +37,112 @@ categoryList = (
 )
 
 
-def stringToListOfGlyphsForFont(string, Font, report=True, excludeNonExporting=True, suffix=""):
-	# parse string into parseList:
+def glyphChangeMarker(font):
+	"""
+	Changes whenever glyphs are added, removed or edited: glyph count and the most recent glyph change date.
+	Walks all glyphs, so compute it once per run and pass it on to the cached lookups (changeMarker arguments).
+	"""
+	lastChanges = [g.lastChange for g in font.glyphs if g.lastChange]
+	return len(font.glyphs), max(lastChanges) if lastChanges else None
+
+
+class GlyphListIndex:
+	"""
+	Category lookups for a whole font, built in one pass over its glyphs:
+	(name, subCategory, case, script, export) per category in font order,
+	plus memoized category queries and character-to-glyph-name lookups.
+	Use glyphListIndexForFont() to get a cached index that is rebuilt when glyphs change.
+	"""
+
+	def __init__(self, font, changeMarker=None):
+		self.rebuild(font, changeMarker)
+
+	def rebuild(self, font, changeMarker=None):
+		self.marker = changeMarker if changeMarker is not None else glyphChangeMarker(font)
+		self.glyphsForCategories = {}  # category -> [(name, subCategory, case, script, export), ...]
+		isGlyphs3 = Glyphs.versionNumber >= 3
+		for thisGlyph in font.glyphs:
+			self.glyphsForCategories.setdefault(thisGlyph.category, []).append((
+				thisGlyph.name,
+				thisGlyph.subCategory,
+				thisGlyph.case if isGlyphs3 else None,
+				thisGlyph.script,
+				thisGlyph.export,
+			))
+		self.namesForQueries = {}
+		self.namesForCharacters = {}
+
+	def isOutdated(self, font, changeMarker=None):
+		return (changeMarker if changeMarker is not None else glyphChangeMarker(font)) != self.marker
+
+	def namesForCategories(self, requiredCategory, requiredSubCategory, requiredScript, excludedGlyphNameParts, excludeNonExporting, suffix=""):
+		query = (requiredCategory, requiredSubCategory, requiredScript, tuple(excludedGlyphNameParts or ()), bool(excludeNonExporting), suffix)
+		if query in self.namesForQueries:
+			return self.namesForQueries[query]
+
+		requiredCase = caseDict.get(requiredSubCategory) if Glyphs.versionNumber >= 3 and requiredSubCategory in caseDict.keys() else None
+		nameList = []
+		for glyphName, subCategory, case, script, export in self.glyphsForCategories.get(requiredCategory, ()):
+			if suffix and not glyphName.endswith(suffix):
+				continue
+			if excludedGlyphNameParts and any(namePart in glyphName for namePart in excludedGlyphNameParts):
+				continue
+			if excludeNonExporting and not export:
+				continue
+			if script is not None and script != requiredScript:
+				continue
+			if requiredSubCategory is None or subCategory == requiredSubCategory or (requiredCase is not None and case == requiredCase):
+				nameList.append(glyphName)
+		self.namesForQueries[query] = nameList
+		return nameList
+
+	def glyphNameForCharacter(self, character):
+		"""Name of the glyph info for a single character, looked up only once per character."""
+		if character not in self.namesForCharacters:
+			glyphInfo = Glyphs.glyphInfoForUnicode("%04X" % ord(character))
+			self.namesForCharacters[character] = glyphInfo.name if glyphInfo else None
+		return self.namesForCharacters[character]
+
+
+# the index holds no reference to its font, so entries go away when a font is closed:
+_glyphListIndexes = weakref.WeakKeyDictionary()
+# fallback for font objects that cannot be weakly referenced: {id(font): (font, index)}, pruned of closed fonts
+_glyphListIndexesForOpenFonts = {}
+
+
+def glyphListIndexForFont(font, changeMarker=None):
+	"""
+	Cached GlyphListIndex for the font, rebuilt if the glyph count or the last glyph change differ.
+	Pass the glyphChangeMarker() of the current run, else it is computed for every call.
+	"""
+	if changeMarker is None:
+		changeMarker = glyphChangeMarker(font)
+	try:
+		glyphListIndex = _glyphListIndexes.get(font)
+	except TypeError:
+		for fontID in [fontID for fontID, (openFont, index) in _glyphListIndexesForOpenFonts.items() if openFont not in Glyphs.fonts]:
+			del _glyphListIndexesForOpenFonts[fontID]
+		cachedFont, glyphListIndex = _glyphListIndexesForOpenFonts.get(id(font), (None, None))
+		if cachedFont is not font:
+			glyphListIndex = GlyphListIndex(font, changeMarker)
+			_glyphListIndexesForOpenFonts[id(font)] = (font, glyphListIndex)
+			return glyphListIndex
+	else:
+		if glyphListIndex is None:
+			glyphListIndex = GlyphListIndex(font, changeMarker)
+			_glyphListIndexes[font] = glyphListIndex
+			return glyphListIndex
+	if glyphListIndex.isOutdated(font, changeMarker):
+		glyphListIndex.rebuild(font, changeMarker)
+	return glyphListIndex
+
+
+@lru_cache(maxsize=256)
+def parseGlyphListString(string):
+	"""
+	Compiles a glyph list string into a tuple of tokens: @Category:Subcategory, glyph names (after / or space)
+	and single characters. Everything after # is a comment. Memoized, so repeated entries are parsed only once.
+	"""
 	parseList = []
 	waitForSeparator = False
 	parsedName = ""
@@ -58,26 +174,38 @@ def stringToListOfGlyphsForFont(string, Font, report=True, excludeNonExporting=T
 			parsedName = ""
 			parseList.append(x)
 
-	# go through parseList and find corresponding glyph in Font:
-	glyphList = []
+	compiledList = []
 	for parsedName in parseList:
-
 		if parsedName.startswith("@"):
 			# category and subcategory:
 			if ":" in parsedName:
 				category, subcategory = parsedName[1:].split(":")
 			else:
 				category, subcategory = parsedName[1:], None
+			compiledList.append((category, subcategory))
+		else:
+			compiledList.append(parsedName)
+	return tuple(compiledList)
+
+
+def stringToListOfGlyphsForFont(string, Font, report=True, excludeNonExporting=True, suffix="", changeMarker=None):
+	glyphListIndex = glyphListIndexForFont(Font, changeMarker)
+
+	# go through the compiled list and find corresponding glyph in Font:
+	glyphList = []
+	for parsedName in parseGlyphListString(string):
+
+		if isinstance(parsedName, tuple):
+			category, subcategory = parsedName
 			# TODO parse
-			categoryGlyphs = listOfNamesForCategories(
-				Font,
+			categoryGlyphs = [Font.glyphs[n] for n in glyphListIndex.namesForCategories(
 				category,
 				subcategory,  # OK
 				"latin",  # requiredScript,  # need to implement still
 				None,  # excludedGlyphNameParts,  # need to implement still
 				excludeNonExporting,  # OK
 				suffix=suffix,
-			)
+			)]
 			if categoryGlyphs:
 				glyphList += categoryGlyphs
 				if report:
@@ -91,11 +219,9 @@ def stringToListOfGlyphsForFont(string, Font, report=True, excludeNonExporting=T
 
 			# actual single character:
 			if not glyph and len(parsedName) == 1:
-				unicodeForName = "%04X" % ord(parsedName)
-				glyphInfo = Glyphs.glyphInfoForUnicode(unicodeForName)
-				if glyphInfo:
-					glyphName = "%s%s" % (glyphInfo.name, suffix)
-					glyph = Font.glyphs[glyphName]
+				glyphName = glyphListIndex.glyphNameForCharacter(parsedName)
+				if glyphName:
+					glyph = Font.glyphs["%s%s" % (glyphName, suffix)]
 
 			# check if glyph exists, exports, and collect in glyphList:
 			if glyph:
@@ -151,34 +277,91 @@ def effectiveKerning(leftGlyphName, rightGlyphName, thisFont, thisFontMasterID,
 #  # 	return 0.0
 
 
-def listOfNamesForCategories(thisFont, requiredCategory, requiredSubCategory, requiredScript, excludedGlyphNameParts, excludeNonExporting, suffix=""):
-	nameList = []
-	for thisGlyph in thisFont.glyphs:
-		thisScript = thisGlyph.script
-		glyphName = thisGlyph.name
-		nameIsOK = True
-
-		if suffix:
-			nameIsOK = glyphName.endswith(suffix)
-
-		if nameIsOK and excludedGlyphNameParts:
-			for thisNamePart in excludedGlyphNameParts:
-				nameIsOK = nameIsOK and thisNamePart not in glyphName
-
-		if nameIsOK and (thisGlyph.export or not excludeNonExporting):
-			if thisScript is None or thisScript == requiredScript:
-				if thisGlyph.category == requiredCategory:
-					if Glyphs.versionNumber >= 3:
-						# GLYPHS 3
-						if requiredSubCategory is None or thisGlyph.subCategory == requiredSubCategory or (
-							requiredSubCategory in caseDict.keys() and thisGlyph.case == caseDict[requiredSubCategory]
-						):
-							nameList.append(glyphName)
-					else:
-						# GLYPHS 2
-						if requiredSubCategory is None or thisGlyph.subCategory == requiredSubCategory:
-							nameList.append(glyphName)
+class KerningGroupIndex:
+	"""
+	Kerning group lookups for a whole font, built in one pass over its glyphs:
+	group members per side, the groups of every glyph, and glyph names for glyph IDs (kerning keys).
+	Build one per run. If a script changes kerning groups, call invalidate() (or check isOutdated()).
+	"Left" and "right" refer to the side of the kern pair: @MMK_L_ groups are right kerning groups of glyphs.
+	"""
+
+	def __init__(self, font):
+		self.font = font
+		self.rebuild()
+
+	def groupSignature(self):
+		return tuple((g.name, g.leftKerningGroup, g.rightKerningGroup) for g in self.font.glyphs)
+
+	def rebuild(self):
+		self.leftSideMembers = {}  # @MMK_L_ group name -> glyph names (i.e., right groups)
+		self.rightSideMembers = {}  # @MMK_R_ group name -> glyph names (i.e., left groups)
+		self.leftSideGroups = {}  # glyph name -> group used when the glyph is on the left side
+		self.rightSideGroups = {}  # glyph name -> group used when the glyph is on the right side
+		self.namesForIDs = {}
+		signature = []
+		for thisGlyph in self.font.glyphs:
+			glyphName = thisGlyph.name
+			self.namesForIDs[thisGlyph.id] = glyphName
+			leftGroup, rightGroup = thisGlyph.leftKerningGroup, thisGlyph.rightKerningGroup
+			signature.append((glyphName, leftGroup, rightGroup))
+			if rightGroup:
+				self.leftSideGroups[glyphName] = rightGroup
+				self.leftSideMembers.setdefault(rightGroup, []).append(glyphName)
+			if leftGroup:
+				self.rightSideGroups[glyphName] = leftGroup
+				self.rightSideMembers.setdefault(leftGroup, []).append(glyphName)
+		self.signature = tuple(signature)
+
+	def invalidate(self):
+		self.rebuild()
+
+	def isOutdated(self):
+		return self.groupSignature() != self.signature
 
+	@staticmethod
+	def groupName(kernSide):
+		"""Strips @MMK_L_, @MMK_R_ or @ from a kerning key."""
+		for prefix in ("@MMK_L_", "@MMK_R_", "@"):
+			if kernSide.startswith(prefix):
+				return kernSide[len(prefix):]
+		return kernSide
+
+	def members(self, groupName, isTheLeftSide=True):
+		"""Glyph names of a group (with or without @MMK prefix) on the given side of a pair, in font order."""
+		groupName = self.groupName(groupName)
+		if isTheLeftSide:
+			return self.leftSideMembers.get(groupName, [])
+		return self.rightSideMembers.get(groupName, [])
+
+	def group(self, glyphName, isTheLeftSide=True):
+		if isTheLeftSide:
+			return self.leftSideGroups.get(glyphName)
+		return self.rightSideGroups.get(glyphName)
+
+	def glyphName(self, glyphID):
+		return self.namesForIDs.get(glyphID)
+
+	def glyphNameForKernSide(self, kernSide, isTheLeftSide=True):
+		"""A glyph name for a kerning key: the first group member for groups, the name for glyph IDs or names, else None."""
+		if kernSide.startswith("@"):
+			members = self.members(kernSide, isTheLeftSide)
+			return members[0] if members else None
+		if kernSide in self.namesForIDs:
+			return self.namesForIDs[kernSide]
+		if self.font.glyphs[kernSide]:
+			return kernSide
+		return None
+
+
+def listOfNamesForCategories(thisFont, requiredCategory, requiredSubCategory, requiredScript, excludedGlyphNameParts, excludeNonExporting, suffix=""):
+	nameList = glyphListIndexForFont(thisFont).namesForCategories(
+		requiredCategory,
+		requiredSubCategory,
+		requiredScript,
+		excludedGlyphNameParts,
+		excludeNonExporting,
+		suffix=suffix,
+	)
 	return [thisFont.glyphs[n] for n in nameList]
 
 
@@ -222,12 +405,212 @@ def isHeightInIntervals(height, ignoreIntervals):
 	return False
 
 
-def minDistanceBetweenTwoLayers(leftLayer, rightLayer, interval=5.0, kerning=0.0, report=False, ignoreIntervals=[]):
-	# correction = leftLayer.RSB+rightLayer.LSB
+def layerBounds(layer):
 	if Glyphs.versionNumber >= 3.2:
-		leftBounds, rightBounds = leftLayer.fastBounds(), rightLayer.fastBounds()
-	else:
-		leftBounds, rightBounds = leftLayer.bounds, rightLayer.bounds
+		return layer.fastBounds()
+	return layer.bounds
+
+
+def contentHashForLayer(layer):
+	"""Hex digest over width and node coordinates of a (decomposed) layer."""
+	contentHash = hashlib.sha1(("%.3f" % layer.width).encode("ascii"))
+	for thisPath in layer.paths:
+		contentHash.update(b"|")
+		for node in thisPath.nodes:
+			contentHash.update(("%.3f %.3f %s;" % (node.x, node.y, node.type)).encode("ascii"))
+	return contentHash.hexdigest()
+
+
+class PairDistanceCache:
+	"""
+	Persistent measurements between unchanged glyphs, stored as JSON in the Glyphs Temp folder.
+	Keys are the content hashes of both decomposed layers, so an edit to either glyph invalidates the pair.
+	Distances are stored without kerning, so kerning changes never require re-measuring.
+	Separate sets of distances are kept for every combination of interval and ignore intervals.
+	"""
+
+	def __init__(self, name, interval=5.0, ignoreIntervals=(), maxEntries=500000):
+		cacheFolder = path.join(GSGlyphsInfo.applicationSupportPath(), "Temp", "KernDistances")
+		if not path.isdir(cacheFolder):
+			makedirs(cacheFolder)
+		fileName = hashlib.sha1(name.encode("utf-8")).hexdigest()
+		self.filePath = path.join(cacheFolder, "%s.json" % fileName)
+		self.settings = "%s|%s" % (float(interval), ",".join("%s:%s" % tuple(i) for i in ignoreIntervals or ()))
+		self.maxEntries = maxEntries
+		self.reused = 0
+		self.measured = 0
+		self.distances = {}
+		self.load()
+		self.used = set()
+
+	def load(self):
+		if not path.exists(self.filePath):
+			return
+		try:
+			with open(self.filePath, "r", encoding="utf-8") as cacheFile:
+				self.distances = json.load(cacheFile).get(self.settings, {})
+		except Exception as e:
+			print("⚠️ Could not read kern distance cache %s, starting over: %s" % (self.filePath, e))
+			self.distances = {}
+
+	def save(self):
+		stored = {}
+		if path.exists(self.filePath):
+			try:
+				with open(self.filePath, "r", encoding="utf-8") as cacheFile:
+					stored = json.load(cacheFile)
+			except Exception:
+				stored = {}
+		distances = self.distances
+		if len(distances) > self.maxEntries:
+			# keep what was used in this run, drop the rest:
+			distances = {key: distances[key] for key in self.used}
+		stored[self.settings] = distances
+		with open(self.filePath, "w", encoding="utf-8") as cacheFile:
+			json.dump(stored, cacheFile)
+
+	def lookup(self, leftHash, rightHash):
+		"""Returns (found, distance without kerning), the distance can be None for pairs without overlap."""
+		key = "%s %s" % (leftHash, rightHash)
+		if key in self.distances:
+			self.reused += 1
+			self.used.add(key)
+			return True, self.distances[key]
+		return False, None
+
+	def store(self, leftHash, rightHash, distance):
+		key = "%s %s" % (leftHash, rightHash)
+		self.measured += 1
+		self.used.add(key)
+		self.distances[key] = distance
+
+	def report(self):
+		return "Reused %i of %i measurements." % (self.reused, self.reused + self.measured)
+
+
+def boxForLayer(layer):
+	"""Returns (xMin, yMin, xMax, yMax, width) of layer, or None if it is empty."""
+	bounds = layerBounds(layer)
+	if bounds.size.width == 0 and bounds.size.height == 0:
+		return None
+	return (
+		bounds.origin.x,
+		bounds.origin.y,
+		bounds.origin.x + bounds.size.width,
+		bounds.origin.y + bounds.size.height,
+		layer.width,
+	)
+
+
+def profileForLayer(layer, interval=5.0):
+	"""Samples the left and right edges of layer once, every interval units, into an EdgeProfile."""
+	bounds = layerBounds(layer)
+	return EdgeProfile.fromMeasurements(
+		bounds.origin.y,
+		bounds.origin.y + bounds.size.height,
+		interval,
+		lambda height: measureLayerAtHeightFromLeftOrRight(layer, height, leftSide=True),
+		lambda height: measureLayerAtHeightFromLeftOrRight(layer, height, leftSide=False),
+	)
+
+
+class DecomposedLayerCache:
+	"""
+	Decomposed copies (incl. smart outlines) of master layers, keyed by (glyph name, master ID).
+	Create one per run, so edits between runs are picked up. Keeps at most maxSize layers,
+	the least recently used ones are dropped first.
+	"""
+
+	def __init__(self, font, maxSize=2048):
+		self.font = font
+		self.maxSize = maxSize
+		self.layers = OrderedDict()
+		self.boxes = {}
+		self.hashes = {}
+		self.hits = 0
+		self.misses = 0
+
+	def __len__(self):
+		return len(self.layers)
+
+	def layer(self, glyphName, masterID):
+		key = (glyphName, masterID)
+		decomposedLayer = self.layers.get(key)
+		if decomposedLayer is not None:
+			self.hits += 1
+			self.layers.move_to_end(key)
+			return decomposedLayer
+
+		self.misses += 1
+		decomposedLayer = self.font.glyphs[glyphName].layers[masterID].copyDecomposedLayer()
+		decomposedLayer.decomposeSmartOutlines()
+		self.layers[key] = decomposedLayer
+		if self.maxSize and len(self.layers) > self.maxSize:
+			self.layers.popitem(last=False)
+		return decomposedLayer
+
+	def contentHash(self, glyphName, masterID):
+		"""Hash of the decomposed outlines and width, changes whenever the glyph is edited."""
+		key = (glyphName, masterID)
+		if key not in self.hashes:
+			self.hashes[key] = contentHashForLayer(self.layer(glyphName, masterID))
+		return self.hashes[key]
+
+	def box(self, glyphName, masterID):
+		"""Returns (xMin, yMin, xMax, yMax, width) of the decomposed layer, or None if it is empty."""
+		key = (glyphName, masterID)
+		if key not in self.boxes:
+			self.boxes[key] = boxForLayer(self.layer(glyphName, masterID))
+		return self.boxes[key]
+
+	def report(self):
+		return "Decomposed layers: %i hits, %i misses, %i cached." % (self.hits, self.misses, len(self))
+
+	def clear(self):
+		self.layers.clear()
+		self.boxes.clear()
+		self.hashes.clear()
+		self.hits = 0
+		self.misses = 0
+
+
+class ProfileCache:
+	"""
+	Edge profiles per (glyph name, master ID, interval), so every glyph is measured only once per run.
+	Pass the same instance to every minDistanceBetweenTwoLayers() call of a run.
+	"""
+
+	def __init__(self):
+		self.profiles = {}
+
+	def __len__(self):
+		return len(self.profiles)
+
+	def profileForLayer(self, layer, interval=5.0, glyphName=None, masterID=None):
+		if glyphName is None:
+			glyphName = layer.parent.name
+		if masterID is None:
+			masterID = layer.associatedMasterId
+		key = (glyphName, masterID, float(interval))
+		profile = self.profiles.get(key)
+		if profile is None:
+			profile = profileForLayer(layer, interval=interval)
+			self.profiles[key] = profile
+		return profile
+
+	def clear(self):
+		self.profiles.clear()
+
+
+def minDistanceBetweenTwoLayers(leftLayer, rightLayer, interval=5.0, kerning=0.0, report=False, ignoreIntervals=[], profileCache=None, leftName=None, rightName=None, masterID=None):
+	if profileCache is not None:
+		# measure each glyph once, then compare the stored edges:
+		leftProfile = profileCache.profileForLayer(leftLayer, interval=interval, glyphName=leftName, masterID=masterID)
+		rightProfile = profileCache.profileForLayer(rightLayer, interval=interval, glyphName=rightName, masterID=masterID)
+		return minDistanceBetweenProfiles(leftProfile, rightProfile, kerning=kerning, ignoreIntervals=ignoreIntervals)
+
+	# correction = leftLayer.RSB+rightLayer.LSB
+	leftBounds, rightBounds = layerBounds(leftLayer), layerBounds(rightLayer)
 	topY = min(leftBounds.origin.y + leftBounds.size.height, rightBounds.origin.y + rightBounds.size.height)
 	bottomY = max(leftBounds.origin.y, rightBounds.origin.y)
 	distance = topY - bottomY
@@ -244,6 +627,273 @@ def minDistanceBetweenTwoLayers(leftLayer, rightLayer, interval=5.0, kerning=0.0
 	return minDist
 
 
+def benchmarkDistanceKernels(font, masterID, leftNames, rightNames, interval=5.0, ignoreIntervals=()):
+	"""
+	Measures all leftNames x rightNames pairs (without kerning) three ways and prints the timings:
+	the per-height minDistanceBetweenTwoLayers() loop, cached profiles, and a ProfileBlock per left glyph.
+	Returns {kernelName: seconds}.
+	"""
+	layerCache = DecomposedLayerCache(font)
+	for glyphName in set(leftNames) | set(rightNames):
+		layerCache.layer(glyphName, masterID)  # decompose outside of the timing
+	timings = {}
+
+	start = timer()
+	for leftName in leftNames:
+		for rightName in rightNames:
+			minDistanceBetweenTwoLayers(layerCache.layer(leftName, masterID), layerCache.layer(rightName, masterID), interval=interval, ignoreIntervals=ignoreIntervals)
+	timings["layer loop"] = timer() - start
+
+	start = timer()
+	profileCache = ProfileCache()
+	for leftName in leftNames:
+		for rightName in rightNames:
+			minDistanceBetweenTwoLayers(
+				layerCache.layer(leftName, masterID),
+				layerCache.layer(rightName, masterID),
+				interval=interval,
+				ignoreIntervals=ignoreIntervals,
+				profileCache=profileCache,
+				leftName=leftName,
+				rightName=rightName,
+				masterID=masterID,
+			)
+	timings["cached profiles"] = timer() - start
+
+	for useNumpy in (False, True):
+		start = timer()
+		profileCache = ProfileCache()
+		rightBlock = ProfileBlock(
+			(profileCache.profileForLayer(layerCache.layer(name, masterID), interval, name, masterID) for name in rightNames),
+			useNumpy=useNumpy,
+		)
+		for leftName in leftNames:
+			leftProfile = profileCache.profileForLayer(layerCache.layer(leftName, masterID), interval, leftName, masterID)
+			rightBlock.minDistances(leftProfile, ignoreIntervals=ignoreIntervals)
+		timings["profile block (%s)" % ("NumPy" if rightBlock.useNumpy else "pure Python")] = timer() - start
+
+	print("Distance kernels, %i x %i pairs, every %s units:" % (len(leftNames), len(rightNames), interval))
+	for kernelName, seconds in timings.items():
+		print("- %s: %.3f seconds" % (kernelName, seconds))
+	return timings
+
+
+def polygonsForLayer(layer, curveSteps=8):
+	"""Flattens the paths of a (decomposed) layer into lists of (x, y) tuples, every curve segment split into curveSteps lines."""
+	polygons = []
+	for thisPath in layer.paths:
+		nodes = thisPath.nodes
+		onCurveIndexes = [i for i, node in enumerate(nodes) if node.type != GSOFFCURVE]
+		if not onCurveIndexes:
+			continue
+		# start at an on-curve node and walk around the closed path:
+		startIndex = onCurveIndexes[0]
+		count = len(nodes)
+		previous = (nodes[startIndex].x, nodes[startIndex].y)
+		polygon = [previous]
+		handles = []
+		for i in range(1, count + 1):
+			node = nodes[(startIndex + i) % count]
+			point = (node.x, node.y)
+			if node.type == GSOFFCURVE:
+				handles.append(point)
+				continue
+			if len(handles) == 2:
+				(x1, y1), (x2, y2) = handles
+				x0, y0 = previous
+				x3, y3 = point
+				for step in range(1, curveSteps):
+					t = step / curveSteps
+					mt = 1.0 - t
+					polygon.append((
+						mt * mt * mt * x0 + 3 * mt * mt * t * x1 + 3 * mt * t * t * x2 + t * t * t * x3,
+						mt * mt * mt * y0 + 3 * mt * mt * t * y1 + 3 * mt * t * t * y2 + t * t * t * y3,
+					))
+			else:
+				# lines, and (approximately) TrueType curves via their control polygon:
+				polygon.extend(handles)
+			polygon.append(point)
+			previous = point
+			handles = []
+		polygons.append(polygon[:-1])  # last point is the start point again
+	return polygons
+
+
+def snapshotForMaster(font, masterID, glyphNames, layerCache=None, profileCache=None, step=None):
+	"""
+	Exports decomposed outlines, kerning groups and LTR kerning of one master into a picklable MasterSnapshot.
+	If step is given, also exports edge profiles and bounding boxes measured like in the serial scan
+	(lsbAtHeight/rsbAtHeight), so parallel workers report exactly the same crashes. The outlines are left out then.
+	"""
+	if layerCache is None:
+		layerCache = DecomposedLayerCache(font)
+	if profileCache is None:
+		profileCache = ProfileCache()
+	glyphs, rightGroups, leftGroups = {}, {}, {}
+	profiles, boxes = {}, {}
+	for glyphName in glyphNames:
+		glyph = font.glyphs[glyphName]
+		layer = layerCache.layer(glyphName, masterID)
+		if step:
+			glyphs[glyphName] = (layer.width, ())
+			profiles[glyphName] = profileCache.profileForLayer(layer, interval=step, glyphName=glyphName, masterID=masterID)
+			boxes[glyphName] = layerCache.box(glyphName, masterID)
+		else:
+			glyphs[glyphName] = (layer.width, polygonsForLayer(layer))
+		if glyph.rightKerningGroup:
+			rightGroups[glyphName] = glyph.rightKerningGroup
+		if glyph.leftKerningGroup:
+			leftGroups[glyphName] = glyph.leftKerningGroup
+
+	kerning = {(leftName, rightName): value for leftName, rightName, value in kerningTableForMaster(font, masterID).pairs()}
+
+	master = font.masters[masterID]
+	return MasterSnapshot(masterID, master.name if master else "", glyphs, rightGroups, leftGroups, kerning, profiles=profiles, boxes=boxes if step else None)
+
+
+def kerningTableForMaster(font, masterID, groupIndex=None, orphanedKeys=None):
+	"""
+	Flat KerningTable of the (LTR) kerning of a master, with glyph names instead of glyph IDs.
+	Orphaned glyph IDs are skipped, and collected in orphanedKeys if a list is passed.
+	"""
+	if groupIndex is None:
+		groupIndex = KerningGroupIndex(font)
+	masterKerning = font.kerning.get(masterID, {})
+
+	def nameForKey(key):
+		return key if key.startswith("@") else groupIndex.glyphName(key)
+
+	pairs = []
+	for leftKey in masterKerning.keys():
+		leftName = nameForKey(leftKey)
+		if not leftName:
+			if orphanedKeys is not None:
+				orphanedKeys.append(leftKey)
+			continue
+		for rightKey, value in masterKerning[leftKey].items():
+			rightName = nameForKey(rightKey)
+			if rightName:
+				pairs.append((leftName, rightName, value))
+			elif orphanedKeys is not None:
+				orphanedKeys.append(rightKey)
+	return KerningTable(pairs)
+
+
+def removeKerningPairs(font, masterID, pairs):
+	"""Removes (leftName, rightName, ...) pairs in one go, without interface updates in between."""
+	font.disableUpdateInterface()
+	try:
+		for pair in pairs:
+			font.removeKerningForPair(masterID, pair[0], pair[1])
+	finally:
+		font.enableUpdateInterface()
+
+
+def setKerningPairs(font, masterID, pairs):
+	"""Sets (leftName, rightName, value) pairs in one go, without interface updates in between."""
+	font.disableUpdateInterface()
+	try:
+		for leftName, rightName, value in pairs:
+			font.setKerningForPair(masterID, leftName, rightName, value)
+	finally:
+		font.enableUpdateInterface()
+
+
+def applyKerningTable(font, masterID, table, currentTable=None):
+	"""
+	Makes the kerning of the master match table, writing only the differences. Returns the number of changed pairs.
+	Pass the table the changes were made on as currentTable, so the master kerning is not read again.
+	"""
+	if currentTable is None:
+		currentTable = kerningTableForMaster(font, masterID)
+	toBeRemoved, toBeAdded, changed = currentTable.diff(table)
+	removeKerningPairs(font, masterID, toBeRemoved)
+	setKerningPairs(font, masterID, toBeAdded + [(leftName, rightName, newValue) for leftName, rightName, oldValue, newValue in changed])
+	return len(toBeRemoved) + len(toBeAdded) + len(changed)
+
+
+class PairReport:
+	"""
+	Collects kern pairs for Edit tabs in a list (one line per left glyph) instead of concatenating one big string,
+	and splits them into several tabs of at most maxPairsPerTab pairs each, so huge results do not stall the UI.
+	If reportPath is given, every pair is also streamed to disk as it arrives: CSV for .csv files, else JSON Lines.
+	"""
+
+	def __init__(self, maxPairsPerTab=2000, reportPath=None, separator="/space"):
+		self.maxPairsPerTab = max(1, maxPairsPerTab)
+		self.separator = separator
+		self.lines = []
+		self.currentLine = []
+		self.count = 0
+		self.reportPath = reportPath
+		self.reportFile = None
+		self.csvWriter = None
+		if reportPath:
+			self.reportFile = open(reportPath, "w", encoding="utf-8", newline="")
+			if reportPath.lower().endswith(".csv"):
+				self.csvWriter = csv.writer(self.reportFile)
+
+	def add(self, leftName, rightName, **values):
+		"""Adds a pair to the current line. Extra values (e.g. distance, kerning) only go into the file report."""
+		self.currentLine.append("/%s/%s" % (leftName, rightName))
+		self.count += 1
+		if self.reportFile:
+			if self.csvWriter:
+				if self.count == 1:
+					self.csvWriter.writerow(["left", "right"] + sorted(values.keys()))
+				self.csvWriter.writerow([leftName, rightName] + [values[key] for key in sorted(values.keys())])
+			else:
+				record = {"left": leftName, "right": rightName}
+				record.update(values)
+				self.reportFile.write(json.dumps(record) + "\n")
+
+	def newLine(self):
+		if self.currentLine:
+			self.lines.append(self.currentLine)
+			self.currentLine = []
+
+	def close(self):
+		self.newLine()
+		if self.reportFile:
+			self.reportFile.close()
+			self.reportFile = None
+
+	def tabStrings(self):
+		"""Returns a list of tab texts with at most maxPairsPerTab pairs each."""
+		self.newLine()
+		tabs, tabLines, pairCount = [], [], 0
+		for line in self.lines:
+			for i in range(0, len(line), self.maxPairsPerTab):
+				chunk = line[i:i + self.maxPairsPerTab]
+				if pairCount + len(chunk) > self.maxPairsPerTab and tabLines:
+					tabs.append("\n".join(tabLines))
+					tabLines, pairCount = [], 0
+				tabLines.append(self.separator.join(chunk))
+				pairCount += len(chunk)
+		if tabLines:
+			tabs.append("\n".join(tabLines))
+		return tabs
+
+	def openTabs(self, font, reuseCurrentTab=False):
+		"""Opens the pairs in Edit tabs, the first one can reuse the current tab. Returns the number of tabs."""
+		tabs = self.tabStrings()
+		for i, tabString in enumerate(tabs):
+			if i == 0 and reuseCurrentTab and font.currentTab:
+				font.currentTab.text = tabString
+			else:
+				font.newTab(tabString)
+		return len(tabs)
+
+
+def reportPathForFont(font, master, reportName, extension=".csv"):
+	"""Path for a report file next to the font file, or None (with a warning) if the font has not been saved yet."""
+	if not font.filepath:
+		print("⚠️ Font has not been saved yet, cannot save %s report next to it." % reportName)
+		return None
+	fileName = "%s %s %s%s" % (font.familyName, master.name, reportName, extension)
+	return path.join(path.dirname(font.filepath), fileName.replace("/", "-"))
+
+
 def sortedIntervalsFromString(intervals="", font=None, mID=None):
 	ignoreIntervals = []
 	if intervals:
@@ -316,7 +966,65 @@ def distanceFromEntry(entry, font, masterID, default=0.0):
 	return distance
 
 
-def bubbleForLayer(layer, offset=10.0):
+BUBBLE_CACHE_KEY = "com.mekkablue.bubbleCache"
+BUBBLE_CACHE_MAX_ENTRIES = 4096
+
+
+class BubbleCache:
+	"""
+	Bubble coordinates stored in the userData of the font, so overlap removal only runs for new or changed outlines, also across runs.
+	One entry per layer, offset and vertex budget, holding the content hash it was made for: an edited glyph replaces its entry.
+	Create one per run and call save() at the end, the userData is written only once, and only if there are new bubbles.
+	Keeps at most maxEntries entries, the ones unused for the longest time are dropped first.
+	"""
+
+	def __init__(self, font, maxEntries=BUBBLE_CACHE_MAX_ENTRIES):
+		self.font = font
+		self.maxEntries = maxEntries
+		self.entries = dict(font.userData[BUBBLE_CACHE_KEY] or {})
+		self.used = set()
+		self.changed = False
+
+	def __len__(self):
+		return len(self.entries)
+
+	@staticmethod
+	def key(layer, offset, maxVertices=None):
+		return "%s %s %.2f %s" % (layer.parent.name, layer.layerId, offset, maxVertices or "-")
+
+	def lookup(self, key, contentHash):
+		"""Returns the bubble coordinates, or None if there are none for this content hash."""
+		entry = self.entries.get(key)
+		if entry is None or entry["hash"] != contentHash:
+			return None
+		self.used.add(key)
+		return [tuple(coord) for coord in entry["bubble"]]
+
+	def store(self, key, contentHash, coordinates):
+		self.entries[key] = {"hash": contentHash, "bubble": [list(coord) for coord in coordinates], "used": 0}
+		self.used.add(key)
+		self.changed = True
+
+	def save(self):
+		if not self.changed:
+			return
+		now = time.time()
+		for key in self.used:
+			self.entries[key] = dict(self.entries[key], used=now)
+		if len(self.entries) > self.maxEntries:
+			keysByAge = sorted(self.entries, key=lambda key: self.entries[key]["used"])
+			for key in keysByAge[:len(self.entries) - self.maxEntries]:
+				del self.entries[key]
+		self.font.userData[BUBBLE_CACHE_KEY] = self.entries
+		self.changed = False
+
+
+def bubbleForLayer(layer, offset=10.0, maxVertices=None, useCache=True, bubbleCache=None):
+	"""
+	Closed GSPath around the outer contours of the layer, offset by offset units, optionally simplified to maxVertices points.
+	Bubble coordinates are cached in the userData of the font (see BubbleCache). For many layers, pass one BubbleCache
+	and call its save() at the end of the run, otherwise the userData is written after every new bubble.
+	"""
 	def boxIsInsideBox(smallBox, bigBox):
 		if bigBox.size.width * bigBox.size.height == 0.0:
 			return False
@@ -333,73 +1041,129 @@ def bubbleForLayer(layer, offset=10.0):
 		if smallBox.origin.y + smallBox.size.height > bigBox.origin.y + bigBox.size.height:
 			return False
 		return True
-	
-	# just keep the relevant paths:
+
 	workLayer = layer.copyDecomposedLayer()
-	workLayer.removeOverlap()
-	collectedPoints = []
-	for path in workLayer.paths:
-		if boxIsInsideBox(path.bounds, workLayer.bounds):
-			continue
-		collectedPoints.extend([(p.x, p.y) for p in path.nodes])
-	
-	bubbleCoordinates = bubble(collectedPoints, offset=offset)
+	font = layer.parent.parent if layer.parent else None
+	saveCache = False
+	if useCache and font and bubbleCache is None:
+		bubbleCache = BubbleCache(font)
+		saveCache = True  # single layer, write right away
+	bubbleCoordinates, cacheKey, contentHash = None, None, None
+	if useCache and bubbleCache is not None:
+		cacheKey = BubbleCache.key(layer, offset, maxVertices)
+		contentHash = contentHashForLayer(workLayer)
+		bubbleCoordinates = bubbleCache.lookup(cacheKey, contentHash)
+
+	if bubbleCoordinates is None:
+		# just keep the relevant paths:
+		workLayer.removeOverlap()
+		collectedPoints = []
+		for thisPath in workLayer.paths:
+			if boxIsInsideBox(thisPath.bounds, workLayer.bounds):
+				continue
+			collectedPoints.extend([(p.x, p.y) for p in thisPath.nodes])
+
+		bubbleCoordinates = bubble(collectedPoints, offset=offset, maxVertices=maxVertices)
+		if cacheKey:
+			bubbleCache.store(cacheKey, contentHash, bubbleCoordinates)
+			if saveCache:
+				bubbleCache.save()
+
 	bubblePath = GSPath()
 	for coord in bubbleCoordinates:
 		newNode = GSNode()
 		newNode.position = NSPoint(*coord)
 		newNode.type = GSLINE
 		bubblePath.nodes.append(newNode)
-	
+
 	bubblePath.closed = True
 	return bubblePath
 
 
-def bubble(points, offset=0.0):
+def clearBubbleCache(font):
+	if font.userData[BUBBLE_CACHE_KEY] is not None:
+		del font.userData[BUBBLE_CACHE_KEY]
+
+
+def convexHull(points):
+	"""
+	Convex hull of (x, y) tuples with Andrew's monotone chain, O(n log n).
+	Counter-clockwise, starting at the leftmost (lowest) point, collinear points dropped.
+	"""
+	points = sorted(set(points))
+	if len(points) < 3:
+		return points
+
+	lower = []
+	for p in points:
+		while len(lower) >= 2 and _calculateCrossProduct(lower[-2], lower[-1], p) <= 0:
+			lower.pop()
+		lower.append(p)
+
+	upper = []
+	for p in reversed(points):
+		while len(upper) >= 2 and _calculateCrossProduct(upper[-2], upper[-1], p) <= 0:
+			upper.pop()
+		upper.append(p)
+
+	# last point of each chain is the first of the other:
+	return lower[:-1] + upper[:-1]
+
+
+def simplifyHull(hull, maxVertices):
+	"""
+	Reduces a convex polygon to at most maxVertices points (minimum 3) by repeatedly dropping the vertex
+	that spans the smallest triangle with its neighbours (Visvalingam), i.e. the one that changes the shape least.
+	"""
+	maxVertices = max(3, maxVertices)
+	hull = list(hull)
+	while len(hull) > maxVertices:
+		count = len(hull)
+		smallestIndex = min(
+			range(count),
+			key=lambda i: abs(_calculateCrossProduct(hull[i - 1], hull[i], hull[(i + 1) % count])),
+		)
+		del hull[smallestIndex]
+	return hull
+
+
+def bubble(points, offset=0.0, maxVertices=None):
 	"""
 	Creates a counter-clockwise winding polygon with only left angles around a list of NSPoints.
 	:param points: List of NSPoints (each NSPoint is represented as a tuple of (x, y)).
 	:param offset: Padding distance, default is 0.0.
+	:param maxVertices: Optional vertex budget for the hull before offsetting, default is None (no simplification).
 	:return: List of NSPoints representing the outer polygon.
 	"""
 	offset *= -1
-	
+
 	if len(points) < 3:
 		return points
 
-	# Calculate convex hull using Gift Wrapping algorithm
-	hull = []
-	leftMost = min(points, key=lambda p: p[0])
-	pointOnHull = leftMost
-
-	while True:
-		hull.append(pointOnHull)
-		nextPoint = points[0]
-		for candidate in points[1:]:
-			# Check if candidate forms a left turn
-			if nextPoint == pointOnHull or _calculateCrossProduct(pointOnHull, nextPoint, candidate) < 0:
-				nextPoint = candidate
-		if nextPoint == leftMost:
-			break
-		pointOnHull = nextPoint
+	# Calculate convex hull using the monotone chain algorithm
+	hull = convexHull(points)
+	if len(hull) < 3:
+		return hull
+	if maxVertices:
+		hull = simplifyHull(hull, maxVertices)
 
 	# Create offset points
 	offsetPoints = []
-	
+
 	# Process each edge of the hull
 	for i in range(len(hull)):
 		p1 = hull[i]
 		p2 = hull[(i + 1) % len(hull)]
-		
+
 		# Calculate direction and normal vectors
 		deltaX = p2[0] - p1[0]
 		deltaY = p2[1] - p1[1]
 		length = (deltaX * deltaX + deltaY * deltaY) ** 0.5
-		
+
 		# Normalize and create perpendicular vector
 		normalX = -deltaY / length
 		normalY = deltaX / length
-		
+
 		# Create offset points
 		offsetPoints.append((
 			p1[0] + normalX * offset,
@@ -0,0 +1,404 @@
+# -*- coding: utf-8 -*-
+"""
+Reproducible performance baseline for the kerning tools, measured on synthetic fonts.
+Stand-in layers, glyphs and fonts are generated from seeded outline data and mimic the parts of the
+GlyphsApp API the kerning code uses (bounds, sidebearings at heights, categories, groups, kerning).
+
+In Terminal, benchmarks the pure-Python engines (kernprofile, kernparallel, kerntable, kernfea):
+python3 kernbenchmark.py --sizes 100 500 2000 --output baseline.json
+python3 kernbenchmark.py --output current.json --compare baseline.json
+
+kernanalysis needs GlyphsApp. To include minDistanceBetweenTwoLayers(), stringToListOfGlyphsForFont(),
+sortedIntervalsFromString() and bubble(), run from the Macro Window:
+import kernbenchmark; kernbenchmark.main(["--output", "/path/to/results.json"])
+"""
+from __future__ import print_function
+
+from collections import namedtuple
+from timeit import default_timer as timer
+import argparse
+import datetime
+import json
+import math
+import platform
+import random
+import sys
+
+from kernprofile import BoxPrefilter, BudgetedCrashSearch, numpy
+from kernparallel import MasterSnapshot, GROUP_PREFIX_LEFT, GROUP_PREFIX_RIGHT, crashesForLeftGlyphs, parallelCrashes
+from kerntable import KerningTable, MultiMasterPairs
+from kernfea import parseFeaKerning
+
+try:
+	import kernanalysis
+except ImportError:
+	kernanalysis = None  # outside of Glyphs
+
+NOT_FOUND = sys.maxsize  # like NSNotFound
+DEFAULT_SIZES = (100, 500, 2000)
+STEP = 5.0
+MIN_DISTANCE = 10.0
+
+Point = namedtuple("Point", "x y")
+Size = namedtuple("Size", "width height")
+Rect = namedtuple("Rect", "origin size")
+
+
+class StandInLayer:
+	"""Outline data of one synthetic glyph: closed polygons of (x, y) tuples and an advance width."""
+
+	def __init__(self, width, polygons):
+		self.width = width
+		self.polygons = polygons
+		self.edges = []
+		for polygon in polygons:
+			for i in range(len(polygon)):
+				(x1, y1), (x2, y2) = polygon[i], polygon[(i + 1) % len(polygon)]
+				if y1 != y2:
+					self.edges.append((x1, y1, x2, y2))
+		xs = [x for polygon in polygons for x, y in polygon]
+		ys = [y for polygon in polygons for x, y in polygon]
+		if xs:
+			self.bounds = Rect(Point(min(xs), min(ys)), Size(max(xs) - min(xs), max(ys) - min(ys)))
+		else:
+			self.bounds = Rect(Point(0.0, 0.0), Size(0.0, 0.0))
+
+	def fastBounds(self):
+		return self.bounds
+
+	@property
+	def LSB(self):
+		return self.bounds.origin.x
+
+	@property
+	def RSB(self):
+		return self.width - self.bounds.origin.x - self.bounds.size.width
+
+	def extremesAtHeight(self, height):
+		xMin = xMax = None
+		for x1, y1, x2, y2 in self.edges:
+			if min(y1, y2) <= height <= max(y1, y2):
+				x = x1 + (height - y1) * (x2 - x1) / (y2 - y1)
+				if xMin is None or x < xMin:
+					xMin = x
+				if xMax is None or x > xMax:
+					xMax = x
+		return xMin, xMax
+
+	def lsbAtHeight_(self, height):
+		xMin, xMax = self.extremesAtHeight(height)
+		return NOT_FOUND if xMin is None else xMin
+
+	def rsbAtHeight_(self, height):
+		xMin, xMax = self.extremesAtHeight(height)
+		return NOT_FOUND if xMax is None else self.width - xMax
+
+	def points(self):
+		return [point for polygon in self.polygons for point in polygon]
+
+
+class StandInGlyph:
+
+	def __init__(self, name, category, subCategory, layers, leftKerningGroup=None, rightKerningGroup=None, unicode=None):
+		self.name = name
+		self.category = category
+		self.subCategory = subCategory
+		self.case = None
+		self.script = "latin" if category == "Letter" else None
+		self.export = True
+		self.productionName = None
+		self.lastChange = None
+		self.layers = layers
+		self.leftKerningGroup = leftKerningGroup
+		self.rightKerningGroup = rightKerningGroup
+		self.unicode = unicode
+
+
+class StandInGlyphList(list):
+	"""List of glyphs that can also be indexed by glyph name, like font.glyphs."""
+
+	def __init__(self, glyphs):
+		super().__init__(glyphs)
+		self.glyphsForNames = {glyph.name: glyph for glyph in glyphs}
+
+	def __getitem__(self, key):
+		if isinstance(key, str):
+			return self.glyphsForNames.get(key)
+		return super().__getitem__(key)
+
+
+class StandInFont:
+
+	def __init__(self, glyphs, masterIDs, kerning):
+		self.glyphs = StandInGlyphList(glyphs)
+		self.masterIDs = masterIDs
+		self.kerning = kerning  # {masterID: {leftKey: {rightKey: value}}}, glyph keys are names
+
+	def glyphForName_(self, glyphName):
+		return self.glyphs[glyphName]
+
+	def snapshot(self, masterID):
+		"""The same data as a MasterSnapshot, as handed to the parallel crash scan."""
+		glyphs = {glyph.name: (glyph.layers[masterID].width, glyph.layers[masterID].polygons) for glyph in self.glyphs}
+		rightGroups = {glyph.name: glyph.rightKerningGroup for glyph in self.glyphs if glyph.rightKerningGroup}
+		leftGroups = {glyph.name: glyph.leftKerningGroup for glyph in self.glyphs if glyph.leftKerningGroup}
+		kerning = {(leftKey, rightKey): value for leftKey, rightValues in self.kerning[masterID].items() for rightKey, value in rightValues.items()}
+		return MasterSnapshot(masterID, masterID, glyphs, rightGroups, leftGroups, kerning)
+
+
+GLYPH_KINDS = (
+	# category, subcategory, bottom, top
+	("Letter", "Uppercase", 0, 700),
+	("Letter", "Lowercase", 0, 500),
+	("Letter", "Lowercase", 0, 720),  # ascender
+	("Letter", "Lowercase", -200, 500),  # descender
+	("Number", "Decimal Digit", 0, 700),
+	("Punctuation", None, 0, 120),
+	("Punctuation", None, 450, 700),
+)
+
+
+def ellipse(centerX, centerY, radiusX, radiusY, pointCount):
+	return [
+		(centerX + radiusX * math.cos(2 * math.pi * i / pointCount), centerY + radiusY * math.sin(2 * math.pi * i / pointCount))
+		for i in range(pointCount)
+	]
+
+
+def syntheticLayer(rng, bottom, top, hasDot=False):
+	"""A bowl and a stem, optionally with a separate dot above (a gap in the profile, like in i or j)."""
+	leftSidebearing = rng.uniform(15, 80)
+	shapeWidth = rng.uniform(150, 600)
+	width = leftSidebearing + shapeWidth + rng.uniform(15, 80)
+	height = top - bottom
+	polygons = [ellipse(leftSidebearing + shapeWidth / 2, bottom + height * 0.35, shapeWidth / 2, height * 0.35, rng.choice((16, 24, 32)))]
+	stemX = leftSidebearing + rng.choice((0.0, shapeWidth - 80.0))
+	polygons.append([(stemX, bottom), (stemX + 80, bottom), (stemX + 80, top), (stemX, top)])
+	if hasDot:
+		polygons.append(ellipse(stemX + 40, top + 120, 45, 45, 12))
+	return StandInLayer(width, polygons)
+
+
+def syntheticFont(glyphCount, masterIDs=("m01", "m02", "m03"), groupCount=None, pairsPerGlyph=8, seed=1):
+	"""Seeded font with glyphCount glyphs, kerning groups, and group and exception kerning in every master."""
+	rng = random.Random("%s-%s" % (seed, glyphCount))
+	groupCount = groupCount or max(2, glyphCount // 4)
+	glyphs = []
+	for i in range(glyphCount):
+		category, subCategory, bottom, top = GLYPH_KINDS[i % len(GLYPH_KINDS)]
+		hasDot = i % 11 == 0
+		layers = {masterID: syntheticLayer(rng, bottom, top, hasDot) for masterID in masterIDs}
+		glyphs.append(StandInGlyph(
+			"g%05i" % i,
+			category,
+			subCategory,
+			layers,
+			leftKerningGroup="G%i" % rng.randrange(groupCount),
+			rightKerningGroup="G%i" % rng.randrange(groupCount),
+			unicode="%04X" % (0xE000 + i),
+		))
+
+	kerning = {}
+	for masterIndex, masterID in enumerate(masterIDs):
+		masterRng = random.Random("%s-%s-%s" % (seed, glyphCount, masterIndex))
+		masterKerning = {}
+		for i in range(glyphCount * pairsPerGlyph):
+			if masterRng.random() < 0.8:
+				leftKey = GROUP_PREFIX_LEFT + "G%i" % masterRng.randrange(groupCount)
+				rightKey = GROUP_PREFIX_RIGHT + "G%i" % masterRng.randrange(groupCount)
+			else:
+				leftKey = masterRng.choice(glyphs).name
+				rightKey = masterRng.choice(glyphs).name
+			# some pairs are left out in some masters:
+			if masterRng.random() < 0.05 * masterIndex:
+				continue
+			masterKerning.setdefault(leftKey, {})[rightKey] = float(masterRng.randrange(-120, 60, 5))
+		kerning[masterID] = masterKerning
+	return StandInFont(glyphs, list(masterIDs), kerning)
+
+
+def feaCodeForKerning(masterKerning):
+	lines = ["feature kern {"]
+	for leftKey, rightValues in masterKerning.items():
+		for rightKey, value in rightValues.items():
+			lines.append("\tpos %s %s %i;" % (leftKey, rightKey, value))
+	lines.append("} kern;")
+	return lines
+
+
+class BenchmarkRun:
+	"""Times benchmarks (best of repeat runs) and collects the results for the JSON output."""
+
+	def __init__(self, repeat=3):
+		self.repeat = max(1, repeat)
+		self.results = []
+
+	def measure(self, benchmark, glyphCount, operations, function):
+		best = None
+		for _ in range(self.repeat):
+			start = timer()
+			function()
+			seconds = timer() - start
+			if best is None or seconds < best:
+				best = seconds
+		result = {
+			"benchmark": benchmark,
+			"glyphs": glyphCount,
+			"operations": operations,
+			"seconds": round(best, 6),
+			"perSecond": round(operations / best, 1) if best else None,
+		}
+		self.results.append(result)
+		print("%-36s %6i glyphs %10i ops %9.4f s %14s ops/s" % (benchmark, glyphCount, operations, best, "%.0f" % result["perSecond"] if best else "-"))
+		return result
+
+
+def runEngineBenchmarks(run, font, glyphCount, parallel=False):
+	masterID = font.masterIDs[0]
+	names = [glyph.name for glyph in font.glyphs]
+	snapshot = font.snapshot(masterID)
+
+	run.measure("edge profiles", glyphCount, glyphCount, lambda: [snapshot.profile(name, STEP) for name in names])
+
+	# like KernCrasher, every glyph against every glyph:
+	pairCount = glyphCount * glyphCount
+	run.measure("pair scan (profile block)", glyphCount, pairCount, lambda: crashesForLeftGlyphs(snapshot, names, names, STEP, MIN_DISTANCE))
+	if parallel:
+		run.measure("pair scan (process pool)", glyphCount, pairCount, lambda: parallelCrashes(snapshot, names, names, STEP, MIN_DISTANCE))
+
+	# quick check mode, with an empty glyph (a space) among the glyphs, like in real fonts:
+	snapshot.glyphs["space"] = (250.0, [])
+	searchNames = names + ["space"]
+	run.measure(
+		"budgeted crash search",
+		glyphCount,
+		len(searchNames) * len(searchNames),
+		lambda: BudgetedCrashSearch(MIN_DISTANCE).search(searchNames, searchNames, lambda name: snapshot.profile(name, STEP), lambda leftName, rightName: 0.0),
+	)
+
+	boxes = []
+	for glyph in font.glyphs:
+		bounds = glyph.layers[masterID].bounds
+		boxes.append((bounds.origin.x, bounds.origin.y, bounds.origin.x + bounds.size.width, bounds.origin.y + bounds.size.height, glyph.layers[masterID].width))
+
+	def prefilterAllPairs():
+		prefilter = BoxPrefilter(minDistance=MIN_DISTANCE)
+		for leftBox in boxes:
+			for rightBox in boxes:
+				prefilter.needsMeasuring(leftBox, rightBox)
+
+	run.measure("box prefilter", glyphCount, pairCount, prefilterAllPairs)
+
+	masterKerning = font.kerning[masterID]
+	kernPairCount = sum(len(rightValues) for rightValues in masterKerning.values())
+
+	def queryKerningTable():
+		table = KerningTable.fromDict(masterKerning)
+		table.indexesWhere(minValue=-10, maxValue=10)
+
+	run.measure("kerning table", glyphCount, kernPairCount, queryKerningTable)
+	run.measure("multi-master union", glyphCount, kernPairCount * len(font.masterIDs), lambda: MultiMasterPairs.fromKerning(font.kerning, font.masterIDs).missingPairs())
+
+	feaLines = feaCodeForKerning(masterKerning)
+	run.measure("fea parser", glyphCount, kernPairCount, lambda: parseFeaKerning(feaLines).uniquePairs())
+
+
+def runGlyphsBenchmarks(run, font, glyphCount, maxPairs=20000):
+	"""Benchmarks for kernanalysis functions, only available inside Glyphs."""
+	masterID = font.masterIDs[0]
+	names = [glyph.name for glyph in font.glyphs]
+	layers = [font.glyphs[name].layers[masterID] for name in names]
+
+	# the per-height layer loop is slow, so measure a fixed sample of pairs:
+	sampleRng = random.Random(glyphCount)
+	pairs = [(sampleRng.choice(layers), sampleRng.choice(layers)) for _ in range(min(maxPairs, glyphCount * glyphCount))]
+	run.measure(
+		"minDistanceBetweenTwoLayers",
+		glyphCount,
+		len(pairs),
+		lambda: [kernanalysis.minDistanceBetweenTwoLayers(leftLayer, rightLayer, interval=STEP) for leftLayer, rightLayer in pairs],
+	)
+
+	glyphListString = "@Letter:Uppercase @Letter:Lowercase @Number " + " ".join("/%s" % name for name in names[:50])
+	run.measure(
+		"stringToListOfGlyphsForFont",
+		glyphCount,
+		20,
+		lambda: [kernanalysis.stringToListOfGlyphsForFont(glyphListString, font, report=False) for _ in range(20)],
+	)
+
+	intervalString = "-200:-150, 0:20, 480:520, 690:720"
+	run.measure(
+		"sortedIntervalsFromString",
+		glyphCount,
+		1000,
+		lambda: [kernanalysis.sortedIntervalsFromString(intervalString) for _ in range(1000)],
+	)
+
+	pointLists = [layer.points() for layer in layers]
+	run.measure("bubble", glyphCount, glyphCount, lambda: [kernanalysis.bubble(points, offset=10.0) for points in pointLists])
+
+
+def compareResults(oldResults, newResults, tolerance=0.2):
+	"""Prints old vs. new timings per benchmark and glyph count. Returns the results that are slower by more than tolerance."""
+	oldTimings = {(result["benchmark"], result["glyphs"]): result["seconds"] for result in oldResults}
+	regressions = []
+	for result in newResults:
+		key = (result["benchmark"], result["glyphs"])
+		if key not in oldTimings or not oldTimings[key]:
+			continue
+		ratio = result["seconds"] / oldTimings[key]
+		flag = "⚠️ " if ratio > 1.0 + tolerance else ""
+		print("%s%-36s %6i glyphs: %.2fx" % (flag, key[0], key[1], ratio))
+		if flag:
+			regressions.append(result)
+	return regressions
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Kerning benchmarks on synthetic fonts.")
+	parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="glyph counts of the synthetic fonts")
+	parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark, the fastest one counts")
+	parser.add_argument("--seed", type=int, default=1, help="seed for the synthetic outlines and kerning")
+	parser.add_argument("--parallel", action="store_true", help="also time the process pool crash scan")
+	parser.add_argument("--output", help="write the results to this JSON file")
+	parser.add_argument("--compare", help="compare with the results in this JSON file, exit with 1 on regressions")
+	parser.add_argument("--tolerance", type=float, default=0.2, help="slowdown that counts as a regression, default 0.2 (20%%)")
+	args = parser.parse_args(argv)
+
+	run = BenchmarkRun(repeat=args.repeat)
+	for glyphCount in args.sizes:
+		font = syntheticFont(glyphCount, seed=args.seed)
+		runEngineBenchmarks(run, font, glyphCount, parallel=args.parallel)
+		if kernanalysis is not None:
+			runGlyphsBenchmarks(run, font, glyphCount)
+	if kernanalysis is None:
+		print("kernanalysis benchmarks skipped, they need GlyphsApp (run from the Macro Window).")
+
+	report = {
+		"meta": {
+			"date": datetime.datetime.now().isoformat(timespec="seconds"),
+			"python": platform.python_version(),
+			"platform": platform.platform(),
+			"numpy": numpy.__version__ if numpy is not None else None,
+			"glyphs": kernanalysis is not None,
+			"seed": args.seed,
+			"repeat": args.repeat,
+		},
+		"results": run.results,
+	}
+	if args.output:
+		with open(args.output, "w", encoding="utf-8") as outputFile:
+			json.dump(report, outputFile, indent=1)
+		print("Results written to %s" % args.output)
+
+	if args.compare:
+		with open(args.compare, encoding="utf-8") as compareFile:
+			oldReport = json.load(compareFile)
+		if compareResults(oldReport["results"], run.results, args.tolerance):
+			return 1
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming parser for kerning in AFDKO feature code (.fea).
+Pure Python, no GlyphsApp imports, so it can be tried out on plain .fea files:
+python3 kernfea.py kern.fea (dry run, reports pairs per second)
+"""
+from __future__ import print_function
+
+from collections import OrderedDict
+from timeit import default_timer as timer
+import re
+import sys
+
+LEFT_SIDE_MARKERS = ("MMK_L_", "_1ST", "_first")
+RIGHT_SIDE_MARKERS = ("MMK_R_", "_2ND", "_second")
+POSITIONING_KEYWORDS = ("cursive", "mark", "base", "ligature")
+TOKEN_PATTERN = re.compile(r"[\[\]<>;={}'(),]|[^\s\[\]<>;={}'(),]+")
+
+
+def tokenize(lines):
+	"""
+	Yields the tokens of feature code, read line by line from any iterable of strings (e.g. an open file).
+	Comments are dropped, brackets, braces and other punctuation become tokens of their own.
+	"""
+	for line in lines:
+		if "#" in line:
+			line = line[:line.find("#")]
+		for token in TOKEN_PATTERN.findall(line):
+			yield token
+
+
+def statements(tokens):
+	"""Groups tokens into statements, i.e. lists of tokens up to a semicolon. Block braces end a statement as well."""
+	statement = []
+	for token in tokens:
+		if token == ";":
+			if statement:
+				yield statement
+			statement = []
+		elif token in "{}":
+			# e.g. 'feature kern {' or '} kern;', nothing to parse for kerning:
+			statement = []
+		else:
+			statement.append(token)
+	if statement:
+		yield statement
+
+
+def cleanGroupName(className):
+	"""
+	Kerning group name for a class name, and whether the class can be used on the left and the right side of a pair.
+	@MMK_L_A or @A_1ST only go left (i.e. become the right group of the glyphs), @MMK_R_A or @A_2ND only right.
+	"""
+	isLeft, isRight = True, True
+	if any(marker in className for marker in LEFT_SIDE_MARKERS):
+		isRight = False
+	elif any(marker in className for marker in RIGHT_SIDE_MARKERS):
+		isLeft = False
+	groupName = className
+	for nameParticle in LEFT_SIDE_MARKERS + RIGHT_SIDE_MARKERS + ("@", "."):
+		groupName = groupName.replace(nameParticle, "")
+	return groupName, isLeft, isRight
+
+
+def isNumber(token):
+	try:
+		float(token)
+		return True
+	except ValueError:
+		return False
+
+
+class FeaKerning:
+	"""
+	Kerning found in feature code:
+	classes: {className: [glyphName, ...]} in order of definition, class references resolved
+	pairs: [(leftKey, rightKey, value), ...] in file order, keys are glyph names or @class names
+	"""
+
+	def __init__(self):
+		self.classes = OrderedDict()
+		self.valueRecords = {}
+		self.pairs = []
+		self.subtableCount = 0
+		self.skippedStatements = []
+
+	def __repr__(self):
+		return "<FeaKerning %i classes, %i pairs>" % (len(self.classes), len(self.pairs))
+
+	def uniquePairs(self):
+		"""
+		Pairs as {(leftKey, rightKey): value}. Like in the OpenType lookup, the first occurrence of a pair wins,
+		so exceptions (enum pos, glyph pairs) that precede class pairs are kept.
+		"""
+		uniquePairs = OrderedDict()
+		for leftKey, rightKey, value in self.pairs:
+			if (leftKey, rightKey) not in uniquePairs:
+				uniquePairs[(leftKey, rightKey)] = value
+		return uniquePairs
+
+	def parse(self, lines):
+		for statement in statements(tokenize(lines)):
+			self.parseStatement(statement)
+		return self
+
+	def parseStatement(self, statement):
+		first = statement[0]
+		if first.startswith("@") and len(statement) > 1 and statement[1] == "=":
+			self.classes[first] = self.glyphList(statement[2:])
+		elif first == "valueRecordDef":
+			# valueRecordDef <0 0 -20 0> KERN_A;
+			end = statement.index(">") if ">" in statement else len(statement) - 1
+			self.valueRecords[statement[-1]] = self.valueFromRecord(statement[1:end + 1])
+		elif first == "subtable":
+			self.subtableCount += 1
+		elif first in ("pos", "position"):
+			self.parsePair(statement[1:], enumerated=False)
+		elif first in ("enum", "enumerate") and len(statement) > 1 and statement[1] in ("pos", "position"):
+			self.parsePair(statement[2:], enumerated=True)
+
+	def glyphList(self, tokens):
+		"""Glyph names of a class definition or inline class, referenced classes expanded."""
+		glyphNames = []
+		for token in tokens:
+			if token in "[]":
+				continue
+			if token.startswith("@"):
+				glyphNames.extend(self.classes.get(token, ()))
+			else:
+				glyphNames.append(token.lstrip("\\"))
+		return glyphNames
+
+	def valueFromRecord(self, tokens):
+		"""x advance of a value record: -50, <-50>, <0 0 -50 0>, <NULL> or <name> of a valueRecordDef."""
+		numbers = [token for token in tokens if token not in "<>"]
+		if len(numbers) == 1:
+			if isNumber(numbers[0]):
+				return float(numbers[0])
+			return self.valueRecords.get(numbers[0], 0.0)
+		if len(numbers) >= 4 and all(isNumber(number) for number in numbers[:4]):
+			return float(numbers[2])
+		return None
+
+	def readItem(self, tokens, position):
+		"""Returns a glyph name, @class name or list of glyph names (inline class), and the next position."""
+		token = tokens[position]
+		if token == "[":
+			end = tokens.index("]", position)
+			glyphNames = self.glyphList(tokens[position + 1:end])
+			if len(glyphNames) == 1:
+				return glyphNames[0], end + 1
+			return glyphNames, end + 1
+		return token.lstrip("\\"), position + 1
+
+	def readValue(self, tokens, position):
+		"""Returns the value of a value record starting at position (or None), and the next position."""
+		if position >= len(tokens):
+			return None, position
+		if tokens[position] == "<":
+			end = tokens.index(">", position)
+			return self.valueFromRecord(tokens[position:end + 1]), end + 1
+		if isNumber(tokens[position]):
+			return float(tokens[position]), position + 1
+		return None, position
+
+	def expandedItem(self, item, enumerated):
+		if isinstance(item, list):
+			return item
+		if enumerated and item.startswith("@"):
+			return self.classes.get(item, [])
+		return [item]
+
+	def parsePair(self, tokens, enumerated=False):
+		# skip contextual, cursive and mark positioning:
+		if not tokens or "'" in tokens or tokens[0] in POSITIONING_KEYWORDS:
+			self.skippedStatements.append(tokens)
+			return
+		try:
+			leftItem, position = self.readItem(tokens, 0)
+			# pos A <0 0 -50 0> B; (value record of the first glyph)
+			firstValue, position = self.readValue(tokens, position)
+			rightItem, position = self.readItem(tokens, position)
+			secondValue, position = self.readValue(tokens, position)
+		except (ValueError, IndexError):
+			self.skippedStatements.append(tokens)
+			return
+		value = firstValue if firstValue is not None else secondValue
+		if value is None or rightItem in ("<", ">") or isNumber(rightItem if isinstance(rightItem, str) else ""):
+			self.skippedStatements.append(tokens)
+			return
+		for leftKey in self.expandedItem(leftItem, enumerated):
+			for rightKey in self.expandedItem(rightItem, enumerated):
+				self.pairs.append((leftKey, rightKey, value))
+
+
+def parseFeaKerning(lines):
+	"""Parses feature code from any iterable of lines, e.g. an open file, and returns a FeaKerning object."""
+	return FeaKerning().parse(lines)
+
+
+def parseFeaFile(filePath):
+	with open(filePath, encoding="utf-8") as feaFile:
+		return parseFeaKerning(feaFile)
+
+
+def dryRun(filePath):
+	"""Parses the file without changing anything and returns a short report including pairs per second."""
+	start = timer()
+	feaKerning = parseFeaFile(filePath)
+	uniquePairs = feaKerning.uniquePairs()
+	seconds = max(timer() - start, 1e-9)
+	return "%s: %i classes, %i pairs (%i unique), %i subtable breaks, %i skipped statements, %.3f s, %i pairs/s" % (
+		filePath,
+		len(feaKerning.classes),
+		len(feaKerning.pairs),
+		len(uniquePairs),
+		feaKerning.subtableCount,
+		len(feaKerning.skippedStatements),
+		seconds,
+		len(feaKerning.pairs) / seconds,
+	)
+
+
+if __name__ == "__main__":
+	for feaPath in sys.argv[1:]:
+		print(dryRun(feaPath))
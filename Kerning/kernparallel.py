@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""
+Parallel kern crash scans over picklable master snapshots.
+Pure Python, no GlyphsApp imports: worker processes only see plain outline and kerning data,
+so the engine can also run (and be tried out) outside of Glyphs.
+"""
+from __future__ import print_function
+
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+from kernprofile import BoxPrefilter, EdgeProfile, ProfileBlock
+
+GROUP_PREFIX_LEFT = "@MMK_L_"  # left side of a pair, i.e. right group of the glyph
+GROUP_PREFIX_RIGHT = "@MMK_R_"  # right side of a pair, i.e. left group of the glyph
+
+
+class MasterSnapshot:
+	"""
+	Everything a crash scan needs from one master, as plain Python data:
+	glyphs: {glyphName: (width, polygons)}, polygons being lists of (x, y) tuples of flattened, decomposed outlines
+	rightGroups, leftGroups: {glyphName: groupName} (the right group is used when the glyph is on the left side of a pair)
+	kerning: {(leftKey, rightKey): value}, keys are glyph names or @MMK_L_/@MMK_R_ group names
+	profiles: optional {glyphName: EdgeProfile} measured in the host application, used instead of the polygons if the step matches
+	boxes: optional {glyphName: (xMin, yMin, xMax, yMax, width) or None} for the BoxPrefilter, else taken from the polygons
+	"""
+
+	def __init__(self, masterID, masterName="", glyphs=None, rightGroups=None, leftGroups=None, kerning=None, profiles=None, boxes=None):
+		self.masterID = masterID
+		self.masterName = masterName
+		self.glyphs = glyphs or {}
+		self.rightGroups = rightGroups or {}
+		self.leftGroups = leftGroups or {}
+		self.kerning = kerning or {}
+		self.profiles = profiles or {}
+		self.boxes = boxes
+
+	def __repr__(self):
+		return "<MasterSnapshot %s: %i glyphs, %i kern pairs>" % (self.masterName or self.masterID, len(self.glyphs), len(self.kerning))
+
+	def effectiveKerning(self, leftGlyphName, rightGlyphName):
+		"""Exception before group kerning, like in the font: glyph-glyph, glyph-group, group-glyph, group-group."""
+		leftKeys = [leftGlyphName]
+		if self.rightGroups.get(leftGlyphName):
+			leftKeys.append(GROUP_PREFIX_LEFT + self.rightGroups[leftGlyphName])
+		rightKeys = [rightGlyphName]
+		if self.leftGroups.get(rightGlyphName):
+			rightKeys.append(GROUP_PREFIX_RIGHT + self.leftGroups[rightGlyphName])
+		for leftKey, rightKey in ((leftKeys[0], rightKeys[0]), (leftKeys[0], rightKeys[-1]), (leftKeys[-1], rightKeys[0]), (leftKeys[-1], rightKeys[-1])):
+			value = self.kerning.get((leftKey, rightKey))
+			if value is not None:
+				return value
+		return 0.0
+
+	def profile(self, glyphName, step):
+		profile = self.profiles.get(glyphName)
+		if profile is not None and profile.step == float(step):
+			return profile
+		width, polygons = self.glyphs[glyphName]
+		return EdgeProfile.fromPolygons(polygons, width, step)
+
+	def box(self, glyphName):
+		"""(xMin, yMin, xMax, yMax, width) of the glyph, or None if it is empty."""
+		if self.boxes is not None:
+			return self.boxes.get(glyphName)
+		width, polygons = self.glyphs[glyphName]
+		points = [point for polygon in polygons for point in polygon]
+		if not points:
+			return None
+		xs, ys = [x for x, y in points], [y for x, y in points]
+		return (min(xs), min(ys), max(xs), max(ys), width)
+
+
+def chunked(items, chunkSize):
+	for i in range(0, len(items), chunkSize):
+		yield items[i:i + chunkSize]
+
+
+# worker state, set once per process by _initWorker():
+_workerSnapshot = None
+_workerRightBlock = None
+
+
+def _initWorker(snapshot, rightNames, step):
+	global _workerSnapshot, _workerRightBlock
+	_workerSnapshot = snapshot
+	_workerRightBlock = ProfileBlock(snapshot.profile(name, step) for name in rightNames)
+
+
+def _crashesForChunk(leftNames, rightNames, step, minDistance, ignoreIntervals):
+	return crashesForLeftGlyphs(_workerSnapshot, leftNames, rightNames, step, minDistance, ignoreIntervals, rightBlock=_workerRightBlock)
+
+
+def crashesForLeftGlyphs(snapshot, leftNames, rightNames, step, minDistance, ignoreIntervals=(), rightBlock=None):
+	"""
+	Returns [(leftName, rightName, distance), ...] for all pairs closer than minDistance, in input order.
+	Like the serial scan, only pairs that pass the BoxPrefilter are reported.
+	"""
+	if rightBlock is None:
+		rightBlock = ProfileBlock(snapshot.profile(name, step) for name in rightNames)
+	prefilter = BoxPrefilter(minDistance=minDistance)
+	rightBoxes = [snapshot.box(rightName) for rightName in rightNames]
+	crashes = []
+	for leftName in leftNames:
+		leftBox = snapshot.box(leftName)
+		kernings = [snapshot.effectiveKerning(leftName, rightName) for rightName in rightNames]
+		candidates = [prefilter.needsMeasuring(leftBox, rightBox, kerning) for rightBox, kerning in zip(rightBoxes, kernings)]
+		if not any(candidates):
+			continue
+		# one left glyph against all right glyphs at once:
+		distances = rightBlock.minDistances(snapshot.profile(leftName, step), kernings, ignoreIntervals=ignoreIntervals)
+		for rightName, distance, isCandidate in zip(rightNames, distances, candidates):
+			if isCandidate and distance is not None and distance < minDistance:
+				crashes.append((leftName, rightName, distance))
+	return crashes
+
+
+def pythonExecutable():
+	"""
+	Python interpreter for spawned worker processes, or None if there is none. Inside an embedding app like Glyphs,
+	sys.executable is the app itself, which must not be launched as a worker, so the interpreter is looked up in sys.exec_prefix.
+	"""
+	binFolder = os.path.join(sys.exec_prefix, "bin")
+	candidates = (
+		sys.executable,
+		os.path.join(binFolder, "python%i.%i" % sys.version_info[:2]),
+		os.path.join(binFolder, "python%i" % sys.version_info[0]),
+		os.path.join(sys.exec_prefix, "python.exe"),
+	)
+	for path in candidates:
+		if path and os.path.basename(path).lower().startswith("python") and os.path.isfile(path) and os.access(path, os.X_OK):
+			return path
+	return None
+
+
+def parallelCrashes(snapshot, leftNames, rightNames, step, minDistance, ignoreIntervals=(), jobs=None, chunkSize=None):
+	"""
+	Like crashesForLeftGlyphs(), but fans the left glyphs out in chunks to a process pool of jobs workers
+	(default: all CPU cores). Results are merged back in input order. Falls back to a serial scan
+	if no Python interpreter is found for the workers, or no process pool can be started.
+	"""
+	leftNames, rightNames = list(leftNames), list(rightNames)
+	ignoreIntervals = tuple(ignoreIntervals or ())
+	jobs = jobs or os.cpu_count() or 1
+	if jobs < 2 or len(leftNames) < 2:
+		return crashesForLeftGlyphs(snapshot, leftNames, rightNames, step, minDistance, ignoreIntervals)
+
+	if not chunkSize:
+		# a few chunks per worker, so slow chunks do not hold up the whole pool:
+		chunkSize = max(1, len(leftNames) // (jobs * 4))
+
+	executable = pythonExecutable()
+	if not executable:
+		print("⚠️ No Python interpreter found for worker processes, scanning serially instead.")
+		return crashesForLeftGlyphs(snapshot, leftNames, rightNames, step, minDistance, ignoreIntervals)
+	context = multiprocessing.get_context("spawn")
+	context.set_executable(executable)
+
+	crashes = []
+	try:
+		with ProcessPoolExecutor(
+			max_workers=jobs,
+			mp_context=context,
+			initializer=_initWorker,
+			initargs=(snapshot, rightNames, step),
+		) as pool:
+			futures = [pool.submit(_crashesForChunk, chunk, rightNames, step, minDistance, ignoreIntervals) for chunk in chunked(leftNames, chunkSize)]
+			for future in futures:
+				crashes.extend(future.result())
+	except (OSError, BrokenProcessPool) as e:
+		print("⚠️ Could not start process pool, scanning serially instead: %s" % e)
+		return crashesForLeftGlyphs(snapshot, leftNames, rightNames, step, minDistance, ignoreIntervals)
+	return crashes
@@ -0,0 +1,437 @@
+# -*- coding: utf-8 -*-
+"""
+Sidebearing profiles for kern analysis.
+Pure Python, no GlyphsApp imports, so profiles can also be built
+from plain coordinate data outside of Glyphs.
+"""
+from __future__ import print_function
+
+from array import array
+from timeit import default_timer as timer
+import math
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+NaN = float("nan")
+
+
+def gridIndexRange(bottom, top, step):
+	"""
+	Returns (firstIndex, lastIndex) of the grid heights index*step
+	that fall between bottom and top (both inclusive).
+	"""
+	firstIndex = int(math.ceil(bottom / step))
+	lastIndex = int(math.floor(top / step))
+	return firstIndex, lastIndex
+
+
+class EdgeProfile:
+	"""
+	Left and right sidebearings of one layer, sampled at the heights
+	index*step, from firstIndex upwards. Gaps (no outline at that height,
+	like between the dot and the stem of i or j) are stored as NaN.
+	"""
+	__slots__ = ("step", "firstIndex", "lsbs", "rsbs")
+
+	def __init__(self, step, firstIndex, lsbs, rsbs):
+		self.step = float(step)
+		self.firstIndex = int(firstIndex)
+		self.lsbs = array("d", lsbs)
+		self.rsbs = array("d", rsbs)
+
+	def __len__(self):
+		return len(self.lsbs)
+
+	def __repr__(self):
+		return "<EdgeProfile %i samples, y=%s:%s, step %s>" % (len(self), self.bottom, self.top, self.step)
+
+	@property
+	def lastIndex(self):
+		return self.firstIndex + len(self) - 1
+
+	@property
+	def bottom(self):
+		return self.firstIndex * self.step
+
+	@property
+	def top(self):
+		return self.lastIndex * self.step
+
+	def heightAtIndex(self, index):
+		return index * self.step
+
+	def coarsened(self, factor):
+		"""
+		Profile on a grid factor times coarser: per block of factor samples, the smallest LSB and the smallest RSB.
+		Distances between coarsened profiles are lower bounds of the distances between the original profiles.
+		"""
+		factor = max(1, int(factor))
+		if factor == 1:
+			return self
+		if not len(self):
+			# keep the coarse step, so empty glyphs (e.g. spaces) can be compared with coarsened profiles:
+			return EdgeProfile(self.step * factor, 0, (), ())
+		firstBlock = self.firstIndex // factor
+		lastBlock = self.lastIndex // factor
+		lsbs, rsbs = [], []
+		for block in range(firstBlock, lastBlock + 1):
+			start = max(block * factor - self.firstIndex, 0)
+			end = min((block + 1) * factor - self.firstIndex, len(self))
+			blockLsbs = [lsb for lsb in self.lsbs[start:end] if lsb == lsb]
+			blockRsbs = [rsb for rsb in self.rsbs[start:end] if rsb == rsb]
+			lsbs.append(min(blockLsbs) if blockLsbs else NaN)
+			rsbs.append(min(blockRsbs) if blockRsbs else NaN)
+		return EdgeProfile(self.step * factor, firstBlock, lsbs, rsbs)
+
+	@classmethod
+	def fromMeasurements(cls, bottom, top, step, measureLeft, measureRight):
+		"""
+		Samples measureLeft(height) and measureRight(height) between bottom and top.
+		Both functions return a sidebearing, or None for a gap.
+		"""
+		firstIndex, lastIndex = gridIndexRange(bottom, top, step)
+		lsbs, rsbs = [], []
+		for index in range(firstIndex, lastIndex + 1):
+			height = index * step
+			left, right = measureLeft(height), measureRight(height)
+			if left is None or right is None:
+				left = right = NaN
+			lsbs.append(left)
+			rsbs.append(right)
+		return cls(step, firstIndex, lsbs, rsbs)
+
+	@classmethod
+	def fromSamples(cls, samples, step):
+		"""
+		Builds a profile from (height, lsb, rsb) tuples, lsb/rsb can be None for gaps.
+		Heights are snapped to the grid, missing grid heights count as gaps.
+		"""
+		measured = {}
+		for height, lsb, rsb in samples:
+			if lsb is None or rsb is None:
+				lsb = rsb = NaN
+			measured[int(round(height / step))] = (lsb, rsb)
+		if not measured:
+			return cls(step, 0, (), ())
+		firstIndex, lastIndex = min(measured), max(measured)
+		lsbs, rsbs = [], []
+		for index in range(firstIndex, lastIndex + 1):
+			lsb, rsb = measured.get(index, (NaN, NaN))
+			lsbs.append(lsb)
+			rsbs.append(rsb)
+		return cls(step, firstIndex, lsbs, rsbs)
+
+	@classmethod
+	def fromPolygons(cls, polygons, width, step):
+		"""
+		Builds a profile from closed polygons, each a sequence of (x, y) tuples,
+		e.g. flattened outlines, and the advance width of the glyph.
+		"""
+		edges = []
+		for polygon in polygons:
+			count = len(polygon)
+			for i in range(count):
+				x1, y1 = polygon[i]
+				x2, y2 = polygon[(i + 1) % count]
+				if y1 != y2:
+					edges.append((x1, y1, x2, y2))
+		if not edges:
+			return cls(step, 0, (), ())
+
+		bottom = min(min(e[1], e[3]) for e in edges)
+		top = max(max(e[1], e[3]) for e in edges)
+
+		def extremesAtHeight(height):
+			xMin = xMax = None
+			for x1, y1, x2, y2 in edges:
+				if min(y1, y2) <= height <= max(y1, y2):
+					x = x1 + (height - y1) * (x2 - x1) / (y2 - y1)
+					if xMin is None or x < xMin:
+						xMin = x
+					if xMax is None or x > xMax:
+						xMax = x
+			return xMin, xMax
+
+		firstIndex, lastIndex = gridIndexRange(bottom, top, step)
+		lsbs, rsbs = [], []
+		for index in range(firstIndex, lastIndex + 1):
+			xMin, xMax = extremesAtHeight(index * step)
+			if xMin is None:
+				lsbs.append(NaN)
+				rsbs.append(NaN)
+			else:
+				lsbs.append(xMin)
+				rsbs.append(width - xMax)
+		return cls(step, firstIndex, lsbs, rsbs)
+
+
+def ignoredIndexes(firstIndex, lastIndex, step, ignoreIntervals):
+	"""Returns the set of grid indexes between firstIndex and lastIndex that fall into any of the ignoreIntervals."""
+	ignored = set()
+	for loEnd, hiEnd in ignoreIntervals or ():
+		loIndex, hiIndex = gridIndexRange(loEnd, hiEnd, step)
+		ignored.update(range(max(loIndex, firstIndex), min(hiIndex, lastIndex) + 1))
+	return ignored
+
+
+def minDistanceBetweenProfiles(leftProfile, rightProfile, kerning=0.0, ignoreIntervals=()):
+	"""
+	Shortest horizontal distance between the right edge of leftProfile and the left edge of rightProfile,
+	within their overlapping height band. Returns None if the profiles do not overlap.
+	"""
+	if leftProfile.step != rightProfile.step:
+		raise ValueError("Cannot compare profiles with different steps (%s vs. %s)." % (leftProfile.step, rightProfile.step))
+
+	firstIndex = max(leftProfile.firstIndex, rightProfile.firstIndex)
+	lastIndex = min(leftProfile.lastIndex, rightProfile.lastIndex)
+	if lastIndex < firstIndex:
+		return None
+
+	leftOffset = firstIndex - leftProfile.firstIndex
+	rightOffset = firstIndex - rightProfile.firstIndex
+	count = lastIndex - firstIndex + 1
+	rsbs = leftProfile.rsbs[leftOffset:leftOffset + count]
+	lsbs = rightProfile.lsbs[rightOffset:rightOffset + count]
+
+	if ignoreIntervals:
+		ignored = ignoredIndexes(firstIndex, lastIndex, leftProfile.step, ignoreIntervals)
+		totals = [rsb + lsb for i, (rsb, lsb) in enumerate(zip(rsbs, lsbs)) if firstIndex + i not in ignored]
+	else:
+		totals = [rsb + lsb for rsb, lsb in zip(rsbs, lsbs)]
+
+	# NaN marks gaps like in i or j, and NaN != NaN:
+	totals = [total for total in totals if total == total]
+	if not totals:
+		return None
+	return min(totals) + kerning
+
+
+def distanceRangeForBoxes(leftBox, rightBox, kerning=0.0):
+	"""
+	Boxes are (xMin, yMin, xMax, yMax, width) tuples of the left and right glyph.
+	Returns (lowest, highest) value the minimum distance of the pair can possibly have,
+	or None if the boxes do not overlap vertically, i.e., there is nothing to measure.
+	"""
+	leftXMin, leftYMin, leftXMax, leftYMax, leftWidth = leftBox
+	rightXMin, rightYMin, rightXMax, rightYMax, rightWidth = rightBox
+	if leftYMax < rightYMin or rightYMax < leftYMin:
+		return None
+	lowest = (leftWidth - leftXMax) + rightXMin + kerning
+	highest = (leftWidth - leftXMin) + rightXMax + kerning
+	return lowest, highest
+
+
+class BoxPrefilter:
+	"""
+	Cheap first pass for pair scans: rules out pairs that, judging from their bounding boxes and kerning,
+	can never be closer than minDistance (crashes), or can never be farther apart than maxDistance (gaps).
+	"""
+
+	def __init__(self, minDistance=None, maxDistance=None):
+		self.minDistance = minDistance
+		self.maxDistance = maxDistance
+		self.checked = 0
+		self.skipped = 0
+
+	def needsMeasuring(self, leftBox, rightBox, kerning=0.0):
+		self.checked += 1
+		if leftBox is None or rightBox is None:
+			self.skipped += 1
+			return False
+		distanceRange = distanceRangeForBoxes(leftBox, rightBox, kerning)
+		if distanceRange is None:
+			self.skipped += 1
+			return False
+		lowest, highest = distanceRange
+		if self.minDistance is not None and lowest < self.minDistance:
+			return True
+		if self.maxDistance is not None and highest > self.maxDistance:
+			return True
+		self.skipped += 1
+		return False
+
+	def report(self):
+		if not self.checked:
+			return "Prefilter: no pairs checked."
+		return "Prefilter: skipped %i of %i pairs (%.1f%%)." % (self.skipped, self.checked, 100.0 * self.skipped / self.checked)
+
+
+class BudgetedCrashSearch:
+	"""
+	Crash scan with early exits, for quick checks on big fonts. First bounds every pair from below with coarsened profiles,
+	then measures only pairs whose bound is below minDistance, most promising (lowest bound) first.
+	Stops after maxResults crashes (the worst ones: no unmeasured pair can be closer than the ones found),
+	or when timeBudget seconds are used up (at most half of it for bounding). Either limit can be None.
+	"""
+
+	def __init__(self, minDistance, maxResults=None, timeBudget=None, coarseFactor=8):
+		self.minDistance = minDistance
+		self.maxResults = maxResults
+		self.timeBudget = timeBudget
+		self.coarseFactor = coarseFactor
+		self.bounded = 0
+		self.candidates = 0
+		self.refined = 0
+		self.stopReason = None
+
+	def isOverBudget(self, start, share=1.0):
+		return self.timeBudget is not None and timer() - start > self.timeBudget * share
+
+	def search(self, leftNames, rightNames, profileForName, kerningForPair, ignoreIntervals=(), needsMeasuring=None):
+		"""
+		profileForName(name) returns the EdgeProfile of a glyph, kerningForPair(leftName, rightName) its kerning,
+		needsMeasuring(leftName, rightName, kerning) is an optional prefilter.
+		Returns [(leftName, rightName, distance), ...], closest pairs first.
+		"""
+		start = timer()
+		coarseProfiles = {}
+
+		def coarseProfile(name):
+			if name not in coarseProfiles:
+				coarseProfiles[name] = profileForName(name).coarsened(self.coarseFactor)
+			return coarseProfiles[name]
+
+		# coarse pass: lower bound for every pair
+		candidates = []
+		for leftName in leftNames:
+			# bounding may take half of the time, so there is time left for measuring:
+			if self.isOverBudget(start, share=0.5):
+				self.stopReason = "half of the time budget used up while bounding pairs"
+				break
+			leftCoarse = coarseProfile(leftName)
+			for rightName in rightNames:
+				kerning = kerningForPair(leftName, rightName)
+				if needsMeasuring and not needsMeasuring(leftName, rightName, kerning):
+					continue
+				self.bounded += 1
+				bound = minDistanceBetweenProfiles(leftCoarse, coarseProfile(rightName), kerning=kerning)
+				if bound is not None and bound < self.minDistance:
+					candidates.append((bound, leftName, rightName, kerning))
+		self.candidates = len(candidates)
+
+		# fine pass: measure candidates, lowest bound first
+		candidates.sort(key=lambda candidate: candidate[0])
+		crashes = []
+		for bound, leftName, rightName, kerning in candidates:
+			if self.maxResults and len(crashes) >= self.maxResults:
+				crashes.sort(key=lambda crash: crash[2])
+				crashes = crashes[:self.maxResults]
+				if bound >= crashes[-1][2]:
+					# the remaining pairs cannot be closer than the crashes found:
+					self.stopReason = self.stopReason or "found the %i closest crashes" % self.maxResults
+					break
+			if self.isOverBudget(start):
+				self.stopReason = self.stopReason or "time budget used up while measuring pairs"
+				break
+			self.refined += 1
+			distance = minDistanceBetweenProfiles(profileForName(leftName), profileForName(rightName), kerning=kerning, ignoreIntervals=ignoreIntervals)
+			if distance is not None and distance < self.minDistance:
+				crashes.append((leftName, rightName, distance))
+
+		crashes.sort(key=lambda crash: crash[2])
+		if self.maxResults:
+			crashes = crashes[:self.maxResults]
+		return crashes
+
+	def isComplete(self):
+		return self.stopReason is None or self.stopReason.startswith("found")
+
+	def report(self):
+		report = "Budgeted scan: bounded %i pairs, %i below the threshold, measured %i in full." % (self.bounded, self.candidates, self.refined)
+		if self.stopReason:
+			report += " Stopped early: %s." % self.stopReason
+		return report
+
+
+class ProfileBlock:
+	"""
+	Many (right) profiles stacked on one common height grid, so one left profile can be
+	measured against all of them at once. Uses NumPy broadcasting if available,
+	otherwise falls back to minDistanceBetweenProfiles() with identical results.
+	"""
+
+	def __init__(self, profiles, useNumpy=True):
+		self.profiles = list(profiles)
+		self.useNumpy = useNumpy and numpy is not None and bool(self.profiles)
+		if not self.profiles:
+			return
+		self.step = self.profiles[0].step
+		if any(profile.step != self.step for profile in self.profiles):
+			raise ValueError("Cannot stack profiles with different steps.")
+		if self.useNumpy:
+			nonEmpty = [profile for profile in self.profiles if len(profile)] or self.profiles
+			self.firstIndex = min(profile.firstIndex for profile in nonEmpty)
+			self.lastIndex = max(profile.lastIndex for profile in nonEmpty)
+			self.lsbs = numpy.full((len(self.profiles), max(0, self.lastIndex - self.firstIndex + 1)), numpy.nan)
+			for row, profile in enumerate(self.profiles):
+				if len(profile):
+					offset = profile.firstIndex - self.firstIndex
+					self.lsbs[row, offset:offset + len(profile)] = numpy.frombuffer(profile.lsbs, dtype=numpy.float64)
+
+	def __len__(self):
+		return len(self.profiles)
+
+	def minDistances(self, leftProfile, kernings=None, ignoreIntervals=()):
+		"""
+		Returns a list with the min distance of leftProfile to every profile in the block
+		(None where there is nothing to measure). kernings: one value per profile, or None.
+		"""
+		if kernings is None:
+			kernings = [0.0] * len(self.profiles)
+		if not self.useNumpy:
+			return [
+				minDistanceBetweenProfiles(leftProfile, rightProfile, kerning=kerning, ignoreIntervals=ignoreIntervals)
+				for rightProfile, kerning in zip(self.profiles, kernings)
+			]
+		if leftProfile.step != self.step:
+			raise ValueError("Cannot compare profiles with different steps (%s vs. %s)." % (leftProfile.step, self.step))
+
+		# the left edge on the same grid as the block, NaN outside its own extent:
+		rsbs = numpy.full(self.lsbs.shape[1], numpy.nan)
+		firstIndex = max(leftProfile.firstIndex, self.firstIndex)
+		lastIndex = min(leftProfile.lastIndex, self.lastIndex)
+		if lastIndex >= firstIndex:
+			leftOffset = firstIndex - leftProfile.firstIndex
+			count = lastIndex - firstIndex + 1
+			rsbs[firstIndex - self.firstIndex:firstIndex - self.firstIndex + count] = numpy.frombuffer(leftProfile.rsbs, dtype=numpy.float64)[leftOffset:leftOffset + count]
+		if ignoreIntervals:
+			mask = numpy.zeros(rsbs.shape, dtype=bool)
+			for index in ignoredIndexes(self.firstIndex, self.lastIndex, self.step, ignoreIntervals):
+				mask[index - self.firstIndex] = True
+			rsbs[mask] = numpy.nan
+
+		totals = self.lsbs + rsbs  # broadcasts over all right profiles, NaN marks gaps
+		measured = ~numpy.all(numpy.isnan(totals), axis=1)
+		distances = numpy.full(len(self.profiles), numpy.nan)
+		if measured.any():
+			distances[measured] = numpy.nanmin(totals[measured], axis=1)
+		return [None if not isMeasured else float(distance) + kerning for distance, isMeasured, kerning in zip(distances, measured, kernings)]
+
+
+def envelopeProfile(profiles, step):
+	"""
+	Combines profiles of several glyphs (e.g. all members of a kerning group) into one:
+	at every height, the smallest LSB and the smallest RSB of all members, i.e. their outermost edges.
+	A height is a gap only if it is a gap in all members. If all members are empty (e.g. space glyphs),
+	returns an empty profile with the given step, so it can still be compared with other profiles.
+	"""
+	profiles = [profile for profile in profiles if len(profile)]
+	if not profiles:
+		return EdgeProfile(step, 0, (), ())
+	if any(profile.step != float(step) for profile in profiles):
+		raise ValueError("Cannot combine profiles with different steps.")
+	firstIndex = min(profile.firstIndex for profile in profiles)
+	lastIndex = max(profile.lastIndex for profile in profiles)
+	count = lastIndex - firstIndex + 1
+	lsbs, rsbs = [NaN] * count, [NaN] * count
+	for profile in profiles:
+		offset = profile.firstIndex - firstIndex
+		for i, (lsb, rsb) in enumerate(zip(profile.lsbs, profile.rsbs)):
+			if lsb == lsb and not lsb >= lsbs[offset + i]:  # also replaces NaN
+				lsbs[offset + i] = lsb
+			if rsb == rsb and not rsb >= rsbs[offset + i]:
+				rsbs[offset + i] = rsb
+	return EdgeProfile(step, firstIndex, lsbs, rsbs)
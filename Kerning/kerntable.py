@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+"""
+Flat, array-backed kerning tables, and the union of the kern pairs of several masters.
+Pure Python, no GlyphsApp imports. Uses NumPy for queries if available.
+Keys are glyph names or group names (@MMK_L_..., @MMK_R_...), interned once per table.
+"""
+from __future__ import print_function
+
+from array import array
+from bisect import bisect_left
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+INT16_RANGE = (-32768, 32767)
+
+
+def valueTypecode(values):
+	"""int16 ('h') if all values are whole numbers in range, else double ('d')."""
+	for value in values:
+		if value != int(value) or not INT16_RANGE[0] <= value <= INT16_RANGE[1]:
+			return "d"
+	return "h"
+
+
+class KerningTable:
+	"""
+	One master's kerning as parallel arrays: leftIndexes, rightIndexes (into the interned key list) and values,
+	sorted by (left key, right key). Lookups use binary search on the combined key.
+	"""
+
+	def __init__(self, pairs=()):
+		pairs = sorted(pairs, key=lambda pair: (pair[0], pair[1]))
+		self.keys = sorted(set(pair[0] for pair in pairs) | set(pair[1] for pair in pairs))
+		self.keyIndexes = {key: index for index, key in enumerate(self.keys)}
+		self.leftIndexes = array("i", (self.keyIndexes[pair[0]] for pair in pairs))
+		self.rightIndexes = array("i", (self.keyIndexes[pair[1]] for pair in pairs))
+		values = [pair[2] for pair in pairs]
+		typecode = valueTypecode(values)
+		if typecode == "h":
+			# Glyphs stores kerning as floats, even whole numbers:
+			values = [int(value) for value in values]
+		self.values = array(typecode, values)
+		# keys are sorted, so the combined indexes are sorted too:
+		self.pairIndexes = array("q", (left * len(self.keys) + right for left, right in zip(self.leftIndexes, self.rightIndexes)))
+
+	def __len__(self):
+		return len(self.values)
+
+	def __repr__(self):
+		return "<KerningTable %i pairs, %i keys, %s values>" % (len(self), len(self.keys), "int16" if self.values.typecode == "h" else "float")
+
+	@classmethod
+	def fromDict(cls, kerning):
+		"""From a nested {leftKey: {rightKey: value}} dictionary."""
+		return cls((leftKey, rightKey, value) for leftKey in kerning for rightKey, value in kerning[leftKey].items())
+
+	def toDict(self):
+		kerning = {}
+		for leftKey, rightKey, value in self.pairs():
+			kerning.setdefault(leftKey, {})[rightKey] = value
+		return kerning
+
+	def pair(self, index):
+		return self.keys[self.leftIndexes[index]], self.keys[self.rightIndexes[index]], self.values[index]
+
+	def pairs(self, indexes=None):
+		"""Iterates over (leftKey, rightKey, value), all of them or only at the given indexes."""
+		if indexes is None:
+			indexes = range(len(self))
+		for index in indexes:
+			yield self.pair(index)
+
+	def indexForPair(self, leftKey, rightKey):
+		if leftKey not in self.keyIndexes or rightKey not in self.keyIndexes:
+			return None
+		pairIndex = self.keyIndexes[leftKey] * len(self.keys) + self.keyIndexes[rightKey]
+		index = bisect_left(self.pairIndexes, pairIndex)
+		if index < len(self.pairIndexes) and self.pairIndexes[index] == pairIndex:
+			return index
+		return None
+
+	def value(self, leftKey, rightKey, default=None):
+		index = self.indexForPair(leftKey, rightKey)
+		if index is None:
+			return default
+		return self.values[index]
+
+	def isGroup(self, keyIndex):
+		return self.keys[keyIndex].startswith("@")
+
+	def groupCounts(self):
+		"""Per pair: number of group sides (0 glyph-glyph, 1 glyph-group or group-glyph, 2 group-group)."""
+		isGroupKey = [key.startswith("@") for key in self.keys]
+		return array("b", (isGroupKey[left] + isGroupKey[right] for left, right in zip(self.leftIndexes, self.rightIndexes)))
+
+	def indexesWhere(self, minValue=None, maxValue=None, excludeMin=False, excludeMax=False, groupCounts=None):
+		"""
+		Indexes of all pairs with minValue <= value <= maxValue (or < with excludeMin/excludeMax),
+		optionally only with the given numbers of group sides, e.g. groupCounts=(0, 1).
+		"""
+		if numpy is not None:
+			values = numpy.asarray(self.values)
+			mask = numpy.ones(len(values), dtype=bool)
+			if minValue is not None:
+				mask &= (values > minValue) if excludeMin else (values >= minValue)
+			if maxValue is not None:
+				mask &= (values < maxValue) if excludeMax else (values <= maxValue)
+			if groupCounts is not None:
+				mask &= numpy.isin(numpy.asarray(self.groupCounts()), list(groupCounts))
+			return numpy.flatnonzero(mask).tolist()
+
+		counts = self.groupCounts() if groupCounts is not None else None
+		indexes = []
+		for index, value in enumerate(self.values):
+			if minValue is not None and (value <= minValue if excludeMin else value < minValue):
+				continue
+			if maxValue is not None and (value >= maxValue if excludeMax else value > maxValue):
+				continue
+			if counts is not None and counts[index] not in groupCounts:
+				continue
+			indexes.append(index)
+		return indexes
+
+	def diff(self, other):
+		"""
+		Compares with another table, returns three lists:
+		pairs only in self, pairs only in other (both as (leftKey, rightKey, value)),
+		and (leftKey, rightKey, selfValue, otherValue) for pairs with different values.
+		"""
+		mine = {(leftKey, rightKey): value for leftKey, rightKey, value in self.pairs()}
+		theirs = {(leftKey, rightKey): value for leftKey, rightKey, value in other.pairs()}
+		onlyInSelf = [(key[0], key[1], value) for key, value in mine.items() if key not in theirs]
+		onlyInOther = [(key[0], key[1], value) for key, value in theirs.items() if key not in mine]
+		different = [(key[0], key[1], value, theirs[key]) for key, value in mine.items() if key in theirs and theirs[key] != value]
+		return onlyInSelf, onlyInOther, different
+
+
+class MultiMasterPairs:
+	"""
+	Union of the kern pairs of several masters, built in a single pass over each master's kerning.
+	Every pair gets a presence bitmask (bit i set if masterIDs[i] has the pair) and a row of values (None where missing),
+	so pairs missing in some masters can be found without comparing every master with every other master.
+	"""
+
+	def __init__(self, masterIDs):
+		self.masterIDs = list(masterIDs)
+		self.masterBits = {masterID: 1 << i for i, masterID in enumerate(self.masterIDs)}
+		self.fullMask = (1 << len(self.masterIDs)) - 1
+		self.masks = {}  # (leftKey, rightKey) -> bitmask
+		self.values = {}  # (leftKey, rightKey) -> [value or None per master]
+
+	def __len__(self):
+		return len(self.masks)
+
+	def __repr__(self):
+		return "<MultiMasterPairs %i masters, %i pairs, %i incomplete>" % (len(self.masterIDs), len(self), len(self.incompletePairs()))
+
+	@classmethod
+	def fromKerning(cls, kerning, masterIDs):
+		"""From a {masterID: {leftKey: {rightKey: value}}} mapping like font.kerning. Masters without kerning count as empty."""
+		multiMasterPairs = cls(masterIDs)
+		for masterID in multiMasterPairs.masterIDs:
+			masterKerning = kerning.get(masterID)
+			if masterKerning:
+				multiMasterPairs.addMaster(masterID, masterKerning)
+		return multiMasterPairs
+
+	def addMaster(self, masterID, masterKerning):
+		bit = self.masterBits[masterID]
+		index = self.masterIDs.index(masterID)
+		masks, values = self.masks, self.values
+		emptyRow = [None] * len(self.masterIDs)
+		for leftKey, rightKerning in masterKerning.items():
+			for rightKey, value in rightKerning.items():
+				pair = (leftKey, rightKey)
+				if pair in masks:
+					masks[pair] |= bit
+				else:
+					masks[pair] = bit
+					values[pair] = list(emptyRow)
+				values[pair][index] = value
+
+	def has(self, pair, masterID):
+		return bool(self.masks.get(pair, 0) & self.masterBits[masterID])
+
+	def value(self, pair, masterID, default=None):
+		row = self.values.get(pair)
+		if row is None:
+			return default
+		value = row[self.masterIDs.index(masterID)]
+		return default if value is None else value
+
+	def incompletePairs(self):
+		"""Pairs that are missing in at least one master."""
+		return [pair for pair, mask in self.masks.items() if mask != self.fullMask]
+
+	def missingPairs(self, condition=None):
+		"""
+		{masterID: [pair, ...]} of pairs present in other masters but missing in this one, in one pass over the union.
+		condition(pair, values) can restrict the pairs, e.g. to group-to-group pairs or pairs with nonzero values elsewhere.
+		"""
+		missing = {masterID: [] for masterID in self.masterIDs}
+		bits = [(masterID, self.masterBits[masterID]) for masterID in self.masterIDs]
+		for pair, mask in self.masks.items():
+			if mask == self.fullMask:
+				continue
+			if condition and not condition(pair, self.values[pair]):
+				continue
+			for masterID, bit in bits:
+				if not mask & bit:
+					missing[masterID].append(pair)
+		return missing
+
+	def pairsWithValue(self, masterID, value=0, condition=None):
+		"""Pairs that have exactly the given value in the master, e.g. zero kerns."""
+		index = self.masterIDs.index(masterID)
+		return [pair for pair, row in self.values.items() if row[index] == value and (not condition or condition(pair, row))]
+
+	def interpolationReport(self, masterNames=None):
+		"""
+		Lines of text: per master, the number of pairs missing there, and how many of those are nonzero elsewhere,
+		i.e. pairs that interpolate towards the group or default kerning instead of towards the value of the other masters.
+		"""
+		masterNames = masterNames or {}
+
+		def isNonzero(pair, row):
+			return any(row)
+
+		missing = self.missingPairs()
+		unsafe = self.missingPairs(condition=isNonzero)
+		lines = ["%i pairs in %i masters, %i not present in all masters" % (len(self), len(self.masterIDs), len(self.incompletePairs()))]
+		for masterID in self.masterIDs:
+			lines.append(
+				"%s: %i missing, %i of them nonzero in other masters" % (
+					masterNames.get(masterID, masterID),
+					len(missing[masterID]),
+					len(unsafe[masterID]),
+				)
+			)
+		return lines
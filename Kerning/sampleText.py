@@ -2,6 +2,10 @@
 from __future__ import print_function
 from GlyphsApp import Glyphs
 from AppKit import NSNotFound, NSClassFromString
+import re
+
+PACKED_PAIRS_PER_LINE = 8
+GLYPH_TOKEN = re.compile(r"/[^/\s]+ ?|[^\n]")
 
 
 def chooseSampleTextSelection(categoryIndex=0, entryIndex=0):
@@ -107,66 +111,167 @@ def addToSampleText(kernStrings, marker="### CUSTOM KERN STRING ###"):
 			return True
 
 
-def buildKernStrings(listOfLeftGlyphNames, listOfRightGlyphNames, thisFont=None, linePrefix="nonn", linePostfix="noon", mirrorPair=False):
+def kernPairsForGlyphNames(listOfLeftGlyphNames, listOfRightGlyphNames, thisFont):
+	"""Returns a list of (leftName, rightName) tuples, one representative pair for each group combination."""
+	kernPairs = []
+
+	# collect left names/groups:
+	leftGroups = []
+	for leftName in listOfLeftGlyphNames:
+
+		# Hardcoded changes to prevent Æ/æ from appearing instead of E/e:
+		hardcodedPairs = (
+			("ae", "e"),
+			("ae.sc", "e.sc"),
+			("AE", "E"),
+			(leftName, thisFont.glyphs[leftName].rightKerningGroup),
+		)
+		for hardcodedLeftName, hardcodedLeftTargetName in hardcodedPairs:
+			if hardcodedLeftName and hardcodedLeftTargetName:
+				leftGlyph = thisFont.glyphs[hardcodedLeftName]
+				leftTargetGlyph = thisFont.glyphs[hardcodedLeftTargetName]
+				if leftGlyph and leftTargetGlyph and leftName == hardcodedLeftName and leftGlyph.rightKerningGroup == leftTargetGlyph.rightKerningGroup:
+					leftName = hardcodedLeftTargetName
+
+		leftGroup = thisFont.glyphs[leftName].rightKerningGroup
+		if (leftGroup is not None) and (leftGroup not in leftGroups):
+			leftGroups.append(leftGroup)
+
+			# collect right names/groups:
+			rightGroups = []
+			for rightName in listOfRightGlyphNames:
+
+				# Hardcoded changes:
+				hardcodedPairs = (
+					("idotless", "n"),
+					("idotless", "i"),
+					("jdotless", "j"),
+					("C", "O"),
+					("c", "o"),
+					("c.sc", "o.sc"),
+					(rightName, thisFont.glyphs[rightName].leftKerningGroup),
+				)
+				for hardcodedRightName, hardcodedRightTargetName in hardcodedPairs:
+					if hardcodedRightName and hardcodedRightTargetName:
+						rightGlyph = thisFont.glyphs[hardcodedRightName]
+						rightTargetGlyph = thisFont.glyphs[hardcodedRightTargetName]
+						if rightGlyph and rightTargetGlyph and rightName == hardcodedRightName and rightGlyph.leftKerningGroup == rightTargetGlyph.leftKerningGroup:
+							rightName = hardcodedRightTargetName
+
+				rightGroup = thisFont.glyphs[rightName].leftKerningGroup
+				if (rightGroup is not None) and (rightGroup not in rightGroups):
+					rightGroups.append(rightGroup)
+					kernPairs.append((leftName, rightName))
+	return kernPairs
+
+
+def buildKernStrings(listOfLeftGlyphNames, listOfRightGlyphNames, thisFont=None, linePrefix="nonn", linePostfix="noon", mirrorPair=False, packPairs=False, maxPairsPerLine=PACKED_PAIRS_PER_LINE):
 	"""Takes a list of glyph names and returns a list of kernstrings"""
 	if thisFont is None:
 		print("No font detected.")
 		return None
 	else:
-		kernStrings = []
-
-		# collect left names/groups:
-		leftGroups = []
-		for leftName in listOfLeftGlyphNames:
-
-			# Hardcoded changes to prevent Æ/æ from appearing instead of E/e:
-			hardcodedPairs = (
-				("ae", "e"),
-				("ae.sc", "e.sc"),
-				("AE", "E"),
-				(leftName, thisFont.glyphs[leftName].rightKerningGroup),
-			)
-			for hardcodedLeftName, hardcodedLeftTargetName in hardcodedPairs:
-				if hardcodedLeftName and hardcodedLeftTargetName:
-					leftGlyph = thisFont.glyphs[hardcodedLeftName]
-					leftTargetGlyph = thisFont.glyphs[hardcodedLeftTargetName]
-					if leftGlyph and leftTargetGlyph and leftName == hardcodedLeftName and leftGlyph.rightKerningGroup == leftTargetGlyph.rightKerningGroup:
-						leftName = hardcodedLeftTargetName
-
-			leftGroup = thisFont.glyphs[leftName].rightKerningGroup
-			if (leftGroup is not None) and (leftGroup not in leftGroups):
-				leftGroups.append(leftGroup)
-
-				# collect right names/groups:
-				rightGroups = []
-				for rightName in listOfRightGlyphNames:
-
-					# Hardcoded changes:
-					hardcodedPairs = (
-						("idotless", "n"),
-						("idotless", "i"),
-						("jdotless", "j"),
-						("C", "O"),
-						("c", "o"),
-						("c.sc", "o.sc"),
-						(rightName, thisFont.glyphs[rightName].leftKerningGroup),
-					)
-					for hardcodedRightName, hardcodedRightTargetName in hardcodedPairs:
-						if hardcodedRightName and hardcodedRightTargetName:
-							rightGlyph = thisFont.glyphs[hardcodedRightName]
-							rightTargetGlyph = thisFont.glyphs[hardcodedRightTargetName]
-							if rightGlyph and rightTargetGlyph and rightName == hardcodedRightName and rightGlyph.leftKerningGroup == rightTargetGlyph.leftKerningGroup:
-								rightName = hardcodedRightTargetName
-
-					rightGroup = thisFont.glyphs[rightName].leftKerningGroup
-					if (rightGroup is not None) and (rightGroup not in rightGroups):
-						rightGroups.append(rightGroup)
-						if not mirrorPair:
-							kernString = "%s/%s/%s %s" % (linePrefix, leftName, rightName, linePostfix)
-						else:
-							kernString = "%s/%s/%s/%s %s" % (linePrefix, leftName, rightName, leftName, linePostfix)
-						kernStrings += [kernString]
-		return kernStrings
+		kernPairs = kernPairsForGlyphNames(listOfLeftGlyphNames, listOfRightGlyphNames, thisFont)
+		if packPairs and not mirrorPair:
+			return packedKernStrings(kernPairs, linePrefix, linePostfix, maxPairsPerLine)
+		return unpackedKernStrings(kernPairs, linePrefix, linePostfix, mirrorPair)
+
+
+def unpackedKernStrings(kernPairs, linePrefix="nonn", linePostfix="noon", mirrorPair=False):
+	"""One kern string per pair."""
+	kernStrings = []
+	for leftName, rightName in kernPairs:
+		if not mirrorPair:
+			kernString = "%s/%s/%s %s" % (linePrefix, leftName, rightName, linePostfix)
+		else:
+			kernString = "%s/%s/%s/%s %s" % (linePrefix, leftName, rightName, leftName, linePostfix)
+		kernStrings.append(kernString)
+	return kernStrings
+
+
+def pairWalks(kernPairs):
+	"""
+	Covers every (leftName, rightName) pair with as few glyph sequences (walks) as possible,
+	every pair appears exactly once as neighbours in a walk: A-V, V-A, A-T becomes A V A T.
+	Pairs are the edges of a directed graph, for every connected part of the graph, the number of
+	walks is the number of glyphs that are more often on the left than on the right side (at least one).
+	Hierholzer's algorithm on the graph, with a virtual start node linked to all those glyphs.
+	"""
+	start = None  # virtual node, cannot be a glyph name
+	successors = {start: []}
+	balance = {}
+	for leftName, rightName in dict.fromkeys(kernPairs):  # unique pairs, order kept
+		successors.setdefault(leftName, []).append(rightName)
+		successors.setdefault(rightName, [])
+		balance[leftName] = balance.get(leftName, 0) + 1
+		balance[rightName] = balance.get(rightName, 0) - 1
+
+	# balance the graph by linking glyphs with more outgoing pairs from the start, and ones with more incoming pairs back to it:
+	for glyphName, difference in balance.items():
+		if difference > 0:
+			successors[start].extend([glyphName] * difference)
+		elif difference < 0:
+			successors[glyphName].extend([start] * -difference)
+
+	nextEdge = dict.fromkeys(successors, 0)
+
+	def circuitFrom(node):
+		stack, circuit = [node], []
+		while stack:
+			node = stack[-1]
+			if nextEdge[node] < len(successors[node]):
+				stack.append(successors[node][nextEdge[node]])
+				nextEdge[node] += 1
+			else:
+				circuit.append(stack.pop())
+		circuit.reverse()
+		return circuit
+
+	walks = []
+	# open walks, cut the circuit through the virtual start node:
+	walk = []
+	for node in circuitFrom(start):
+		if node is start:
+			if len(walk) > 1:
+				walks.append(walk)
+			walk = []
+		else:
+			walk.append(node)
+
+	# balanced parts of the graph are closed circuits:
+	for glyphName in successors:
+		if glyphName is not start and nextEdge[glyphName] < len(successors[glyphName]):
+			walks.append(circuitFrom(glyphName))
+	return walks
+
+
+def packedKernStrings(kernPairs, linePrefix="nonn", linePostfix="noon", maxPairsPerLine=PACKED_PAIRS_PER_LINE):
+	"""Packs all pairs into the fewest kern strings, long walks are split into lines of at most maxPairsPerLine pairs."""
+	maxPairsPerLine = max(1, maxPairsPerLine)
+	kernStrings = []
+	for walk in pairWalks(kernPairs):
+		# consecutive lines overlap by one glyph, so no pair is lost at the line break:
+		for i in range(0, len(walk) - 1, maxPairsPerLine):
+			lineGlyphs = walk[i:i + maxPairsPerLine + 1]
+			kernStrings.append("%s/%s %s" % (linePrefix, "/".join(lineGlyphs), linePostfix))
+	return kernStrings
+
+
+def glyphCount(kernString):
+	"""Number of glyphs the Edit view has to lay out for a kern string: /name counts as one glyph, as does every other character."""
+	return len(GLYPH_TOKEN.findall(kernString))
+
+
+def compressionReport(unpackedStrings, packedStrings):
+	unpackedCount = sum(glyphCount(s) for s in unpackedStrings)
+	packedCount = sum(glyphCount(s) for s in packedStrings)
+	return "Packed %i lines (%i glyphs) into %i lines (%i glyphs), compression ratio %.1f:1." % (
+		len(unpackedStrings),
+		unpackedCount,
+		len(packedStrings),
+		packedCount,
+		unpackedCount / max(packedCount, 1),
+	)
 
 
 def executeAndReport(kernStrings, marker="Sample String Maker"):
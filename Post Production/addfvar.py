@@ -4,6 +4,7 @@ import argparse, sys, os, glob
 from fontTools.ttLib import TTFont
 from fontTools.ttLib.tables._f_v_a_r import table__f_v_a_r, Axis, NamedInstance
 from fontTools.ttLib.tables._n_a_m_e import table__n_a_m_e
+from batch import addJobsArgument, processFonts, printResult, summary
 
 # Predefined axis names according to OpenType spec
 PREDEFINED_AXIS_NAMES = {
@@ -174,6 +175,7 @@ def main():
 			'ital=*   → auto-detect italic bit in OS/2.fsSelection\n'
 			'slnt=*   → auto-detect from post.italicAngle\n',
 		default=['wdth=*', 'wght=*', 'ital=*'])
+	addJobsArgument(parser)
 	
 	args = parser.parse_args()
 	
@@ -190,23 +192,33 @@ def main():
 		print(f"❌ No font files found matching the given pattern(s): {args.font}.")
 		sys.exit(1)
 
-	for fontPath in fontPaths:
-		outputPath = fontPath
-		if len(fontPaths) == 1 and args.output:
-			outputPath = args.output
-		try:
-			builder = FvarBuilder(
-				fontPath=fontPath,
-				outputPath=outputPath,
-				styleName=args.style,
-				axisValues=axisDict
-			)
-			builder.run()
-		except Exception as e:
-			print(f"❌ Error processing {fontPath}: {str(e)}")
-			import traceback
-			print(traceback.format_exc())
-			sys.exit(1)
+	outputPath = None
+	if len(fontPaths) == 1 and args.output:
+		outputPath = args.output
+
+	results = []
+	for i, result in enumerate(processFonts(buildFvar, fontPaths, jobs=args.jobs, arguments=(outputPath, args.style, axisDict))):
+		printResult(result, i)
+		results.append(result)
+	print(summary(results))
+	if any(result.status == "error" for result in results):
+		sys.exit(1)
+
+def buildFvar(fontPath, outputPath, styleName, axisDict):
+	"""Worker for batch.processFonts(): adds fvar to one font file, saved to outputPath (default: overwrite)."""
+	try:
+		builder = FvarBuilder(
+			fontPath=fontPath,
+			outputPath=outputPath or fontPath,
+			styleName=styleName,
+			axisValues=axisDict
+		)
+		builder.run()
+		return "changed", f"Saved {outputPath or fontPath}"
+	except Exception as e:
+		import traceback
+		print(traceback.format_exc())
+		return "error", f"Error processing {fontPath}: {str(e)}"
 
 if __name__ == '__main__':
 	main()
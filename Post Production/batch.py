@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Runs a per-font function over many font files, optionally in a pool of worker processes (--jobs N).
+Every worker handles one font end to end. Its printed output is captured and handed back to the parent
+together with a structured result, and the parent reports everything in the original order of the files,
+so the output is the same for any number of jobs.
+"""
+
+from collections import namedtuple
+from contextlib import redirect_stdout
+from functools import partial
+from io import StringIO
+from multiprocessing import Pool
+from timeit import default_timer as timer
+import os
+
+# recycle worker processes after this many fonts, keeps the memory of long runs bounded:
+MAX_FONTS_PER_WORKER = 20
+
+STATUS_SYMBOLS = {
+	"changed": "💾",
+	"unchanged": "🤷🏻‍♀️",
+	"error": "❌",
+	"skipped": "⏭️",
+}
+
+# status: "changed", "unchanged", "error" or "skipped"; log: everything printed while processing; extra: optional data returned by the function
+FontResult = namedtuple("FontResult", "path status message log seconds extra")
+
+
+def addJobsArgument(parser):
+	parser.add_argument(
+		"-j",
+		"--jobs",
+		type=int,
+		default=1,
+		help="Number of fonts processed in parallel, in separate processes (default: 1, 0 = one per CPU core).",
+	)
+
+
+def jobCount(jobs, fontCount):
+	if not jobs or jobs < 1:
+		jobs = os.cpu_count() or 1
+	return max(1, min(jobs, fontCount))
+
+
+def runFontJob(function, path, arguments=()):
+	"""
+	Calls function(path, *arguments), which returns (status, message) or (status, message, extra),
+	and turns its outcome, exceptions included, into a FontResult.
+	"""
+	log = StringIO()
+	start = timer()
+	extra = None
+	with redirect_stdout(log):
+		try:
+			outcome = function(path, *arguments)
+			status, message = outcome[:2]
+			if len(outcome) > 2:
+				extra = outcome[2]
+		except Exception as e:
+			status, message = "error", f"{type(e).__name__} {e}"
+	return FontResult(path, status, message, log.getvalue(), timer() - start, extra)
+
+
+def processFonts(function, paths, jobs=1, arguments=()):
+	"""
+	Yields a FontResult for every path, in the order of paths.
+	function must be defined at module level (so worker processes can import it), as must everything in arguments.
+	"""
+	paths = list(paths)
+	job = partial(runFontJob, function, arguments=tuple(arguments))
+	jobs = jobCount(jobs, len(paths))
+	if jobs == 1:
+		for path in paths:
+			yield job(path)
+	else:
+		with Pool(processes=jobs, maxtasksperchild=MAX_FONTS_PER_WORKER) as pool:
+			# imap keeps the order and hands out one font at a time:
+			for result in pool.imap(job, paths, chunksize=1):
+				yield result
+
+
+def printResult(result, index=None):
+	number = f"{index + 1}. " if index is not None else ""
+	print(f"\n📄 {number}{result.path}")
+	if result.log:
+		print(result.log, end="" if result.log.endswith("\n") else "\n")
+	print(f"{STATUS_SYMBOLS.get(result.status, '')} {result.message}")
+
+
+def summary(results):
+	counts = {status: 0 for status in STATUS_SYMBOLS}
+	for result in results:
+		counts[result.status] = counts.get(result.status, 0) + 1
+	return f"Changed {counts['changed']}, unchanged {counts['unchanged']}, errors {counts['error']} of {len(results)} fonts."
@@ -4,8 +4,12 @@ python3 fixgdef.py -h     ... help
 python3 fixgdef.py *.ttf  ... apply to all TTFs in current dir
 """
 
-from fontTools import ttLib
 from argparse import ArgumentParser
+from fontloader import openFont, saveFont
+
+# tables fixGDEFinFont() reads and writes:
+TABLES_READ = ("GDEF",)
+TABLES_WRITTEN = ("GDEF",)
 
 
 parser = ArgumentParser(description="Fix GDEF definition of spacing, non-combining marks. Will switch to class 1 (‘base glyph’, single character, spacing glyph) if necessary.")
@@ -27,26 +31,26 @@ def fixGDEFinFont(font):
 		return madeChanges
 
 	gdef = font["GDEF"].table
+	legacyMarks = (
+		"dieresis",
+		"dotaccent",
+		"grave",
+		"acute",
+		"hungarumlaut",
+		"circumflex",
+		"caron",
+		"breve",
+		"ring",
+		"tilde",
+		"macron",
+		"cedilla",
+		"ogonek",
+		"uni02BB"
+	)
 	if not hasattr(gdef, "MarkGlyphSetsDef") or not gdef.MarkGlyphSetsDef:
 		print("⚠️ No MarkGlyphSetsDef found in GDEF table.")
 	else:
 		print("Scanning MarkGlyphSetsDef...")
-		legacyMarks = (
-			"dieresis",
-			"dotaccent",
-			"grave",
-			"acute",
-			"hungarumlaut",
-			"circumflex",
-			"caron",
-			"breve",
-			"ring",
-			"tilde",
-			"macron",
-			"cedilla",
-			"ogonek",
-			"uni02BB"
-		)
 		for coverage in gdef.MarkGlyphSetsDef.Coverage:
 			for i in range(len(coverage.glyphs) - 1, -1, -1):
 				glyph = coverage.glyphs[i]
@@ -74,16 +78,21 @@ def fixGDEFinFont(font):
 	return madeChanges
 
 
-arguments = parser.parse_args()
-fonts = arguments.fonts
-for fontpath in fonts:
-	print(f"\n📄 {fontpath}")
-	font = ttLib.TTFont(fontpath)
-	changesMade = fixGDEFinFont(font)
-	if changesMade:
-		font.save(fontpath, reorderTables=False)
-		print(f"💾 Saved {fontpath}\n")
-	else:
-		print("🤷🏻‍♀️ No changes made. File left unchanged.")
+def main():
+	arguments = parser.parse_args()
+	fonts = arguments.fonts
+	for fontpath in fonts:
+		print(f"\n📄 {fontpath}")
+		with openFont(fontpath) as font:
+			changesMade = fixGDEFinFont(font)
+			if changesMade:
+				saveFont(font, fontpath, TABLES_WRITTEN)
+				print(f"💾 Saved {fontpath}\n")
+			else:
+				print("🤷🏻‍♀️ No changes made. File left unchanged.")
+
+	print("✅ Done.")
+
 
-print("✅ Done.")
+if __name__ == "__main__":
+	main()
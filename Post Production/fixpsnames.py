@@ -4,8 +4,14 @@ python3 fixpsname.py -h     ... help
 python3 fixpsname.py *.ttf  ... apply to all TTFs in current dir
 """
 
-from fontTools import ttLib
 from argparse import ArgumentParser
+from batch import addJobsArgument, processFonts, printResult, summary
+from fontloader import openFont, saveFont
+
+# tables fixPSnames() reads and writes:
+TABLES_READ = ("name",)
+TABLES_WRITTEN = ("name",)
+
 parser = ArgumentParser(description="Fix Italic PS Names in fvar when they have a double ‘Italic’ signifier. Will rework the corresponding name table entries.")
 
 parser.add_argument(
@@ -14,6 +20,7 @@ parser.add_argument(
 	metavar="font",
 	help="Any number of OTF or TTF files.",
 )
+addJobsArgument(parser)
 
 
 def fixPSnames(otFont):
@@ -45,18 +52,25 @@ def fixPSnames(otFont):
 	return anythingChanged
 
 
-arguments = parser.parse_args()
-fonts = arguments.fonts
-changed = 0
-for i, fontpath in enumerate(fonts):
-	print(f"\n📄 {i + 1}. {fontpath}")
-	font = ttLib.TTFont(fontpath)
-	changesMade = fixPSnames(font)
-	if changesMade:
-		changed += 1
-		font.save(fontpath, reorderTables=False)
-		print(f"💾 Saved {fontpath}")
-	else:
-		print("🤷🏻‍♀️ No changes made. File left unchanged.")
-
-print(f"\n✅ Done. Changed {changed} of {i + 1} fonts.\n")
+def fixFontFile(fontpath):
+	"""Opens, fixes and saves one font file, returns status and message for batch.processFonts()."""
+	with openFont(fontpath) as font:
+		changesMade = fixPSnames(font)
+		if changesMade:
+			saveFont(font, fontpath, TABLES_WRITTEN)
+			return "changed", f"Saved {fontpath}"
+	return "unchanged", "No changes made. File left unchanged."
+
+
+def main():
+	arguments = parser.parse_args()
+	results = []
+	for i, result in enumerate(processFonts(fixFontFile, arguments.fonts, jobs=arguments.jobs)):
+		printResult(result, i)
+		results.append(result)
+
+	print(f"\n✅ Done. {summary(results)}\n")
+
+
+if __name__ == "__main__":
+	main()
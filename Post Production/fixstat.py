@@ -4,8 +4,14 @@ python3 fixstat.py -h     ... help
 python3 fixstat.py *.ttf  ... apply to all TTFs in current dir
 """
 
-from fontTools import ttLib
 from argparse import ArgumentParser
+from batch import addJobsArgument, processFonts, printResult, summary
+from fontloader import openFont, saveFont
+
+# tables fixstat() reads and writes:
+TABLES_READ = ("name", "STAT")
+TABLES_WRITTEN = ("name", "STAT")
+
 parser = ArgumentParser(
 	description="For every axis, renames normal STAT entries to ‘Regular’ (also makes changes in name table if necessary), and makes them elidable (Flags=2). Typically only necessary in italic OTVAR exports with 2 or more axes. Also, fixes Format1/3 duplicates (if a Format 3 exists, there must be no equivalent Format 1 entry)."
 )
@@ -16,6 +22,7 @@ parser.add_argument(
 	metavar="font",
 	help="Any number of OTF or TTF files.",
 )
+addJobsArgument(parser)
 
 
 def fixDuplicatesFormat1and3(axes, statTable, changesMade=False):
@@ -116,18 +123,25 @@ def fixstat(font):
 	return changesMade
 
 
-arguments = parser.parse_args()
-fonts = arguments.fonts
-changed = 0
-for i, fontpath in enumerate(fonts):
-	print(f"\n📄 {i+1}. Fixing STAT: {fontpath}")
-	font = ttLib.TTFont(fontpath)
-	changesMade = fixstat(font)
-	if changesMade:
-		changed += 1
-		font.save(fontpath, reorderTables=False)
-		print(f"💾 Saved {fontpath}")
-	else:
-		print("🤷🏻‍♀️ No changes made. File left unchanged.")
+def fixFontFile(fontpath):
+	"""Opens, fixes and saves one font file, returns status and message for batch.processFonts()."""
+	with openFont(fontpath) as font:
+		changesMade = fixstat(font)
+		if changesMade:
+			saveFont(font, fontpath, TABLES_WRITTEN)
+			return "changed", f"Saved {fontpath}"
+	return "unchanged", "No changes made. File left unchanged."
+
+
+def main():
+	arguments = parser.parse_args()
+	results = []
+	for i, result in enumerate(processFonts(fixFontFile, arguments.fonts, jobs=arguments.jobs)):
+		printResult(result, i)
+		results.append(result)
+
+	print(f"\n✅ Done. {summary(results)}\n")
+
 
-print(f"\n✅ Done. Changed {changed} of {i + 1} fonts.\n")
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+Lazy, table-selective font loading for the post-production scripts.
+
+Fonts are opened with lazy=True, so a table is only decompiled when a fixer accesses it.
+Every fixer declares the tables it reads and the tables it writes. Before saving, all loaded
+tables that no fixer wrote are unloaded again, so fontTools copies their binary data verbatim,
+just like the tables that were never touched. Only the written tables are recompiled:
+a name fix in a big CJK or variable font does not decompile and recompile glyf, CFF or gvar.
+"""
+
+from io import BytesIO
+from fontTools import ttLib
+
+# pseudo-table kept by fontTools, never in the font file:
+PSEUDO_TABLES = ("GlyphOrder",)
+
+
+def openFont(fontpath, **kwargs):
+	"""Opens a font lazily: tables (and their subtables) are decompiled on first access only."""
+	return ttLib.TTFont(fontpath, lazy=True, **kwargs)
+
+
+def loadedTables(font):
+	"""Tags of the tables that were decompiled (or added) since the font was opened."""
+	return [tag for tag in font.tables.keys() if tag not in PSEUDO_TABLES]
+
+
+def unloadTables(font, tags):
+	"""Drops the decompiled version of tables that exist in the font file, so they are saved from their original binary data."""
+	for tag in tags:
+		if font.reader is not None and tag in font.reader and tag in font.tables:
+			del font.tables[tag]
+
+
+def saveFont(font, outputPath, writtenTables):
+	"""
+	Saves the font, recompiling only writtenTables (and head for checksum and timestamp),
+	all other tables are copied from the original file. Closes the font.
+	Changes in tables that are not in writtenTables are lost, so declare every table a fixer may change.
+	"""
+	unloadTables(font, [tag for tag in loadedTables(font) if tag not in writtenTables])
+	# a lazily loaded font still reads from its file, so compile into memory first, then overwrite:
+	fontData = BytesIO()
+	font.save(fontData, reorderTables=False)
+	font.close()
+	with open(outputPath, "wb") as fontFile:
+		fontFile.write(fontData.getvalue())
+
+
+def tablesDescription(reads, writes):
+	"""reads name, STAT; writes STAT"""
+	parts = []
+	if reads:
+		parts.append("reads " + ", ".join(reads))
+	if writes:
+		parts.append("writes " + ", ".join(writes))
+	return "; ".join(parts)
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+Skip cache for post-production runs: a small JSON sidecar in the export folder remembers,
+for every (file hash, fixers, fixer options), the hash of the font that came out.
+A font that still has that output hash was processed already and not re-exported since, so it can be skipped.
+"""
+
+from collections import OrderedDict
+from datetime import datetime
+import hashlib
+import json
+import os
+
+MANIFEST_FILE_NAME = ".postproduction-manifest.json"
+MANIFEST_VERSION = 1
+
+
+def fileHash(path, blockSize=1 << 20):
+	"""SHA-256 of a file's content, read in blocks."""
+	digest = hashlib.sha256()
+	with open(path, "rb") as fontFile:
+		for block in iter(lambda: fontFile.read(blockSize), b""):
+			digest.update(block)
+	return digest.hexdigest()
+
+
+def configurationKey(fixerNames, options):
+	"""Short, stable key for the fixers (in order) and the options they run with."""
+	code = json.dumps({"fixers": list(fixerNames), "options": options}, sort_keys=True, default=str)
+	return hashlib.sha256(code.encode("utf-8")).hexdigest()[:16]
+
+
+class Manifest:
+	"""
+	The manifest of one folder: {fileName|inputHash|configurationKey: {"output": outputHash, "file": fileName, "fixers": [...], "date": ...}}.
+	The file name is part of the key because several exports can have identical content.
+	Only the most recent entry per file name and configuration is kept.
+	"""
+
+	def __init__(self, folder):
+		self.path = os.path.join(folder or ".", MANIFEST_FILE_NAME)
+		self.entries = OrderedDict()
+		self.changed = False
+		self.load()
+
+	def __repr__(self):
+		return "<Manifest %s: %i entries>" % (self.path, len(self.entries))
+
+	def load(self):
+		if not os.path.exists(self.path):
+			return
+		try:
+			with open(self.path, encoding="utf-8") as manifestFile:
+				content = json.load(manifestFile)
+			if content.get("version") == MANIFEST_VERSION:
+				self.entries = OrderedDict(content.get("entries", {}))
+		except (ValueError, OSError) as e:
+			print(f"⚠️ Ignoring unreadable manifest {self.path}: {e}")
+
+	def save(self):
+		if not self.changed:
+			return
+		with open(self.path, "w", encoding="utf-8") as manifestFile:
+			json.dump({"version": MANIFEST_VERSION, "entries": self.entries}, manifestFile, indent=1)
+		self.changed = False
+
+	@staticmethod
+	def key(fileName, inputHash, configKey):
+		return f"{fileName}|{inputHash}|{configKey}"
+
+	def isUpToDate(self, currentHash, configKey, outputPath, inputPath=None):
+		"""
+		True if the font was processed with this configuration and not re-exported since:
+		in place, the current file is a recorded output; otherwise, the input is a recorded input
+		and the output file still has the recorded output hash.
+		"""
+		if inputPath is None or os.path.abspath(inputPath) == os.path.abspath(outputPath):
+			fileName = os.path.basename(outputPath)
+			return any(
+				entry["output"] == currentHash and entry["file"] == fileName and key.endswith("|" + configKey)
+				for key, entry in self.entries.items()
+			)
+		entry = self.entries.get(self.key(os.path.basename(outputPath), currentHash, configKey))
+		return bool(entry) and os.path.exists(outputPath) and fileHash(outputPath) == entry["output"]
+
+	def record(self, inputHash, configKey, outputPath, fixerNames):
+		fileName = os.path.basename(outputPath)
+		# forget older runs of the same file with the same configuration:
+		for key in [key for key, entry in self.entries.items() if entry["file"] == fileName and key.endswith("|" + configKey)]:
+			del self.entries[key]
+		self.entries[self.key(fileName, inputHash, configKey)] = {
+			"output": fileHash(outputPath),
+			"file": fileName,
+			"fixers": list(fixerNames),
+			"date": datetime.now().isoformat(timespec="seconds"),
+		}
+		self.changed = True
+
+
+class Manifests:
+	"""One Manifest per output folder, loaded when first needed."""
+
+	def __init__(self):
+		self.manifests = {}
+
+	def forPath(self, outputPath):
+		folder = os.path.dirname(os.path.abspath(outputPath))
+		if folder not in self.manifests:
+			self.manifests[folder] = Manifest(folder)
+		return self.manifests[folder]
+
+	def save(self):
+		for manifest in self.manifests.values():
+			manifest.save()
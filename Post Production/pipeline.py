@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+"""
+python3 pipeline.py -h                                 ... help
+python3 pipeline.py -x fixgdef,fixstat,setbit3 *.ttf   ... run these fixers in this order on all TTFs in current dir
+
+Opens every font only once (lazily, tables are decompiled when a fixer touches them),
+runs the chosen fixers one after the other on the same font in memory,
+and saves only if at least one of them changed something. On save, only the tables
+the fixers write are recompiled, all others are copied verbatim (see fontloader.py).
+"""
+
+from collections import OrderedDict
+import os
+import shutil
+from timeit import default_timer as timer
+from argparse import ArgumentParser
+
+import fixgdef
+import fixpsnames
+import fixstat
+import winfix
+import writeSTATaxisValues
+from setBit3 import set_head_flags
+from fontloader import openFont, saveFont, tablesDescription
+from batch import FontResult, addJobsArgument, processFonts, printResult, summary
+from manifest import MANIFEST_FILE_NAME, Manifests, configurationKey, fileHash
+
+
+class Fixer:
+	"""
+	A named fix for an open TTFont. The function takes the font and the parsed arguments, and returns True if it changed the font.
+	reads and writes are the tags of the tables it accesses and changes, only written tables are recompiled on save.
+	options are the names of the parsed arguments it uses, they are part of its manifest configuration.
+	"""
+
+	def __init__(self, name, function, description, reads=(), writes=(), options=()):
+		self.name = name
+		self.function = function
+		self.description = description
+		self.reads = tuple(reads)
+		self.writes = tuple(writes)
+		self.options = tuple(options)
+
+	def __repr__(self):
+		return "<Fixer %s>" % self.name
+
+	def run(self, font, arguments):
+		return bool(self.function(font, arguments))
+
+
+def axesFromArgument(axesString):
+	"""wdth,wght=400,ital → {"wdth": None, "wght": "400", "ital": None}, like winfix.py."""
+	axes = OrderedDict()
+	for item in axesString.split(","):
+		if "=" in item:
+			tag, value = item.split("=", 1)
+			axes[tag.strip()] = value
+		else:
+			axes[item.strip()] = None
+	return axes
+
+
+def customAxisNamesFromArgument(nameArguments):
+	customNames = {}
+	for item in nameArguments or ():
+		if "=" in item:
+			tag, name = item.split("=", 1)
+			customNames[tag.strip()] = name.strip('"')
+	return customNames
+
+
+def runWinfix(font, arguments):
+	return winfix.addFvarAndStatToFont(
+		font,
+		axes=axesFromArgument(arguments.axes),
+		customNames=customAxisNamesFromArgument(arguments.name),
+		force=arguments.overwriteTables,
+	)
+
+
+def runWriteSTAT(font, arguments):
+	if not arguments.axisValueString:
+		raise ValueError("writestat needs axis values (-a/--axisvalue)")
+	return writeSTATaxisValues.parameterToSTAT(arguments.axisValueString, font)
+
+
+# registered fixers, in their recommended order:
+FIXERS = OrderedDict((fixer.name, fixer) for fixer in (
+	Fixer("winfix", runWinfix, "Add fvar and STAT to static fonts (winfix.py)", winfix.TABLES_READ, winfix.TABLES_WRITTEN, ("axes", "name", "overwriteTables")),
+	Fixer("writestat", runWriteSTAT, "Rewrite STAT axis values from -a/--axisvalue (writeSTATaxisValues.py)", writeSTATaxisValues.TABLES_READ, writeSTATaxisValues.TABLES_WRITTEN, ("axisValueString",)),
+	Fixer("fixstat", lambda font, arguments: fixstat.fixstat(font), "Elidable ‘Regular’ STAT entries, Format 1/3 duplicates (fixstat.py)", fixstat.TABLES_READ, fixstat.TABLES_WRITTEN),
+	Fixer("fixpsnames", lambda font, arguments: fixpsnames.fixPSnames(font), "Double ‘Italic’ in PS names (fixpsnames.py)", fixpsnames.TABLES_READ, fixpsnames.TABLES_WRITTEN),
+	Fixer("fixgdef", lambda font, arguments: fixgdef.fixGDEFinFont(font), "GDEF classes of legacy marks (fixgdef.py)", fixgdef.TABLES_READ, fixgdef.TABLES_WRITTEN),
+	Fixer("setbit3", lambda font, arguments: set_head_flags(font, arguments.bit3, arguments.bit13), "head.flags bits 3 and 13 (setBit3.py)", ("head",), ("head",), ("bit3", "bit13")),
+))
+
+
+parser = ArgumentParser(
+	description="Runs several post-production fixers on each font in one go: every font is opened once, fixed in memory, and saved once if anything changed. Available fixers: " + "; ".join("%s: %s [%s]" % (name, fixer.description, tablesDescription(fixer.reads, fixer.writes)) for name, fixer in FIXERS.items())
+)
+
+parser.add_argument(
+	"fonts",
+	nargs="+",  # one or more font names, e.g. *.otf
+	metavar="font",
+	help="Any number of OTF or TTF files.",
+)
+
+parser.add_argument(
+	"-x",
+	"--fixers",
+	required=True,
+	help="Comma-separated fixers, run in the given order, e.g. fixgdef,fixstat,setbit3. Available: %s" % ",".join(FIXERS.keys()),
+)
+
+parser.add_argument(
+	"-o",
+	"--output",
+	help="Output directory (default: overwrite input files).",
+)
+
+parser.add_argument(
+	"-a",
+	"--axisvalue",
+	dest="axisValueString",
+	help="writestat: axis values, same format as in writeSTATaxisValues.py, e.g. wdth;75.0=Condensed,100.0=Regular*|ital;0.0>1.0=Regular*",
+)
+
+parser.add_argument("--axes", default="wdth,wght,ital", help="winfix: comma-separated axis tags (default: wdth,wght,ital)")
+parser.add_argument("-n", "--name", action="append", help='winfix: custom axis name (e.g., -n SERF="Serif Shape")')
+parser.add_argument("--overwrite-tables", dest="overwriteTables", action="store_true", help="winfix: overwrite existing fvar/STAT tables")
+parser.add_argument("-b", "--bit3", type=int, choices=[0, 1], default=1, help="setbit3: bit 3 ‘integer scaling’ value (default=1)")
+parser.add_argument("-c", "--bit13", type=int, choices=[0, 1], default=1, help="setbit3: bit 13 ‘ClearType’ value (default=1)")
+addJobsArgument(parser)
+
+parser.add_argument(
+	"-f",
+	"--force",
+	action="store_true",
+	help=f"Process all fonts, even if the manifest ({MANIFEST_FILE_NAME} in the output folder) says they were processed with the same fixers and options already.",
+)
+
+
+def fixersFromArgument(fixerString):
+	fixers = []
+	for name in fixerString.split(","):
+		name = name.strip().lower()
+		if not name:
+			continue
+		if name not in FIXERS:
+			raise ValueError(f"Unknown fixer ‘{name}’. Available: {', '.join(FIXERS.keys())}")
+		fixers.append(FIXERS[name])
+	return fixers
+
+
+def outputPathForFont(fontpath, outputFolder=None):
+	if not outputFolder:
+		return fontpath
+	os.makedirs(outputFolder, exist_ok=True)
+	return os.path.join(outputFolder, os.path.basename(fontpath))
+
+
+class Timings:
+	"""Accumulated seconds and number of runs per step (loading, every fixer, saving)."""
+
+	def __init__(self):
+		self.seconds = OrderedDict()
+		self.counts = OrderedDict()
+
+	def add(self, step, seconds, count=1):
+		self.seconds[step] = self.seconds.get(step, 0.0) + seconds
+		self.counts[step] = self.counts.get(step, 0) + count
+
+	def merge(self, other):
+		for step, seconds in other.seconds.items():
+			self.add(step, seconds, other.counts[step])
+
+	def report(self):
+		lines = ["⏱️ Timing:"]
+		for step, seconds in self.seconds.items():
+			count = self.counts[step]
+			lines.append(f"  {step}: {seconds:.3f} s total, {count}× run, {seconds / count * 1000:.1f} ms average")
+		lines.append(f"  total: {sum(self.seconds.values()):.3f} s")
+		return "\n".join(lines)
+
+
+def processFont(fontpath, fixers, arguments, timings=None, outputPath=None):
+	"""
+	Runs all fixers on one font, opened only once, and saves it if any fixer changed it.
+	Only the tables the fixers write are recompiled. If a fixer fails, the file is left unchanged.
+	With a separate outputPath, unchanged fonts are copied there, so the output folder has the whole family.
+	Returns "changed", "unchanged" or "error", and a message.
+	"""
+	if timings is None:
+		timings = Timings()
+	outputPath = outputPath or fontpath
+
+	start = timer()
+	font = openFont(fontpath)
+	timings.add("load", timer() - start)
+
+	try:
+		changedBy = []
+		for fixer in fixers:
+			print(f"🔧 {fixer.name}")
+			start = timer()
+			try:
+				fixerChanged = fixer.run(font, arguments)
+			except Exception as e:
+				return "error", f"{fixer.name}: {type(e).__name__} {e}"
+			finally:
+				timings.add(fixer.name, timer() - start)
+			if fixerChanged:
+				changedBy.append(fixer.name)
+
+		if not changedBy:
+			if os.path.abspath(outputPath) != os.path.abspath(fontpath):
+				font.close()
+				shutil.copyfile(fontpath, outputPath)
+				return "unchanged", f"No changes made. Copied {outputPath}"
+			return "unchanged", "No changes made. File left unchanged."
+
+		start = timer()
+		saveFont(font, outputPath, [tag for fixer in fixers for tag in fixer.writes])
+		timings.add("save", timer() - start)
+		return "changed", f"Changed by {', '.join(changedBy)}. Saved {outputPath}"
+	finally:
+		font.close()
+
+
+def processFontFile(fontpath, fixerNames, arguments):
+	"""Worker for processFonts(): runs the named fixers on one font file, returns status, message and its Timings."""
+	timings = Timings()
+	status, message = processFont(fontpath, [FIXERS[name] for name in fixerNames], arguments, timings, outputPathForFont(fontpath, arguments.output))
+	return status, message, timings
+
+
+def main():
+	arguments = parser.parse_args()
+	try:
+		fixers = fixersFromArgument(arguments.fixers)
+	except ValueError as e:
+		parser.error(str(e))
+	fixerNames = [fixer.name for fixer in fixers]
+
+	# skip fonts that were processed with the same fixers and options and not re-exported since:
+	# only the options of the selected fixers, e.g. -b does not invalidate a fixgdef-only run:
+	configKey = configurationKey(fixerNames, {option: getattr(arguments, option) for fixer in fixers for option in fixer.options})
+	manifests = Manifests()
+	inputHashes, skipped = {}, set()
+	for fontpath in arguments.fonts:
+		inputHashes[fontpath] = fileHash(fontpath)
+		outputPath = outputPathForFont(fontpath, arguments.output)
+		if not arguments.force and manifests.forPath(outputPath).isUpToDate(inputHashes[fontpath], configKey, outputPath, fontpath):
+			skipped.add(fontpath)
+
+	# CPU time summed over all fonts, with several jobs it is more than the wall clock time:
+	timings = Timings()
+	results = []
+	fontsToProcess = [fontpath for fontpath in arguments.fonts if fontpath not in skipped]
+	processedResults = processFonts(processFontFile, fontsToProcess, jobs=arguments.jobs, arguments=(fixerNames, arguments))
+	for i, fontpath in enumerate(arguments.fonts):
+		if fontpath in skipped:
+			result = FontResult(fontpath, "skipped", "Processed already, not re-exported since.", "", 0.0, None)
+		else:
+			result = next(processedResults)
+			outputPath = outputPathForFont(fontpath, arguments.output)
+			# unchanged fonts are copied to a separate output folder too, so every processed font has an output:
+			if result.status in ("changed", "unchanged"):
+				manifests.forPath(outputPath).record(inputHashes[fontpath], configKey, outputPath, fixerNames)
+		printResult(result, i)
+		if result.extra:
+			timings.merge(result.extra)
+		results.append(result)
+	manifests.save()
+
+	print()
+	print(timings.report())
+	print(f"\n✅ Done. {summary(results)}")
+	print(f"⏭️ Skipped {len(skipped)}, processed {len(fontsToProcess)} fonts.\n")
+
+
+if __name__ == "__main__":
+	main()
@@ -1,26 +1,147 @@
 #!/usr/bin/env python3
 import argparse
+import struct
+import sys
+from array import array
+from io import BytesIO
+from timeit import default_timer as timer
 from fontTools.ttLib import TTFont
+from fontTools.ttLib.ttCollection import TTCollection
 
-def modify_head_flags(font_path, output_path, bit3_value=1, bit13_value=1):
-	with TTFont(font_path) as font:
-		head = font['head']
-		
-		if bit3_value == 1:
-			head.flags |= 1 << 3  # Set bit 3 (value 8)
-		else:
-			head.flags &= ~(1 << 3)  # Clear bit 3
+# plain sfnt files that can be patched in place; TTC, WOFF and WOFF2 go through fontTools:
+SFNT_VERSIONS = (b'\x00\x01\x00\x00', b'OTTO', b'true')
+HEAD_CHECKSUM_ADJUSTMENT_OFFSET = 8
+HEAD_FLAGS_OFFSET = 16
+HEAD_MIN_LENGTH = 54
 
-		if bit13_value == 1:
-			head.flags |= 1 << 13  # Set bit 13 (value 8192)
-		else:
-			head.flags &= ~(1 << 13)  # Clear bit 13
-		
-		font.save(output_path)
+def new_head_flags(flags, bit3_value=1, bit13_value=1):
+	if bit3_value == 1:
+		flags |= 1 << 3  # Set bit 3 (value 8)
+	else:
+		flags &= ~(1 << 3)  # Clear bit 3
+
+	if bit13_value == 1:
+		flags |= 1 << 13  # Set bit 13 (value 8192)
+	else:
+		flags &= ~(1 << 13)  # Clear bit 13
+
+	return flags
+
+def set_head_flags(font, bit3_value=1, bit13_value=1):
+	"""Sets or clears bits 3 and 13 in head.flags of an open TTFont, returns True if the flags changed."""
+	head = font['head']
+	old_flags = head.flags
+	head.flags = new_head_flags(old_flags, bit3_value, bit13_value)
+	return head.flags != old_flags
+
+def calc_checksum(data):
+	"""OpenType table checksum: sum of big-endian uint32s, zero-padded to 4 bytes."""
+	data = bytes(data)
+	remainder = len(data) % 4
+	if remainder:
+		data += b'\0' * (4 - remainder)
+	values = array('I', data)
+	if values.itemsize != 4:
+		values = array('L', data)
+	if sys.byteorder == 'little':
+		values.byteswap()
+	return sum(values) & 0xFFFFFFFF
+
+def patch_head_flags(data, bit3_value=1, bit13_value=1):
+	"""
+	Fast path: patches head.flags in the binary data of a TTF/OTF, without decompiling any table.
+	Recomputes the head checksum in the table directory and head.checkSumAdjustment.
+	Returns the patched data, or None if the data is not a plain sfnt (TTC, WOFF, WOFF2) or has no usable head table.
+	"""
+	if data[:4] not in SFNT_VERSIONS:
+		return None
+	num_tables = struct.unpack_from('>H', data, 4)[0]
+	for i in range(num_tables):
+		record_offset = 12 + 16 * i
+		tag, checksum, offset, length = struct.unpack_from('>4sLLL', data, record_offset)
+		if tag == b'head':
+			break
+	else:
+		return None
+	if length < HEAD_MIN_LENGTH or offset + length > len(data):
+		return None
+
+	font = bytearray(data)
+	flags = struct.unpack_from('>H', font, offset + HEAD_FLAGS_OFFSET)[0]
+	struct.pack_into('>H', font, offset + HEAD_FLAGS_OFFSET, new_head_flags(flags, bit3_value, bit13_value))
+
+	# head checksum is calculated with checkSumAdjustment set to zero:
+	struct.pack_into('>L', font, offset + HEAD_CHECKSUM_ADJUSTMENT_OFFSET, 0)
+	struct.pack_into('>L', font, record_offset + 4, calc_checksum(font[offset:offset + length]))
+	struct.pack_into('>L', font, offset + HEAD_CHECKSUM_ADJUSTMENT_OFFSET, (0xB1B0AFBA - calc_checksum(font)) & 0xFFFFFFFF)
+	return bytes(font)
+
+def modify_head_flags_with_fonttools(data, bit3_value=1, bit13_value=1, recalc_timestamp=True):
+	"""Slow path: decompiles the font (or all fonts of a TTC) with fontTools and recompiles every table."""
+	output = BytesIO()
+	if data[:4] == b'ttcf':
+		with TTCollection(BytesIO(data), recalcTimestamp=recalc_timestamp) as collection:
+			for font in collection.fonts:
+				set_head_flags(font, bit3_value, bit13_value)
+			collection.save(output)
+	else:
+		with TTFont(BytesIO(data), recalcTimestamp=recalc_timestamp) as font:
+			set_head_flags(font, bit3_value, bit13_value)
+			font.save(output)
+	return output.getvalue()
+
+def modify_head_flags(font_path, output_path, bit3_value=1, bit13_value=1, fast=True):
+	"""Returns 'fast' or 'slow', depending on which path was used."""
+	with open(font_path, 'rb') as font_file:
+		data = font_file.read()
+	patched_data = patch_head_flags(data, bit3_value, bit13_value) if fast else None
+	used_path = 'fast'
+	if patched_data is None:
+		patched_data = modify_head_flags_with_fonttools(data, bit3_value, bit13_value)
+		used_path = 'slow'
+	if patched_data != data or output_path != font_path:
+		with open(output_path, 'wb') as font_file:
+			font_file.write(patched_data)
+	return used_path
+
+def verify_fast_path(font_path, bit3_value=1, bit13_value=1):
+	"""
+	Compares the fast path with fontTools (without timestamp update) for the same input.
+	Returns (identical, message). Output is identical for fonts in canonical layout, e.g. fonts written by fontTools.
+	"""
+	with open(font_path, 'rb') as font_file:
+		data = font_file.read()
+	fast_data = patch_head_flags(data, bit3_value, bit13_value)
+	if fast_data is None:
+		return True, 'no fast path (TTC, WOFF or WOFF2), fontTools is used anyway'
+	slow_data = modify_head_flags_with_fonttools(data, bit3_value, bit13_value, recalc_timestamp=False)
+	if fast_data == slow_data:
+		return True, 'byte-identical to fontTools output'
+	if len(fast_data) != len(slow_data):
+		return False, f'differs from fontTools output: {len(fast_data)} vs. {len(slow_data)} bytes (input not in canonical fontTools layout)'
+	differing_bytes = sum(1 for a, b in zip(fast_data, slow_data) if a != b)
+	return False, f'differs from fontTools output in {differing_bytes} bytes (input not in canonical fontTools layout)'
+
+def benchmark(font_path, bit3_value=1, bit13_value=1, repeat=5):
+	"""Best-of-repeat time in seconds for the fast and the slow path, in memory, nothing is written."""
+	with open(font_path, 'rb') as font_file:
+		data = font_file.read()
+
+	def best_time(function):
+		times = []
+		for i in range(repeat):
+			start = timer()
+			function(data, bit3_value, bit13_value)
+			times.append(timer() - start)
+		return min(times)
+
+	fast_time = best_time(patch_head_flags) if patch_head_flags(data) is not None else None
+	slow_time = best_time(modify_head_flags_with_fonttools)
+	return fast_time, slow_time
 
 if __name__ == "__main__":
 	parser = argparse.ArgumentParser(
-		description='Modify head.flags bits 3 and 13 in OpenType fonts',
+		description='Modify head.flags bits 3 and 13 in OpenType fonts. TTF and OTF files are patched in place (only head.flags and checksums change), TTC, WOFF and WOFF2 are rewritten with fontTools.',
 		)
 	parser.add_argument(
 		'fonts',
@@ -48,14 +169,55 @@ if __name__ == "__main__":
 		'--output',
 		help='output file (if not specified, will overwrite input file)',
 		)
-	
+	parser.add_argument(
+		'-s',
+		'--slow',
+		action='store_true',
+		help='always decompile and recompile the font with fontTools (also updates head.modified)',
+		)
+	parser.add_argument(
+		'--verify',
+		action='store_true',
+		help='compare the fast path with the fontTools result for every font, do not write anything',
+		)
+	parser.add_argument(
+		'--benchmark',
+		action='store_true',
+		help='time the fast and the fontTools path for every font, do not write anything',
+		)
+
 	args = parser.parse_args()
-	
+
+	if args.verify:
+		mismatches = 0
+		for font_path in args.fonts:
+			identical, message = verify_fast_path(font_path, args.bit3, args.bit13)
+			mismatches += not identical
+			print(f"{'✅' if identical else '⚠️'} {font_path}: {message}")
+		print()
+		sys.exit(1 if mismatches else 0)
+
+	if args.benchmark:
+		total_fast, total_slow = 0.0, 0.0
+		for font_path in args.fonts:
+			fast_time, slow_time = benchmark(font_path, args.bit3, args.bit13)
+			if fast_time is None:
+				print(f"⏱️ {font_path}: fontTools {slow_time * 1000:.2f} ms, no fast path")
+				continue
+			total_fast += fast_time
+			total_slow += slow_time
+			print(f"⏱️ {font_path}: fast {fast_time * 1000:.2f} ms, fontTools {slow_time * 1000:.2f} ms, {slow_time / max(fast_time, 1e-9):.0f}× faster")
+		if total_fast:
+			print(f"\nTotal: fast {total_fast * 1000:.1f} ms, fontTools {total_slow * 1000:.1f} ms, {total_slow / total_fast:.0f}× faster")
+		print()
+		sys.exit(0)
+
 	for font_path in args.fonts:
 		output = args.output or font_path
-		modify_head_flags(font_path, output, args.bit3, args.bit13)
+		used_path = modify_head_flags(font_path, output, args.bit3, args.bit13, fast=not args.slow)
+		via = '' if used_path == 'fast' else ' (via fontTools)'
 		if font_path != output:
-			print(f"✅ Updated bit3={args.bit3}, bit13={args.bit13} in {font_path} -> {output}")
+			print(f"✅ Updated bit3={args.bit3}, bit13={args.bit13} in {font_path} -> {output}{via}")
 		else:
-			print(f"✅ Updated bit3={args.bit3}, bit13={args.bit13} in {font_path}")
-	print()
\ No newline at end of file
+			print(f"✅ Updated bit3={args.bit3}, bit13={args.bit13} in {font_path}{via}")
+	print()
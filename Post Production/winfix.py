@@ -19,17 +19,23 @@ import argparse
 import sys
 import os
 import glob
-from fontTools.ttLib import TTFont
+from fontTools.ttLib import newTable
 from fontTools.otlLib.builder import buildStatTable
 from fontTools.fontBuilder import FontBuilder
 from fontTools.ttLib.tables import otTables
+from batch import addJobsArgument, processFonts, printResult, summary
+from fontloader import openFont, saveFont
+
+# tables addFvarAndStatToFont() reads and writes:
+TABLES_READ = ('name', 'OS/2', 'head', 'post')
+TABLES_WRITTEN = ('name', 'fvar', 'STAT')
 
 def expandInputFiles(inputPatterns):
 	"""Expand input patterns with wildcards to font file paths."""
 	files = []
 	for pattern in inputPatterns:
 		files.extend(glob.glob(pattern))
-	return list(set(files))
+	return sorted(set(files))
 
 def axisNameFromTag(tag, customNames=None):
 	"""Get human-readable name for axis tag with custom name support."""
@@ -108,13 +114,13 @@ def reportStat(ttFont):
 	if 'STAT' not in ttFont:
 		return "No STAT table present."
 	
-	stat = ttFont['STAT']
+	stat = ttFont['STAT'].table
 	report = []
-	report.append(f"STAT table version: {stat.tableVersion >> 16}.{stat.tableVersion & 0xFFFF}")
+	report.append(f"STAT table version: {stat.Version >> 16}.{stat.Version & 0xFFFF}")
 	
 	# Report design axis records
 	report.append("\nDesign Axis Records:")
-	for axis in stat.DesignAxisRecord:
+	for axis in stat.DesignAxisRecord.Axis:
 		name = getNameString(ttFont, axis.AxisNameID)
 		report.append(f"  Tag: {axis.AxisTag}")
 		report.append(f"	Name ID: {axis.AxisNameID} ('{name}')")
@@ -122,7 +128,7 @@ def reportStat(ttFont):
 	
 	# Report axis value records
 	report.append("\nAxis Value Records:")
-	for i, value in enumerate(stat.AxisValueArray):
+	for i, value in enumerate(stat.AxisValueArray.AxisValue):
 		value_name = getNameString(ttFont, value.ValueNameID)
 		flags_desc = "Elidable" if value.Flags & 0x02 else "Not elidable"
 		
@@ -329,9 +335,12 @@ def addStatTable(ttFont, axesList, axisValuesDict):
 	
 	# Create STAT table
 	stat = otTables.STAT()
-	stat.tableVersion = 0x00010002  # Version 1.2
-	stat.DesignAxisRecord = []
-	stat.AxisValueArray = []
+	stat.Version = 0x00010002  # Version 1.2
+	stat.DesignAxisRecordSize = 8
+	stat.DesignAxisRecord = otTables.AxisRecordArray()
+	stat.DesignAxisRecord.Axis = []
+	stat.AxisValueArray = otTables.AxisValueArray()
+	stat.AxisValueArray.AxisValue = []
 	
 	# Add axis records
 	for idx, (tag, minVal, defaultVal, maxVal, axisNameStr) in enumerate(axesList):
@@ -339,7 +348,7 @@ def addStatTable(ttFont, axesList, axisValuesDict):
 		axisRecord.AxisTag = tag
 		axisRecord.AxisNameID = getOrAddNameID(ttFont, axisNameStr)
 		axisRecord.AxisOrdering = idx
-		stat.DesignAxisRecord.append(axisRecord)
+		stat.DesignAxisRecord.Axis.append(axisRecord)
 	
 	# Add axis value records
 	for idx, (tag, minVal, defaultVal, maxVal, axisNameStr) in enumerate(axesList):
@@ -370,32 +379,32 @@ def addStatTable(ttFont, axesList, axisValuesDict):
 		else:
 			axisValue.ValueNameID = getOrAddNameID(ttFont, axisNameStr)
 		
-		stat.AxisValueArray.append(axisValue)
+		stat.AxisValueArray.AxisValue.append(axisValue)
 	
 	# Set elided fallback name
 	stat.ElidedFallbackNameID = 17
 	
+	stat.DesignAxisCount = len(stat.DesignAxisRecord.Axis)
+	stat.AxisValueCount = len(stat.AxisValueArray.AxisValue)
+	
 	# Add table to font
-	ttFont['STAT'] = stat
+	statTable = newTable('STAT')
+	statTable.table = stat
+	ttFont['STAT'] = statTable
 
 
-def addFvarAndStat(inputPath, outputPath=None, axes=None, customNames=None, force=False):
+def addFvarAndStatToFont(ttFont, axes=None, customNames=None, force=False):
 	"""
-	Add fvar and STAT tables to a static font.
+	Add fvar and STAT tables to an open static font.
 	
 	Args:
-		inputPath: Path to input font
-		outputPath: Output path (None = overwrite input)
+		ttFont: TTFont object
 		axes: Dictionary of axis tags to values
 		customNames: Dictionary of custom axis names
 		force: Overwrite existing tables
-	"""
-	ttFont = TTFont(inputPath)
-	nameTable = ttFont['name']
-	
-	# Remove Mac name table entries before any processing
-	removeMacNames(ttFont)
 	
+	Returns True, the font is always changed. Raises ValueError (font untouched) if it cannot be processed.
+	"""
 	if 'gvar' in ttFont:
 		raise ValueError("Font contains gvar table - not for variable fonts")
 	if not force:
@@ -404,6 +413,9 @@ def addFvarAndStat(inputPath, outputPath=None, axes=None, customNames=None, forc
 		if 'STAT' in ttFont:
 			raise ValueError("STAT table exists (use --force)")
 	
+	# Remove Mac name table entries before any processing
+	removeMacNames(ttFont)
+	
 	styleName = getNameById(ttFont, 17) or getNameById(ttFont, 2)
 	if not styleName:
 		raise ValueError("Missing style name (name ID 17 or 2)")
@@ -437,10 +449,25 @@ def addFvarAndStat(inputPath, outputPath=None, axes=None, customNames=None, forc
 	
 	# Remove Mac names again after all processing
 	removeMacNames(ttFont)
+	return True
 
-	outputPath = outputPath or inputPath
-	print(ttFont, outputPath)
-	ttFont.save(outputPath)
+def addFvarAndStat(inputPath, outputPath=None, axes=None, customNames=None, force=False):
+	"""
+	Add fvar and STAT tables to a static font.
+	
+	Args:
+		inputPath: Path to input font
+		outputPath: Output path (None = overwrite input)
+		axes: Dictionary of axis tags to values
+		customNames: Dictionary of custom axis names
+		force: Overwrite existing tables
+	"""
+	with openFont(inputPath) as ttFont:
+		addFvarAndStatToFont(ttFont, axes, customNames, force)
+
+		outputPath = outputPath or inputPath
+		print(ttFont, outputPath)
+		saveFont(ttFont, outputPath, TABLES_WRITTEN)
 
 def main():
 	parser = argparse.ArgumentParser(description="Add fvar/STAT tables to static fonts")
@@ -449,6 +476,7 @@ def main():
 	parser.add_argument("-a", "--axes", default="wdth,wght,ital", help="Comma-separated axis tags (default: wdth,wght,ital)")
 	parser.add_argument("-n", "--name", action="append", help='Custom axis name (e.g., -n SERF="Serif Shape")')
 	parser.add_argument("-f", "--force", action="store_true", help="Overwrite existing tables")
+	addJobsArgument(parser)
 	args = parser.parse_args()
 	
 	# Expand input patterns
@@ -478,26 +506,33 @@ def main():
 				customNames[tag] = name
 	
 	# Process each file
-	for inputPath in inputFiles:
-		try:
-			outputPath = None
-			if args.output:
-				if not os.path.isdir(args.output):
-					os.makedirs(args.output, exist_ok=True)
-				outputPath = os.path.join(args.output, os.path.basename(inputPath))
-			
-			addFvarAndStat(
-				inputPath,
-				outputPath,
-				axesDict,
-				customNames,
-				args.force,
-			)
-			print(f"Processed: {inputPath}")
-		except Exception as e:
-			import traceback
-			print(traceback.format_exc())
-			print(f"Error processing {inputPath}: {str(e)}")
+	results = []
+	for i, result in enumerate(processFonts(processFile, inputFiles, jobs=args.jobs, arguments=(args.output, axesDict, customNames, args.force))):
+		printResult(result, i)
+		results.append(result)
+	print(summary(results))
+
+def processFile(inputPath, outputFolder, axesDict, customNames, force):
+	"""Worker for batch.processFonts(): adds fvar and STAT to one font file."""
+	try:
+		outputPath = None
+		if outputFolder:
+			if not os.path.isdir(outputFolder):
+				os.makedirs(outputFolder, exist_ok=True)
+			outputPath = os.path.join(outputFolder, os.path.basename(inputPath))
+		
+		addFvarAndStat(
+			inputPath,
+			outputPath,
+			axesDict,
+			customNames,
+			force,
+		)
+		return "changed", f"Processed: {inputPath}"
+	except Exception as e:
+		import traceback
+		print(traceback.format_exc())
+		return "error", f"Error processing {inputPath}: {str(e)}"
 
 if __name__ == "__main__":
 	main()
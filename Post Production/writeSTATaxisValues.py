@@ -6,6 +6,12 @@ python3 writeSTATaxisValues.py -a "wdth;100.0=Regular*|ital;0.0>1.0=Regular*" *.
 import fontTools
 from fontTools import ttLib
 from argparse import ArgumentParser
+from fontloader import openFont, saveFont
+
+# tables parameterToSTAT() reads and writes:
+TABLES_READ = ("name", "STAT")
+TABLES_WRITTEN = ("name", "STAT")
+
 parser = ArgumentParser(
 	description="For every axis, renames normal STAT entries to ‘Regular’ (also makes changes in name table if necessary), and makes them elidable (Flags=2). Typically only necessary in italic OTVAR exports with 2 or more axes. Also, fixes Format1/3 duplicates (if a Format 3 exists, there must be no equivalent Format 1 entry)."
 )
@@ -215,22 +221,27 @@ def parameterToSTAT(axisValueArgument, font):
 # 		variableFontExport.customParameters.append(parameter)
 
 
-print("🔢 Rewriting STAT.DesignAxisRecord and STAT.AxisValues:")
+def main():
+	print("🔢 Rewriting STAT.DesignAxisRecord and STAT.AxisValues:")
 
-arguments = parser.parse_args()
-fonts = arguments.fonts
-axisValues = arguments.axisValueString
+	arguments = parser.parse_args()
+	fonts = arguments.fonts
+	axisValues = arguments.axisValueString
+
+	changed = 0
+	for i, fontpath in enumerate(fonts):
+		print(f"\n📄 {i + 1}. {fontpath}")
+		with openFont(fontpath) as font:
+			changesMade = parameterToSTAT(axisValues, font)
+			if changesMade:
+				changed += 1
+				saveFont(font, fontpath, TABLES_WRITTEN)
+				print(f"💾 Saved {fontpath}")
+			else:
+				print("🤷🏻‍♀️ No changes made. File left unchanged.")
+
+	print(f"✅ Done. Changed {changed} of {i + 1} fonts.\n")
 
-changed = 0
-for i, fontpath in enumerate(fonts):
-	print(f"\n📄 {i + 1}. {fontpath}")
-	font = ttLib.TTFont(fontpath)
-	changesMade = parameterToSTAT(axisValues, font)
-	if changesMade:
-		changed += 1
-		font.save(fontpath, reorderTables=False)
-		print(f"💾 Saved {fontpath}")
-	else:
-		print("🤷🏻‍♀️ No changes made. File left unchanged.")
 
-print(f"✅ Done. Changed {changed} of {i + 1} fonts.\n")
+if __name__ == "__main__":
+	main()
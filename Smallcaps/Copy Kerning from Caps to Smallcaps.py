@@ -6,6 +6,7 @@ Looks for cap kerning pairs and reduplicates their kerning for corresponding .sc
 """
 
 import vanilla
+from timeit import default_timer as timer
 from GlyphsApp import Glyphs, Message
 from mekkablue import mekkaObject
 
@@ -115,6 +116,35 @@ def isSmallcap(glyph):
 	return False
 
 
+def smallcapKerning(masterKernDict, scKeyForKey, glyphNames):
+	"""
+	Transforms a whole master kerning table in one go, with precomputed lookups instead of per-pair name resolution:
+	scKeyForKey maps cap kerning keys (groups and glyph IDs) to their smallcap keys,
+	glyphNames maps glyph IDs to glyph names.
+	Returns (scLeftKey, scRightKey, value, leftName, rightName) for every pair with at least one smallcap side.
+	Keys without a smallcap counterpart are kept, orphaned glyph IDs are skipped.
+	"""
+
+	def nameForKey(key):
+		return key if key.startswith("@") else glyphNames.get(key)
+
+	scPairs = []
+	for leftKey, rightDict in masterKernDict.items():
+		leftName = nameForKey(leftKey)
+		if leftName is None:
+			continue
+		scLeftKey = scKeyForKey.get(leftKey)
+		for rightKey, value in rightDict.items():
+			scRightKey = scKeyForKey.get(rightKey)
+			if scLeftKey is None and scRightKey is None:
+				continue
+			rightName = nameForKey(rightKey)
+			if rightName is None:
+				continue
+			scPairs.append((scLeftKey or leftName, scRightKey or rightName, value, leftName, rightName))
+	return scPairs
+
+
 class CopyKerningFromCapsToSmallcaps(mekkaObject):
 	prefDict = {
 		"smallcapSuffix": ".sc",
@@ -204,8 +234,11 @@ class CopyKerningFromCapsToSmallcaps(mekkaObject):
 
 				# Sync left and right Kerning Groups between UC and SC:
 				print("Kerning Groups:")
-				UppercaseGroups = set()
+				startTime = timer()
+				scKeyForKey = {}  # cap group keys and glyph IDs -> smallcap keys
+				glyphNames = {}  # glyph IDs -> glyph names
 				for g in thisFont.glyphs:
+					glyphNames[g.id] = g.name
 					if glyphNameIsSCconvertible(g.name, thisFont, includeNonLetters=includeNonLetters, suffix=smallcapSuffix, figureSuffix=figureSuffix):
 						ucGlyphName = g.name
 						scGlyphName = smallcapName(
@@ -215,13 +248,16 @@ class CopyKerningFromCapsToSmallcaps(mekkaObject):
 						if scGlyph is None:
 							print("  ⚠️ SC %s not found in font (UC %s exists)" % (scGlyphName, ucGlyphName))
 							continue
+						scKeyForKey[g.id] = scGlyphName
 
 						LeftKey = g.leftKerningGroupId()
 						if LeftKey:
-							UppercaseGroups.add(LeftKey)
-							scLeftKey = LeftKey[:7] + smallcapName(
-								LeftKey[7:], suffix=smallcapSuffix, lowercase=areSmallcapsNamedLowercase, includeNonLetters=includeNonLetters, figureSuffix=figureSuffix
-							)
+							scLeftKey = scKeyForKey.get(LeftKey)
+							if scLeftKey is None:
+								scLeftKey = LeftKey[:7] + smallcapName(
+									LeftKey[7:], suffix=smallcapSuffix, lowercase=areSmallcapsNamedLowercase, includeNonLetters=includeNonLetters, figureSuffix=figureSuffix
+								)
+								scKeyForKey[LeftKey] = scLeftKey
 							if scGlyph.leftKerningGroupId() is None:
 								scGlyph.setLeftKerningGroupId_(scLeftKey)
 								print("  %s: set LEFT group to @%s (was empty)." % (scGlyphName, scLeftKey[7:]))
@@ -230,106 +266,54 @@ class CopyKerningFromCapsToSmallcaps(mekkaObject):
 
 						RightKey = g.rightKerningGroupId()
 						if RightKey:
-							UppercaseGroups.add(RightKey)
-							scRightKey = RightKey[:7] + smallcapName(
-								RightKey[7:], suffix=smallcapSuffix, lowercase=areSmallcapsNamedLowercase, includeNonLetters=includeNonLetters, figureSuffix=figureSuffix
-							)
+							scRightKey = scKeyForKey.get(RightKey)
+							if scRightKey is None:
+								scRightKey = RightKey[:7] + smallcapName(
+									RightKey[7:], suffix=smallcapSuffix, lowercase=areSmallcapsNamedLowercase, includeNonLetters=includeNonLetters, figureSuffix=figureSuffix
+								)
+								scKeyForKey[RightKey] = scRightKey
 							if scGlyph.rightKerningGroupId() is None:
 								scGlyph.setRightKerningGroupId_(scRightKey)
 								print("  %s: set RIGHT group to @%s (was empty)." % (scGlyphName, scRightKey[7:]))
 							elif scGlyph.rightKerningGroupId() != scRightKey:
 								print("  %s: unexpected RIGHT group: @%s (should be @%s), not changed." % (scGlyphName, scGlyph.rightKerningGroupId()[7:], scRightKey[7:]))
 
-				print("  ✅ Kerning group conversion done.\n")
+				print("  ✅ Kerning group conversion done, %i keys mapped in %.2f s.\n" % (len(scKeyForKey), timer() - startTime))
 
 				if includeAllMasters:
 					masters = thisFont.masters
 				else:
 					masters = (thisFont.selectedFontMaster, )
 
+				timings = []
 				for selectedFontMaster in masters:
 					fontMasterID = selectedFontMaster.id
 					fontMasterName = selectedFontMaster.name
-					masterKernDict = thisFont.kerning[fontMasterID]
-					# scKerningList = []
+					masterKernDict = thisFont.kerning.get(fontMasterID, {})
 					# Report in the Macro Window:
 					print("\n🔠 Master: %s\n" % (fontMasterName))
 
-					# Sync Kerning Values between UC and SC:
+					# Sync Kerning Values between UC and SC, whole master at once:
 					print("Kerning Values:")
-					kerningToBeAdded = []
-					LeftKeys = masterKernDict.keys()
-					for LeftKey in LeftKeys:
-						# is left key a class?
-						leftKeyIsGroup = (LeftKey[0] == "@")
-						# prepare SC left key:
-						scLeftKey = None
-						# determine the SC leftKey:
-						if leftKeyIsGroup:  # a kerning group
-							leftKeyName = "@%s" % LeftKey[7:]
-							if LeftKey in UppercaseGroups:
-								scLeftKey = LeftKey[:7] + smallcapName(
-									LeftKey[7:], suffix=smallcapSuffix, lowercase=areSmallcapsNamedLowercase, includeNonLetters=includeNonLetters, figureSuffix=figureSuffix
-								)
-						else:  # a single glyph (exception)
-							leftGlyphName = thisFont.glyphForId_(LeftKey).name
-							leftKeyName = leftGlyphName
-							if glyphNameIsSCconvertible(leftGlyphName, font=thisFont, includeNonLetters=includeNonLetters, suffix=smallcapSuffix, figureSuffix=figureSuffix):
-								scLeftGlyphName = smallcapName(
-									leftGlyphName, suffix=smallcapSuffix, lowercase=areSmallcapsNamedLowercase, includeNonLetters=includeNonLetters, figureSuffix=figureSuffix
-								)
-								scLeftGlyph = thisFont.glyphs[scLeftGlyphName]
-								if scLeftGlyph:
-									scLeftKey = scLeftGlyph.name
-
-						RightKeys = masterKernDict[LeftKey].keys()
-						for RightKey in RightKeys:
-							# is right key a class?
-							rightKeyIsGroup = (RightKey[0] == "@")
-							# prepare SC right key:
-							scRightKey = None
-							# determine the SC rightKey:
-							if rightKeyIsGroup:  # a kerning group
-								rightKeyName = "@%s" % RightKey[7:]
-								if RightKey in UppercaseGroups:
-									scRightKey = RightKey[:7] + smallcapName(
-										RightKey[7:], suffix=smallcapSuffix, lowercase=areSmallcapsNamedLowercase, includeNonLetters=includeNonLetters, figureSuffix=figureSuffix
-									)
-							else:  # a single glyph (exception)
-								rightGlyphName = thisFont.glyphForId_(RightKey).name
-								rightKeyName = rightGlyphName
-								if glyphNameIsSCconvertible(rightGlyphName, font=thisFont, includeNonLetters=includeNonLetters, suffix=smallcapSuffix, figureSuffix=figureSuffix):
-									scRightGlyphName = smallcapName(
-										rightGlyphName, suffix=smallcapSuffix, lowercase=areSmallcapsNamedLowercase, includeNonLetters=includeNonLetters, figureSuffix=figureSuffix
-									)
-									scRightGlyph = thisFont.glyphs[scRightGlyphName]
-									if scRightGlyph:
-										scRightKey = scRightGlyph.name
-
-							# If we have one of the left+right keys, create a pair:
-							if scRightKey is not None or scLeftKey is not None:
-
-								# fallback:
-								if scLeftKey is None:
-									scLeftKey = leftKeyName.replace("@", "@MMK_L_")
-								if scRightKey is None:
-									scRightKey = rightKeyName.replace("@", "@MMK_R_")
-
-								scKernValue = masterKernDict[LeftKey][RightKey]
-								print(
-									"  Set kerning: %s %s %.1f (derived from %s %s)" %
-									(scLeftKey.replace("MMK_L_", ""), scRightKey.replace("MMK_R_", ""), scKernValue, leftKeyName, rightKeyName)
-								)
-								kerningToBeAdded.append((fontMasterID, scLeftKey, scRightKey, scKernValue))
-
-					# go through the list of SC kern pairs, and add them to the font:
+					masterStartTime = timer()
+					scPairs = smallcapKerning(masterKernDict, scKeyForKey, glyphNames)
+					transformTime = timer() - masterStartTime
+					if scPairs:
+						print("\n".join(
+							"  Set kerning: %s %s %.1f (derived from %s %s)" % (
+								scLeftKey.replace("MMK_L_", ""),
+								scRightKey.replace("MMK_R_", ""),
+								scKernValue,
+								leftName.replace("MMK_L_", ""),
+								rightName.replace("MMK_R_", ""),
+							) for scLeftKey, scRightKey, scKernValue, leftName, rightName in scPairs
+						))
+
+					# add all SC kern pairs to the font, without interface updates in between:
+					writeStartTime = timer()
 					thisFont.disableUpdateInterface()
 					try:
-						for thisKernInfo in kerningToBeAdded:
-							fontMasterID = thisKernInfo[0]
-							scLeftKey = thisKernInfo[1]
-							scRightKey = thisKernInfo[2]
-							scKernValue = thisKernInfo[3]
+						for scLeftKey, scRightKey, scKernValue, leftName, rightName in scPairs:
 							thisFont.setKerningForPair(fontMasterID, scLeftKey, scRightKey, scKernValue)
 
 					except Exception as e:
@@ -343,7 +327,14 @@ class CopyKerningFromCapsToSmallcaps(mekkaObject):
 					finally:
 						thisFont.enableUpdateInterface()  # re-enables UI updates in Font View
 
-				print("  Done.")
+					timings.append((fontMasterName, len(scPairs), transformTime, timer() - writeStartTime))
+					print("  Done.")
+
+				# timing report:
+				print("\n⏱️ Timing:")
+				for fontMasterName, pairCount, transformTime, writeTime in timings:
+					print("  %s: %i pairs, transformed in %.3f s, written in %.3f s" % (fontMasterName, pairCount, transformTime, writeTime))
+				print("  Total: %.2f s" % (timer() - startTime))
 
 				self.w.close()  # delete if you want window to stay open
 